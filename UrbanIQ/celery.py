@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from celery import Celery
+from celery.signals import worker_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'UrbanIQ.settings')
 
@@ -9,6 +10,14 @@ app = Celery('UrbanIQ')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    from django.conf import settings
+    from api.metrics import start_worker_server
+
+    start_worker_server(getattr(settings, 'METRICS_WORKER_PORT', 0))
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
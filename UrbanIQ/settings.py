@@ -64,6 +64,12 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER or 'no
 
 # If credentials are missing, still allow the app to run; emails will log failures
 EMAIL_CONFIGURED = bool(EMAIL_HOST_USER and EMAIL_HOST_PASSWORD)
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '20'))
+
+# Notification outbox delivery (see api.tasks.drain_notification_outbox)
+NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', '50'))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', '5'))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_BASE_SECONDS', '60'))
 
 # Django REST Framework configuration
 REST_FRAMEWORK = {
@@ -75,6 +81,28 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Upper bound for page_size on report listings
+REPORTS_MAX_PAGE_SIZE = int(os.environ.get('REPORTS_MAX_PAGE_SIZE', '100'))
+# Rows fetched (and prefetched) per server-side cursor round trip when streaming
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '500'))
+# Bulk intake (/api/reports/bulk, manage.py ingest_complaints): rows per request and per INSERT
+BULK_INGEST_MAX_ROWS = int(os.environ.get('BULK_INGEST_MAX_ROWS', '10000'))
+BULK_INGEST_CHUNK_SIZE = int(os.environ.get('BULK_INGEST_CHUNK_SIZE', '1000'))
+# Reports one /api/reports/bulk-status request may move
+BULK_STATUS_MAX_IDS = int(os.environ.get('BULK_STATUS_MAX_IDS', '1000'))
+# Serve list/detail/track/me/departments GETs from native async views (api/async_views.py);
+# only worth it under the ASGI server, where they run on the event loop.
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '0') == '1'
+# Requests per ASGI worker using the database at once on those paths (each holds a connection)
+ASYNC_READ_CONCURRENCY = int(os.environ.get('ASYNC_READ_CONCURRENCY', '20'))
+# Prometheus metrics (/metrics; needs prometheus_client). Set PROMETHEUS_MULTIPROC_DIR to
+# aggregate gunicorn workers. Scrapes must send METRICS_TOKEN as a Bearer token; without
+# one, /metrics answers 403 unless DEBUG is on.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Port on which each Celery worker serves its own metrics (0: off)
+METRICS_WORKER_PORT = int(os.environ.get('METRICS_WORKER_PORT', '0'))
+
 # Simple JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -86,6 +114,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -131,9 +160,73 @@ DATABASES = {
     }
 }
 
+# Shared cache (Redis in docker-compose); per-process memory when not configured.
+# Report list ETags come from version counters kept here, so lists are sent
+# without validators unless the cache is shared (api/conditional.py).
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a user's resolved role/authority department stays in the shared cache
+ROLE_CACHE_TTL = int(os.environ.get('ROLE_CACHE_TTL', '300'))
+
+# Report change push (/api/reports/stream): Redis pub/sub shared by all ASGI workers; unset = in-process only
+PUSH_REDIS_URL = os.environ.get('PUSH_REDIS_URL', '')
+PUSH_HEARTBEAT_SECONDS = int(os.environ.get('PUSH_HEARTBEAT_SECONDS', '25'))
+PUSH_TICKET_TTL = int(os.environ.get('PUSH_TICKET_TTL', '30'))
+# Events buffered per open stream before the oldest are dropped
+PUSH_QUEUE_SIZE = int(os.environ.get('PUSH_QUEUE_SIZE', '100'))
+
 # Celery configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/1')
+# Ack after the task finishes so a worker crash mid-encode redelivers the job
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    'recover-video-jobs': {
+        'task': 'api.tasks.recover_video_jobs',
+        'schedule': 300.0,
+    },
+    'drain-notification-outbox': {
+        'task': 'api.tasks.drain_notification_outbox',
+        'schedule': 30.0,
+    },
+    'reconcile-complaint-stats': {
+        'task': 'api.tasks.reconcile_complaint_stats',
+        'schedule': float(os.environ.get('STATS_RECONCILE_SECONDS', '900')),
+    },
+}
+
+# Video transcoding jobs
+VIDEO_JOB_MAX_RETRIES = int(os.environ.get('VIDEO_JOB_MAX_RETRIES', '3'))
+# A RUNNING job with no progress heartbeat for this long is treated as orphaned
+VIDEO_JOB_STALE_SECONDS = int(os.environ.get('VIDEO_JOB_STALE_SECONDS', '600'))
+
+# Image compression pool shared by requests within each worker process (0 = compress inline)
+IMAGE_POOL_WORKERS = int(os.environ.get('IMAGE_POOL_WORKERS', str(min(4, os.cpu_count() or 1))))
+IMAGE_POOL_START_METHOD = os.environ.get('IMAGE_POOL_START_METHOD', 'spawn')
+# Longest side of the thumbnail rendered next to each compressed image (admin previews)
+THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE', '240'))
+# dHash Hamming distance at which two report photos are flagged as the same scene
+PHASH_MAX_DISTANCE = int(os.environ.get('PHASH_MAX_DISTANCE', '6'))
+# Estimated Jaccard similarity of title/description/location at which open reports are linked as near-duplicates
+TEXT_DUP_THRESHOLD = float(os.environ.get('TEXT_DUP_THRESHOLD', '0.5'))
+
+# Map queries: geohash prefixes per spatial filter and points per response
+GEO_MAX_CELLS = int(os.environ.get('GEO_MAX_CELLS', '16'))
+GEO_MAX_POINTS = int(os.environ.get('GEO_MAX_POINTS', '500'))
 
 
 # Password validation
@@ -0,0 +1,232 @@
+"""Async GET paths for the hottest read endpoints, used when ASYNC_READ_VIEWS is on (ASGI deployments).
+
+Each one fronts the existing DRF view. The async path answers authenticated
+JSON GETs with the async ORM; everything else (other methods, `?format=`, the
+browsable API, missing or bad credentials, cursor pagination) goes to the
+sync view untouched. Both paths render the same bytes and headers.
+"""
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from complaints.models import Complaint
+from .conditional import (
+    acomplaint_meta, add_validators, complaint_validators, is_conditional, list_validators, not_modified, validators_for,
+)
+from .departments import department_registry
+from .duplicates import similar_reports
+from .filters import InvalidFilter, filter_complaints
+from .pagination import InvalidPageParam, count_for_mode, parse_count_mode, parse_page, parse_page_size
+from .roles import can_view_complaint, resolve_role, visible_complaints
+from .serializers import (
+    COMPLAINT_DEFERRED, COMPLAINT_SELECT_RELATED, ComplaintListSerializer, ComplaintSerializer, UserSerializer,
+)
+from .views import ComplaintDetailView, ComplaintListCreateView, DepartmentListView, MeView, ReportTrackView
+
+_renderer = JSONRenderer()
+
+
+def _json(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type=_renderer.media_type)
+
+
+def _allowed_methods(view_class):
+    # What APIView.allowed_methods reports once as_view() has added HEAD for GET
+    return [
+        m.upper() for m in view_class.http_method_names
+        if hasattr(view_class, m) or (m == "head" and hasattr(view_class, "get"))
+    ]
+
+
+def _plain_json(request):
+    """True when DRF's content negotiation would pick JSON for this request."""
+    if "format" in request.GET:
+        return False
+    accept = request.headers.get("Accept", "").split(",")[0].split(";")[0].strip()
+    return accept in ("", "*/*", "application/json")
+
+
+def _authenticate(request):
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if authenticated is None:
+        return None
+    user = authenticated[0]
+    resolve_role(user)  # memoized on the instance; later role checks need no I/O
+    return user
+
+
+_slots = weakref.WeakKeyDictionary()
+
+
+def _db_slots():
+    """This event loop's limit on requests using the database at once.
+
+    Under ASGI every request runs its queries on its own thread and connection;
+    without a cap, a burst of slow clients would exhaust Postgres'
+    max_connections. Requests beyond the cap wait on the loop, which is cheap.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(int(getattr(settings, "ASYNC_READ_CONCURRENCY", 20)))
+    return slots
+
+
+def read_path(sync_view, fast_get):
+    """Async view answering plain GETs with `fast_get(request, ...)` and everything else with `sync_view`.
+
+    `fast_get` may return None to hand a request over to the sync view.
+    """
+    view_class = sync_view.view_class
+    allow = ", ".join(_allowed_methods(view_class))
+
+    async def view(request, *args, **kwargs):
+        async with _db_slots():
+            try:
+                if request.method == "GET" and _plain_json(request):
+                    user = await sync_to_async(_authenticate)(request)
+                    if user is not None:
+                        request.user = user
+                        response = await fast_get(request, *args, **kwargs)
+                        if response is not None:
+                            # What APIView.finalize_response adds to every response
+                            patch_vary_headers(response, ["Accept"])
+                            response["Allow"] = allow
+                            return response
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            finally:
+                # The request's queries all ran on one thread; release its connection
+                # before the slot, or idle connections pile up until threads are collected.
+                await sync_to_async(close_old_connections)()
+
+    view.view_class = view_class
+    return csrf_exempt(view)
+
+
+async def list_reports(request):
+    params = request.GET
+    if "cursor" in params or params.get("pagination") == "cursor":
+        return None
+    etag, last_modified = await sync_to_async(list_validators)(request)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+    try:
+        page = parse_page(params.get("page"))
+        page_size = parse_page_size(params.get("page_size"))
+        count_mode = parse_count_mode(params.get("count"), "exact")
+    except InvalidPageParam as e:
+        return _json({"error": str(e)}, status=400)
+    try:
+        qs = filter_complaints(visible_complaints(request.user), params)
+    except InvalidFilter as e:
+        return _json({"error": str(e)}, status=400)
+
+    qs = qs.select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related("images")
+    qs = qs.order_by('-created_at', '-id')
+    if count_mode == "exact":
+        total = await qs.acount()
+    else:
+        total = await sync_to_async(count_for_mode)(qs, count_mode)
+    start = (page - 1) * page_size
+    rows = [obj async for obj in qs[start:start + page_size]]
+    data = ComplaintListSerializer(rows, many=True, context={"request": request}).data
+    return add_validators(_json({
+        "results": data,
+        "page": page,
+        "page_size": page_size,
+        "count": total,
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+    }), etag, last_modified)
+
+
+async def _complaint(**lookup):
+    qs = Complaint.objects.select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related("images")
+    try:
+        return await qs.aget(is_active=True, **lookup)
+    except Complaint.DoesNotExist:
+        return None
+
+
+async def _complaint_response(request, obj):
+    data = ComplaintSerializer(obj, context={"request": request}).data
+    data["similar_reports"] = await sync_to_async(similar_reports)(obj, visible_complaints(request.user))
+    return add_validators(_json(data), *validators_for(obj))
+
+
+async def report_detail(request, pk):
+    if is_conditional(request):
+        meta = await acomplaint_meta(pk=pk)
+        if meta is None or not can_view_complaint(request.user, meta["user_id"], meta["assigned_department_id"]):
+            return _json({'error': 'Not found'}, status=404)
+        response = not_modified(request, *complaint_validators(meta["id"], meta["updated_at"], meta["job_updated_at"]))
+        if response is not None:
+            return response
+    obj = await _complaint(pk=pk)
+    if obj is None or not can_view_complaint(request.user, obj.user_id, obj.assigned_department_id):
+        return _json({'error': 'Not found'}, status=404)
+    return await _complaint_response(request, obj)
+
+
+async def report_track(request, tracking_id):
+    if is_conditional(request):
+        meta = await acomplaint_meta(tracking_id=tracking_id)
+        if meta is None:
+            return _json({'error': 'Not found'}, status=404)
+        if not can_view_complaint(request.user, meta["user_id"], meta["assigned_department_id"]):
+            return _json({'error': 'Forbidden'}, status=403)
+        response = not_modified(request, *complaint_validators(meta["id"], meta["updated_at"], meta["job_updated_at"]))
+        if response is not None:
+            return response
+    obj = await _complaint(tracking_id=tracking_id)
+    if obj is None:
+        return _json({'error': 'Not found'}, status=404)
+    if not can_view_complaint(request.user, obj.user_id, obj.assigned_department_id):
+        return _json({'error': 'Forbidden'}, status=403)
+    return await _complaint_response(request, obj)
+
+
+async def me(request):
+    return _json(UserSerializer(request.user).data)
+
+
+async def departments(request):
+    body, etag = await sync_to_async(department_registry.rendered_list)()
+    client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in client_etags or "*" in client_etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+FAST_GETS = {
+    ComplaintListCreateView: list_reports,
+    ComplaintDetailView: report_detail,
+    ReportTrackView: report_track,
+    MeView: me,
+    DepartmentListView: departments,
+}
+
+
+def read_view(view_class):
+    """`view_class.as_view()`, fronted by its async GET path when ASYNC_READ_VIEWS is on."""
+    view = view_class.as_view()
+    if not getattr(settings, "ASYNC_READ_VIEWS", False) or view_class not in FAST_GETS:
+        return view
+    return read_path(view, FAST_GETS[view_class])
@@ -0,0 +1,8 @@
+"""Helpers shared by the benchmark management commands."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples`; `pct` is 0-100."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
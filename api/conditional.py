@@ -0,0 +1,160 @@
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import F
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from complaints.models import Complaint
+from .metrics import count_cache
+from .roles import resolve_role
+
+
+VERSION_PREFIX = "reports:v:"
+ALL_SCOPE = "all"
+
+
+def is_conditional(request):
+    return "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+
+
+def add_validators(response, etag, last_modified=None):
+    """Attach validators; responses differ per caller, so keep them out of shared caches."""
+    if etag is None:
+        return response
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 carrying the validators if the request's preconditions match, else None."""
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if is_conditional(request):
+        count_cache("http_conditional", "miss" if response is None else "hit")
+    if response is None:
+        return None
+    return add_validators(response, etag, last_modified)
+
+
+# Single complaint (detail / track)
+
+def complaint_validators(complaint_id, updated_at, job_updated_at=None):
+    """(ETag, Last-Modified epoch seconds) of one complaint's representation.
+
+    The video job is part of that representation, so its heartbeat counts too.
+    """
+    changed = max(updated_at, job_updated_at) if job_updated_at else updated_at
+    etag = f'W/"c{complaint_id}-{int(changed.timestamp() * 1_000_000)}"'
+    return etag, int(changed.timestamp())
+
+
+def validators_for(obj):
+    try:
+        job_updated_at = obj.video_job.updated_at
+    except Complaint.video_job.RelatedObjectDoesNotExist:
+        job_updated_at = None
+    return complaint_validators(obj.pk, obj.updated_at, job_updated_at)
+
+
+def _meta_query(**lookup):
+    return (
+        Complaint.objects.filter(is_active=True, **lookup)
+        .values("id", "user_id", "assigned_department_id", "updated_at", job_updated_at=F("video_job__updated_at"))
+    )
+
+
+def complaint_meta(**lookup):
+    """Just what a conditional check needs, in one small query (None if missing)."""
+    return _meta_query(**lookup).first()
+
+
+async def acomplaint_meta(**lookup):
+    return await _meta_query(**lookup).afirst()
+
+
+# Role-filtered list
+
+def _scope_keys(user_ids=(), department_ids=()):
+    keys = [VERSION_PREFIX + ALL_SCOPE]
+    keys += [f"{VERSION_PREFIX}user:{pk}" for pk in set(user_ids) if pk is not None]
+    keys += [f"{VERSION_PREFIX}dept:{pk}" for pk in set(department_ids) if pk is not None]
+    return keys
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    now = int(time.time())
+    cache.set_many({key + ":ts": now for key in keys}, None)
+
+
+def bump_report_versions(user_ids=(), department_ids=()):
+    """Invalidate the list validators of every scope that can see the given complaints.
+
+    Bumped immediately and again on commit, so a list read by another worker
+    while this transaction was open cannot keep an old validator for new rows.
+    """
+    keys = _scope_keys(user_ids, department_ids)
+    _bump(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_versions_for_jobs(job_ids):
+    """Bump after queryset updates of video jobs, which send no signals."""
+    rows = list(Complaint.objects.filter(video_job__in=job_ids).values_list("user_id", "assigned_department_id"))
+    if rows:
+        bump_report_versions([row[0] for row in rows], [row[1] for row in rows])
+
+
+def list_scope(user):
+    """The version scope matching the caller's visibility rules."""
+    if user.is_superuser:
+        return ALL_SCOPE
+    if user.is_staff:
+        department_id = resolve_role(user).department_id
+        return f"dept:{department_id}" if department_id is not None else f"none:{user.pk}"
+    return f"user:{user.pk}"
+
+
+def shared_versions():
+    """Whether every process sees the version counters: not with a per-process (or no-op) cache.
+
+    Video progress, the outbox and recovery tasks bump from Celery; with
+    LocMemCache the web workers would never see those bumps.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def list_validators(request):
+    """(ETag, Last-Modified) for the caller's list, without touching the database.
+
+    (None, None) when the cache is not shared (see shared_versions); lists
+    then carry no validators and every poll is answered in full.
+    """
+    if not shared_versions():
+        return None, None
+    scope = list_scope(request.user)
+    key = VERSION_PREFIX + scope
+    values = cache.get_many([key, key + ":ts"])
+    version = values.get(key)
+    if version is None:
+        # Never bumped (or evicted): start a version so later bumps are visible.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    query = hashlib.md5(request.META.get("QUERY_STRING", "").encode()).hexdigest()[:12]
+    etag = f'W/"l-{scope}-{request.user.pk}-{version}-{query}"'
+    return etag, values.get(key + ":ts")
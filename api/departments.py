@@ -0,0 +1,96 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import cache
+
+from complaints.models import Department
+from .metrics import count_cache
+
+
+VERSION_KEY = "departments:version"
+
+
+def bump_department_version():
+    """Tell every worker its registry is stale."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Missing (first bump or evicted): restart from a value no worker has seen.
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+class DepartmentRegistry:
+    """Per-process copy of the departments table.
+
+    Loaded lazily and reloaded whenever the version stamp in the shared cache
+    moves, which Department saves/deletes do. Lookups hand out copies, so a
+    caller can never mutate the shared instances.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_id = {}
+        self._by_name = {}
+        self._body = b"[]"
+        self._etag = ""
+
+    def _ensure_loaded(self):
+        version = _shared_version()
+        if version is not None and version == self._version:
+            count_cache("departments", "hit")
+            return
+        with self._lock:
+            if version is not None and version == self._version:
+                count_cache("departments", "hit")
+                return
+            count_cache("departments", "miss")
+            departments = list(Department.objects.order_by("name"))
+            self._by_id = {d.pk: d for d in departments}
+            self._by_name = {d.name.lower(): d for d in departments}
+            self._body = json.dumps(
+                [{"id": d.pk, "name": d.name} for d in departments], separators=(",", ":")
+            ).encode()
+            self._etag = '"%s"' % hashlib.md5(self._body).hexdigest()
+            self._version = version
+
+    def get(self, pk):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        self._ensure_loaded()
+        department = self._by_id.get(pk)
+        return copy.copy(department) if department else None
+
+    def get_by_name(self, name):
+        self._ensure_loaded()
+        department = self._by_name.get((name or "").strip().lower())
+        return copy.copy(department) if department else None
+
+    def all(self):
+        self._ensure_loaded()
+        return [copy.copy(d) for d in self._by_id.values()]
+
+    def rendered_list(self):
+        """(JSON body, ETag) of the department list, rendered once per version."""
+        self._ensure_loaded()
+        return self._body, self._etag
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+
+
+department_registry = DepartmentRegistry()
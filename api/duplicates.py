@@ -0,0 +1,339 @@
+import hashlib
+import random
+import re
+import struct
+from itertools import combinations
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from complaints.models import (
+    Complaint, ComplaintImage, ComplaintTextMatch, ComplaintTextSignature, ImageHashBand, TextHashBand,
+)
+from .conditional import bump_report_versions
+from .push import complaint_event, publish
+
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def max_distance():
+    """Hamming distance up to which two photos count as the same scene."""
+    return int(getattr(settings, "PHASH_MAX_DISTANCE", 6))
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> value that fits a BigIntegerField."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def hamming(a, b):
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+def split_bands(value):
+    value = to_unsigned(value)
+    return [(value >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def band_probes(value, radius):
+    """Every band value within `radius` flipped bits of `value`."""
+    probes = [value]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), flips):
+            probe = value
+            for bit in bits:
+                probe ^= 1 << bit
+            probes.append(probe)
+    return probes
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance, for per-process indexes.
+
+    A radius query only descends into children whose edge distance is within
+    `radius` of the query's distance to the node (triangle inequality). Pruning
+    is strong for tight radii; at the flagging radius over 64-bit hashes the
+    banded table below is much faster (see `manage.py bench_phash`).
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value, item=None):
+        value = to_unsigned(value)
+        node = [value, item, None]  # children dict is created on first insert below the node
+        self._size += 1
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = (current[0] ^ value).bit_count()
+            if current[2] is None:
+                current[2] = {}
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """[(distance, value, item)] of everything within `radius` of `value`, nearest first."""
+        value = to_unsigned(value)
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_value, item, children = stack.pop()
+            distance = (node_value ^ value).bit_count()
+            if distance <= radius:
+                found.append((distance, node_value, item))
+            if children is None:
+                continue
+            for edge in range(max(0, distance - radius), distance + radius + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+        found.sort(key=lambda hit: hit[0])
+        return found
+
+
+def index_image_hashes(images):
+    """Write the band rows for saved ComplaintImages that have a hash."""
+    ImageHashBand.objects.bulk_create([
+        ImageHashBand(image_id=image.pk, complaint_id=image.complaint_id, band=band, value=value)
+        for image in images if image.phash is not None
+        for band, value in enumerate(split_bands(image.phash))
+    ])
+
+
+def similar_images(phash, radius=None, exclude_complaint_id=None):
+    """[(distance, image_id, complaint_id)] of active complaints' photos within `radius`, nearest first."""
+    radius = max_distance() if radius is None else radius
+    per_band = radius // BANDS  # pigeonhole: some band differs by at most this many bits
+    condition = Q()
+    for band, value in enumerate(split_bands(phash)):
+        condition |= Q(band=band, value__in=band_probes(value, per_band))
+    candidates = (
+        ImageHashBand.objects.filter(condition, complaint__is_active=True)
+        .exclude(complaint_id=exclude_complaint_id)
+        .values_list("image_id", "complaint_id")
+        .distinct()
+    )
+    candidates = dict(candidates)
+    hashes = ComplaintImage.objects.filter(pk__in=candidates).values_list("pk", "phash")
+    hits = [
+        (distance, image_id, candidates[image_id])
+        for image_id, other in hashes
+        for distance in [hamming(phash, other)]
+        if distance <= radius
+    ]
+    hits.sort()
+    return hits
+
+
+def find_duplicate_complaints(complaint, images):
+    """{complaint_id: best distance} of earlier reports whose photos match any of `images`."""
+    matches = {}
+    for image in images:
+        if image.phash is None:
+            continue
+        for distance, _, complaint_id in similar_images(image.phash, exclude_complaint_id=complaint.pk):
+            if complaint_id not in matches or distance < matches[complaint_id]:
+                matches[complaint_id] = distance
+    return matches
+
+
+def flag_duplicates(complaint, images):
+    """Index the new photos and point `complaint.duplicate_of` at the earliest match.
+
+    Returns {complaint_id: distance} of all probable duplicates.
+    """
+    matches = find_duplicate_complaints(complaint, images)
+    index_image_hashes(images)
+    if matches:
+        complaint.duplicate_of_id = min(matches)
+        complaint.save(update_fields=["duplicate_of", "updated_at"])
+    return matches
+
+
+# --- Text: MinHash signatures with locality-sensitive banding ---
+
+NUM_PERM = 64
+TEXT_BANDS = 16
+TEXT_ROWS = NUM_PERM // TEXT_BANDS  # ~50% similar texts share a band ~65% of the time, ~80% similar ones ~99%
+_PRIME = (1 << 61) - 1
+_MASK64 = (1 << HASH_BITS) - 1
+# Fixed seed: stored signatures stay comparable across processes and deploys
+_rng = random.Random(20260101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f">{NUM_PERM}Q")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def text_threshold():
+    return float(getattr(settings, "TEXT_DUP_THRESHOLD", 0.5))
+
+
+def shingles(text):
+    """Words and word pairs of `text`, lower-cased; word order matters only locally."""
+    words = _TOKEN.findall((text or "").lower())
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def _shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(text):
+    """NUM_PERM minimum hash values of the shingles of `text`, or None if it has no words."""
+    hashes = [_shingle_hash(s) for s in shingles(text)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) & _MASK64 for a, b in _PERMUTATIONS]
+
+
+def complaint_text(complaint):
+    return " ".join(filter(None, [complaint.title, complaint.description, complaint.location]))
+
+
+def pack_signature(signature):
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack_signature(data):
+    return _SIGNATURE.unpack(bytes(data))
+
+
+def signature_similarity(a, b):
+    """Share of equal MinHash values: an unbiased estimate of the shingle sets' Jaccard similarity."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def text_buckets(signature):
+    """[(band, bucket)] of a signature; the bucket is a 64-bit digest of the band's rows."""
+    packed = pack_signature(signature)
+    width = TEXT_ROWS * 8
+    buckets = []
+    for band in range(TEXT_BANDS):
+        rows = packed[band * width:(band + 1) * width]
+        digest = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "big")
+        buckets.append((band, to_signed(digest)))
+    return buckets
+
+
+def index_text_signatures(complaints):
+    """Store signatures and LSH band rows for `complaints`; returns {complaint_id: signature}."""
+    signatures = {}
+    for complaint in complaints:
+        signature = minhash(complaint_text(complaint))
+        if signature is not None:
+            signatures[complaint.pk] = signature
+    ComplaintTextSignature.objects.bulk_create(
+        [ComplaintTextSignature(complaint_id=pk, signature=pack_signature(sig)) for pk, sig in signatures.items()],
+        ignore_conflicts=True,
+    )
+    TextHashBand.objects.bulk_create([
+        TextHashBand(complaint_id=pk, band=band, bucket=bucket)
+        for pk, sig in signatures.items()
+        for band, bucket in text_buckets(sig)
+    ])
+    return signatures
+
+
+def reindex_text_signature(complaint):
+    """Replace the stored signature and bands of `complaint` after its text changed."""
+    ComplaintTextSignature.objects.filter(complaint_id=complaint.pk).delete()
+    TextHashBand.objects.filter(complaint_id=complaint.pk).delete()
+    index_text_signatures([complaint])
+
+
+def similar_texts(signature, department_id, exclude_complaint_id=None, threshold=None):
+    """[(similarity, complaint_id)] of open reports in the department whose text is similar, best first.
+
+    Candidates come from one indexed lookup per band, so the cost depends on
+    how many reports collide, not on how many open reports the department has.
+    """
+    threshold = text_threshold() if threshold is None else threshold
+    condition = Q()
+    for band, bucket in text_buckets(signature):
+        condition |= Q(band=band, bucket=bucket)
+    candidates = (
+        TextHashBand.objects.filter(condition)
+        .filter(
+            complaint__assigned_department_id=department_id, complaint__is_active=True,
+            complaint__status=Complaint.Status.OPEN,
+        )
+        .exclude(complaint_id=exclude_complaint_id)
+        .values_list("complaint_id", flat=True)
+        .distinct()
+    )
+    stored = ComplaintTextSignature.objects.filter(complaint_id__in=candidates).values_list("complaint_id", "signature")
+    hits = [
+        (similarity, complaint_id)
+        for complaint_id, data in stored
+        for similarity in [signature_similarity(signature, unpack_signature(data))]
+        if similarity >= threshold
+    ]
+    hits.sort(key=lambda hit: (-hit[0], hit[1]))
+    return hits
+
+
+def link_similar_texts(complaint):
+    """Index a new report's text and record the open reports it probably repeats.
+
+    Returns {complaint_id: similarity}. Matched reports get a fresh `updated_at`
+    so their cached detail (which lists the new link) is revalidated, and their
+    owners' lists and push subscribers hear about it like any other change.
+    """
+    signature = index_text_signatures([complaint]).get(complaint.pk)
+    if signature is None or complaint.assigned_department_id is None:
+        return {}
+    matches = {
+        complaint_id: similarity
+        for similarity, complaint_id in similar_texts(signature, complaint.assigned_department_id, complaint.pk)
+    }
+    if matches:
+        ComplaintTextMatch.objects.bulk_create(
+            [ComplaintTextMatch(complaint=complaint, match_id=pk, similarity=sim) for pk, sim in matches.items()],
+            ignore_conflicts=True,
+        )
+        now = timezone.now()
+        matched = list(Complaint.objects.filter(pk__in=matches).only(
+            "id", "user_id", "assigned_department_id", "tracking_id", "status",
+        ))
+        Complaint.objects.filter(pk__in=matches).update(updated_at=now)
+        for other in matched:
+            other.updated_at = now
+        # Queryset updates send no signals
+        bump_report_versions({c.user_id for c in matched}, {c.assigned_department_id for c in matched})
+        publish(complaint_event("report.updated", c) for c in matched)
+    return matches
+
+
+def similar_reports(complaint, visible):
+    """Text matches of `complaint` in both directions, restricted to the `visible` queryset."""
+    links = {}
+    pairs = ComplaintTextMatch.objects.filter(Q(complaint=complaint) | Q(match=complaint))
+    for complaint_id, match_id, similarity in pairs.values_list("complaint_id", "match_id", "similarity"):
+        other = match_id if complaint_id == complaint.pk else complaint_id
+        links[other] = max(similarity, links.get(other, 0))
+    if not links:
+        return []
+    rows = visible.filter(pk__in=links).values("id", "tracking_id", "title", "status")
+    return sorted(
+        ({**row, "similarity": round(links[row["id"]], 3)} for row in rows),
+        key=lambda row: (-row["similarity"], row["id"]),
+    )
@@ -0,0 +1,102 @@
+"""Complaint history as rows of ComplaintEvent, appended next to every change."""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from complaints.models import Complaint, ComplaintEvent
+
+# Keys older timeline entries used for their time, in order of preference
+LEGACY_TIME_KEYS = ("created_at", "timestamp", "time", "date", "at")
+
+
+def created_events(complaints, actor):
+    return [
+        ComplaintEvent(
+            complaint=complaint, kind=ComplaintEvent.Kind.CREATED, to_status=complaint.status,
+            actor=actor, created_at=complaint.created_at,
+        )
+        for complaint in complaints
+    ]
+
+
+def deleted_event(complaint, actor):
+    return ComplaintEvent(
+        complaint=complaint, kind=ComplaintEvent.Kind.DELETED, from_status=complaint.status, actor=actor,
+    )
+
+
+def record_events(events):
+    if events:
+        ComplaintEvent.objects.bulk_create(events, batch_size=1000)
+
+
+def change_events(complaint, actor, previous_status, changed_fields):
+    """Events for one update: a status change, and/or the other fields (`changed_fields`) it touched."""
+    events = []
+    now = timezone.now()
+    others = set(changed_fields)
+    if complaint.status != previous_status:
+        # Who took the report on belongs with the transition itself
+        assigned = "person_in_charge" in others
+        others.discard("person_in_charge")
+        events.append(ComplaintEvent(
+            complaint=complaint, kind=ComplaintEvent.Kind.STATUS, from_status=previous_status,
+            to_status=complaint.status, actor=actor, created_at=now,
+            data={"person_in_charge": complaint.person_in_charge} if assigned else {},
+        ))
+    if others:
+        events.append(ComplaintEvent(
+            complaint=complaint, kind=ComplaintEvent.Kind.UPDATED, actor=actor, created_at=now,
+            data={"fields": sorted(others)},
+        ))
+    return events
+
+
+def _legacy_time(entry, fallback):
+    for key in LEGACY_TIME_KEYS:
+        value = entry.get(key)
+        if isinstance(value, str):
+            moment = parse_datetime(value)
+            if moment is not None:
+                return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+    return fallback
+
+
+def legacy_events(complaint_id, timeline, fallback_time):
+    """ComplaintEvents for the entries of a `Complaint.timeline` blob, whatever their shape.
+
+    The entry itself is kept in `data`; a recognised status and time are lifted
+    into their columns.
+    """
+    entries = timeline if isinstance(timeline, list) else [timeline]
+    events = []
+    for entry in entries:
+        if entry in (None, "", {}, []):
+            continue
+        if not isinstance(entry, dict):
+            entry = {"value": entry}
+        status = entry.get("status")
+        events.append(ComplaintEvent(
+            complaint_id=complaint_id,
+            kind=ComplaintEvent.Kind.IMPORTED,
+            to_status=status if status in Complaint.Status.values else None,
+            created_at=_legacy_time(entry, fallback_time),
+            data=entry,
+        ))
+    return events
+
+
+_datetime = serializers.DateTimeField()
+
+
+def event_representation(event):
+    actor = event.actor
+    return {
+        "id": event.id,
+        "kind": event.kind,
+        "from_status": event.from_status,
+        "to_status": event.to_status,
+        "actor": {"id": actor.id, "username": actor.username} if actor else None,
+        "data": event.data,
+        "created_at": _datetime.to_representation(event.created_at),
+    }
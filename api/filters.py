@@ -0,0 +1,59 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from complaints.models import Complaint
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_moment(raw, name, end_of_day=False):
+    """Aware datetime from an ISO date or datetime; a bare date means its start (or end) in the current timezone."""
+    try:
+        value = parse_datetime(raw)
+        if value is None:
+            day = parse_date(raw)
+            if day is None:
+                raise ValueError
+            value = datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:
+        raise InvalidFilter(f"{name} must be an ISO date or datetime")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_complaints(qs, params):
+    """Apply the `status`, `type`, `department`, `duplicate` and `created_after`/`created_before` query
+    filters shared by the report endpoints."""
+    status = params.get("status")
+    if status:
+        if status not in Complaint.Status.values:
+            raise InvalidFilter("Invalid status")
+        qs = qs.filter(status=status)
+    complaint_type = params.get("type")
+    if complaint_type:
+        if complaint_type not in Complaint.ComplaintType.values:
+            raise InvalidFilter("Invalid type")
+        qs = qs.filter(complaint_type=complaint_type)
+    department = params.get("department")
+    if department:
+        try:
+            qs = qs.filter(assigned_department_id=int(department))
+        except (TypeError, ValueError):
+            raise InvalidFilter("Invalid department")
+    duplicate = params.get("duplicate")
+    if duplicate:
+        if duplicate not in ("true", "false"):
+            raise InvalidFilter("duplicate must be true or false")
+        qs = qs.filter(duplicate_of__isnull=duplicate == "false")
+    created_after = params.get("created_after")
+    if created_after:
+        qs = qs.filter(created_at__gte=parse_moment(created_after, "created_after"))
+    created_before = params.get("created_before")
+    if created_before:
+        qs = qs.filter(created_at__lte=parse_moment(created_before, "created_before", end_of_day=True))
+    return qs
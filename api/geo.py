@@ -0,0 +1,178 @@
+"""Geohash cells for complaint coordinates, without PostGIS.
+
+Every complaint with coordinates stores its geohash; a spatial query turns its
+area into a handful of cell prefixes (an indexed LIKE 'prefix%' each), then
+checks exact coordinates on the few candidates left.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Q
+
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+
+# Stored precision: 9 characters is a cell of roughly 5 m x 5 m.
+STORE_PRECISION = 9
+EARTH_RADIUS_M = 6371008.8
+MAX_RADIUS_M = 50000
+
+# Map zoom level -> geohash precision used for clustering (roughly one cell per 64-256 px)
+ZOOM_PRECISION = [1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 7, 8, 8, 8]
+
+
+class InvalidGeoParam(ValueError):
+    pass
+
+
+def encode(lat, lng, precision=STORE_PRECISION):
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            value = value * 2 + (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = value * 2 + (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def decode_bbox(cell):
+    """(min_lat, min_lng, max_lat, max_lng) covered by `cell`."""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in cell:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision):
+    """(lat_degrees, lng_degrees) of a cell at `precision`."""
+    total = 5 * precision
+    return 180.0 / 2 ** (total // 2), 360.0 / 2 ** (total - total // 2)
+
+
+def _cells_at(bbox, precision):
+    min_lat, min_lng, max_lat, max_lng = bbox
+    lat_step, lng_step = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(encode(min(lat, max_lat), min(lng, max_lng), precision))
+            if lng >= max_lng:
+                break
+            lng += lng_step
+        if lat >= max_lat:
+            break
+        lat += lat_step
+    return cells
+
+
+def covering_cells(bbox, max_cells=None):
+    """The finest set of at most `max_cells` geohash prefixes covering `bbox`."""
+    max_cells = max_cells or int(getattr(settings, "GEO_MAX_CELLS", 16))
+    min_lat, min_lng, max_lat, max_lng = bbox
+    best = {""}
+    for precision in range(1, STORE_PRECISION + 1):
+        lat_step, lng_step = cell_size(precision)
+        estimate = (math.floor((max_lat - min_lat) / lat_step) + 2) * (math.floor((max_lng - min_lng) / lng_step) + 2)
+        if estimate > max_cells * 4:
+            break
+        cells = _cells_at(bbox, precision)
+        if len(cells) > max_cells:
+            break
+        best = cells
+    return sorted(best)
+
+
+def cells_filter(cells):
+    """Q matching complaints stored inside any of `cells` (indexed prefix LIKEs)."""
+    if cells == [""]:
+        return Q(geohash__isnull=False)
+    condition = Q()
+    for cell in cells:
+        condition |= Q(geohash__startswith=cell)
+    return condition
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def bbox_around(lat, lng, radius_m):
+    """Smallest lat/lng box containing the circle (not valid across the poles or antimeridian)."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlng = math.degrees(radius_m / (EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+    return max(-90.0, lat - dlat), max(-180.0, lng - dlng), min(90.0, lat + dlat), min(180.0, lng + dlng)
+
+
+def parse_coordinate(raw, name, limit):
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        raise InvalidGeoParam(f"{name} must be a number")
+    if not math.isfinite(value) or abs(value) > limit:
+        raise InvalidGeoParam(f"{name} out of range")
+    return value
+
+
+def parse_point(raw_lat, raw_lng):
+    """(lat, lng) from request values; (None, None) when both are absent."""
+    if raw_lat in (None, "") and raw_lng in (None, ""):
+        return None, None
+    return parse_coordinate(raw_lat, "latitude", 90), parse_coordinate(raw_lng, "longitude", 180)
+
+
+def parse_bbox(raw):
+    """`min_lng,min_lat,max_lng,max_lat` (the GeoJSON order) -> (min_lat, min_lng, max_lat, max_lng)."""
+    parts = (raw or "").split(",")
+    if len(parts) != 4:
+        raise InvalidGeoParam("bbox must be min_lng,min_lat,max_lng,max_lat")
+    min_lng = parse_coordinate(parts[0], "min_lng", 180)
+    min_lat = parse_coordinate(parts[1], "min_lat", 90)
+    max_lng = parse_coordinate(parts[2], "max_lng", 180)
+    max_lat = parse_coordinate(parts[3], "max_lat", 90)
+    if min_lat > max_lat or min_lng > max_lng:
+        raise InvalidGeoParam("bbox minimum exceeds maximum")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def parse_radius(raw):
+    try:
+        radius = float(raw)
+    except (TypeError, ValueError):
+        raise InvalidGeoParam("radius must be a number of meters")
+    if not 0 < radius <= MAX_RADIUS_M:
+        raise InvalidGeoParam(f"radius must be between 0 and {MAX_RADIUS_M} meters")
+    return radius
+
+
+def zoom_precision(raw):
+    try:
+        zoom = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidGeoParam("zoom must be an integer")
+    return ZOOM_PRECISION[max(0, min(zoom, len(ZOOM_PRECISION) - 1))]
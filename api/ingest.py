@@ -0,0 +1,142 @@
+"""Bulk report intake for partner systems (311 call centre, sensor feeds).
+
+Every row is validated up front against the in-process department registry;
+the valid ones are inserted with multi-row INSERTs, one transaction per
+chunk, and the per-complaint side effects the single-create view performs
+(text signatures, events, counters, list versions, outbox rows) are applied
+once for each chunk.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from complaints.models import Complaint
+from .conditional import bump_report_versions
+from .departments import department_registry
+from .duplicates import index_text_signatures
+from .events import created_events, record_events
+from .geo import InvalidGeoParam, encode as geohash_encode, parse_point
+from .push import complaint_event, publish
+from .services import queue_created_notifications
+from .stats import apply_stat_changes, stat_bucket
+
+User = get_user_model()
+
+TEXT_LIMITS = {name: Complaint._meta.get_field(name).max_length for name in ("title", "location")}
+
+
+class RowError(ValueError):
+    pass
+
+
+def ingest_max_rows():
+    return int(getattr(settings, "BULK_INGEST_MAX_ROWS", 10000))
+
+
+def ingest_chunk_size():
+    return int(getattr(settings, "BULK_INGEST_CHUNK_SIZE", 1000))
+
+
+def _text(row, name):
+    value = row.get(name)
+    value = "" if value is None else str(value).strip()
+    limit = TEXT_LIMITS.get(name)
+    if limit and len(value) > limit:
+        raise RowError(f"{name} longer than {limit} characters")
+    return value
+
+
+def _department(raw, department_id):
+    if raw in (None, ""):
+        raise RowError("department is required")
+    department = department_registry.get(raw) if str(raw).isdigit() else department_registry.get_by_name(str(raw))
+    if department is None:
+        raise RowError("Invalid department")
+    if department_id is not None and department.pk != department_id:
+        raise RowError("Department not allowed")
+    return department
+
+
+def build_complaint(row, submitter, users=None, department_id=None):
+    """Unsaved Complaint for one payload row, or RowError.
+
+    `users` maps the usernames a row may file on behalf of; None means rows
+    always belong to `submitter`. `department_id` restricts the departments
+    a row may target.
+    """
+    title = _text(row, "title")
+    description = _text(row, "description")
+    if not title or not description:
+        raise RowError("title and description are required")
+    department = _department(row.get("department"), department_id)
+    complaint_type = _text(row, "complaint_type") or Complaint.ComplaintType.OTHER
+    if complaint_type not in Complaint.ComplaintType.values:
+        raise RowError("Invalid complaint_type")
+    try:
+        latitude, longitude = parse_point(row.get("latitude"), row.get("longitude"))
+    except InvalidGeoParam as e:
+        raise RowError(str(e))
+    user = submitter
+    if row.get("user") not in (None, ""):
+        if users is None:
+            raise RowError("user is not allowed")
+        user = users.get(str(row["user"]).strip())
+        if user is None:
+            raise RowError("Unknown user")
+    return Complaint(
+        user=user,
+        title=title,
+        description=description,
+        location=_text(row, "location") or None,
+        latitude=latitude,
+        longitude=longitude,
+        # bulk_create sends no pre_save, so the signal's geohash is set here
+        geohash=geohash_encode(latitude, longitude) if latitude is not None else None,
+        complaint_type=complaint_type,
+        assigned_department=department,
+    )
+
+
+def _create_chunk(complaints, submitter):
+    with transaction.atomic():
+        Complaint.objects.bulk_create(complaints)
+        # Text signatures commit with their rows, so a later report can match them
+        index_text_signatures(complaints)
+        record_events(created_events(complaints, submitter))
+        apply_stat_changes([(None, stat_bucket(c)) for c in complaints])
+        queue_created_notifications(complaints)
+        bump_report_versions(
+            {c.user_id for c in complaints}, {c.assigned_department_id for c in complaints},
+        )
+        publish(complaint_event("report.created", c) for c in complaints)
+
+
+def ingest_rows(rows, submitter, on_behalf=False, department_id=None, chunk_size=None):
+    """Create a complaint for every valid row; returns one result dict per row, in order.
+
+    A result carries `id`/`tracking_id` or `error`, plus the row's `ref` when
+    the partner sent one. Invalid rows never block valid ones.
+    """
+    users = None
+    if on_behalf:
+        names = {str(r["user"]).strip() for r in rows if r.get("user") not in (None, "")}
+        users = {u.username: u for u in User.objects.filter(username__in=names)} if names else {}
+    results = []
+    valid = []
+    for number, row in enumerate(rows, 1):
+        result = {"row": number}
+        if row.get("ref") not in (None, ""):
+            result["ref"] = row["ref"]
+        try:
+            valid.append((result, build_complaint(row, submitter, users, department_id)))
+        except RowError as e:
+            result["error"] = str(e)
+        results.append(result)
+    complaints = [complaint for _, complaint in valid]
+    size = chunk_size or ingest_chunk_size()
+    for start in range(0, len(complaints), size):
+        _create_chunk(complaints[start:start + size], submitter)
+    for result, complaint in valid:
+        result["id"] = complaint.pk
+        result["tracking_id"] = str(complaint.tracking_id)
+    return results
@@ -0,0 +1,268 @@
+import io
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from .metrics import compression_timer
+
+
+FFMPEG_TRANSCODE_ARGS = [
+    "-vf", "scale=-2:720",
+    "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+    "-c:a", "aac", "-b:a", "128k",
+]
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def probe_duration(path: str):
+    """Return the media duration in seconds via ffprobe, or None if unknown."""
+    if shutil.which("ffprobe") is None:
+        return None
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    try:
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, timeout=30)
+        return float(out.stdout.decode().strip())
+    except Exception:
+        return None
+
+
+def parse_progress_line(line: str, duration):
+    """Map one `ffmpeg -progress` line to a 0-100 percentage.
+
+    Returns None for lines that carry no position information. `out_time_ms`
+    is (despite its name) reported in microseconds, same as `out_time_us`.
+    """
+    key, _, value = line.strip().partition("=")
+    if key == "progress" and value == "end":
+        return 100
+    if key not in ("out_time_us", "out_time_ms") or not duration:
+        return None
+    try:
+        seconds = int(value) / 1_000_000
+    except ValueError:
+        return None
+    return max(0, min(99, int(seconds * 100 / duration)))
+
+
+def transcode_video(in_path: str, out_path: str, on_progress=None):
+    """Transcode `in_path` to a 720p H.264 mp4 at `out_path`.
+
+    `on_progress(percent)` is called each time ffmpeg reports a new position,
+    and with None after every other progress block (about twice a second), so
+    callers get a heartbeat even when the duration, and so the percentage, is
+    unknown. Raises TranscodeError if ffmpeg exits non-zero.
+    """
+    duration = probe_duration(in_path)
+    cmd = [
+        "ffmpeg", "-y", "-nostats", "-loglevel", "error",
+        "-i", in_path,
+        *FFMPEG_TRANSCODE_ARGS,
+        "-progress", "pipe:1",
+        out_path,
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    last = -1
+    for line in proc.stdout:
+        percent = parse_progress_line(line, duration)
+        if percent is not None and percent != last:
+            last = percent
+            if on_progress:
+                on_progress(percent)
+        elif on_progress and line.startswith("progress="):
+            on_progress(None)
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise TranscodeError(stderr.strip() or f"ffmpeg exited with {proc.returncode}")
+
+
+def compressed_video_name(original_name: str) -> str:
+    return os.path.splitext(os.path.basename(original_name))[0] + "_compressed.mp4"
+
+
+_image_pool = None
+_image_pool_pid = None
+_image_pool_lock = threading.Lock()
+
+
+def compress_image_bytes(data: bytes, name: str, max_width: int, quality: int):
+    """Resize to `max_width` keeping aspect ratio and re-encode; returns (name, bytes).
+
+    Runs inside the image pool's worker processes, so it only deals in plain
+    bytes and must not touch Django models or settings.
+    """
+    img = Image.open(io.BytesIO(data))
+    img_format = (img.format or "JPEG").upper()
+    if img.width > max_width:
+        ratio = max_width / float(img.width)
+        new_size = (max_width, int(img.height * ratio))
+        img = img.resize(new_size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    save_kwargs = {"optimize": True}
+    if img_format in ("JPEG", "JPG"):
+        save_kwargs["quality"] = quality
+        img_format = "JPEG"
+    else:
+        img_format = "PNG"  # fallback
+    img.save(buffer, format=img_format, **save_kwargs)
+    base_name = os.path.splitext(name)[0]
+    new_name = f"{base_name}_compressed.{'jpg' if img_format == 'JPEG' else 'png'}"
+    return new_name, buffer.getvalue()
+
+
+def thumbnail_bytes(data: bytes, name: str, size: int):
+    """Small rendition (longest side `size`) for admin previews; returns (name, bytes)."""
+    img = Image.open(io.BytesIO(data))
+    img_format = "PNG" if (img.format or "").upper() == "PNG" else "JPEG"
+    img.thumbnail((size, size))
+    if img_format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format=img_format, **({"quality": 75} if img_format == "JPEG" else {}))
+    base_name = os.path.splitext(os.path.basename(name))[0]
+    return f"{base_name}_thumb.{'jpg' if img_format == 'JPEG' else 'png'}", buffer.getvalue()
+
+
+def dhash(data: bytes) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale copy.
+
+    Survives re-encoding, resizing and small crops, so near-identical photos
+    land a few bits apart.
+    """
+    img = Image.open(io.BytesIO(data)).convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(img.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def render_image_bytes(data: bytes, name: str, max_width: int, quality: int, thumb_size: int):
+    """Compressed image, its thumbnail (cut from the downscaled bytes) and its dHash."""
+    compressed = compress_image_bytes(data, name, max_width, quality)
+    return compressed, thumbnail_bytes(compressed[1], compressed[0], thumb_size), dhash(compressed[1])
+
+
+def thumbnail_size():
+    return int(getattr(settings, "THUMBNAIL_SIZE", 240))
+
+
+def attach_thumbnail(obj):
+    """Generate and save `obj.thumbnail` from `obj.image` (admin uploads, backfills)."""
+    with obj.image.open("rb") as f:
+        name, data = thumbnail_bytes(f.read(), obj.image.name, thumbnail_size())
+    obj.thumbnail.save(name, ContentFile(data), save=False)
+    obj.save(update_fields=["thumbnail"])
+
+
+class Rendition(NamedTuple):
+    image: object
+    thumbnail: Optional[ContentFile]
+    phash: Optional[int]
+
+
+def get_image_pool():
+    """Return this process's shared image pool, or None when pooling is disabled.
+
+    The pool is created lazily so each gunicorn/Celery worker gets its own after
+    forking, and is recreated if it broke or we are in a forked child.
+    """
+    global _image_pool, _image_pool_pid
+    workers = int(getattr(settings, "IMAGE_POOL_WORKERS", 0))
+    if workers <= 0:
+        return None
+    with _image_pool_lock:
+        if _image_pool is None or _image_pool_pid != os.getpid():
+            start_method = getattr(settings, "IMAGE_POOL_START_METHOD", "spawn")
+            _image_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(start_method)
+            )
+            _image_pool_pid = os.getpid()
+        return _image_pool
+
+
+def _discard_image_pool(pool):
+    global _image_pool
+    with _image_pool_lock:
+        if _image_pool is pool:
+            _image_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def compress_images(uploads):
+    """Compress all uploads of one request concurrently, with a thumbnail and dHash each.
+
+    Returns a list of Renditions aligned with `uploads`; where compression failed
+    it holds the original upload (and no thumbnail or hash) so the report keeps its photo.
+    """
+    with compression_timer("image"):
+        return _compress_images(uploads)
+
+
+def _compress_images(uploads):
+    max_width = int(getattr(settings, "IMAGE_MAX_WIDTH", 1280))
+    quality = int(getattr(settings, "IMAGE_JPEG_QUALITY", 70))
+    thumb_size = thumbnail_size()
+    payloads = []
+    for upload in uploads:
+        upload.seek(0)
+        payloads.append(upload.read())
+        upload.seek(0)
+
+    pool = get_image_pool() if len(uploads) > 1 else None
+    if pool is not None:
+        try:
+            futures = [
+                pool.submit(render_image_bytes, data, upload.name, max_width, quality, thumb_size)
+                for data, upload in zip(payloads, uploads)
+            ]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    outcomes.append(e)
+        except BrokenProcessPool as e:
+            print(f"Image pool broke, compressing inline: {e}")
+            _discard_image_pool(pool)
+            pool = None
+    if pool is None:
+        outcomes = []
+        for data, upload in zip(payloads, uploads):
+            try:
+                outcomes.append(render_image_bytes(data, upload.name, max_width, quality, thumb_size))
+            except Exception as e:
+                outcomes.append(e)
+
+    results = []
+    for upload, outcome in zip(uploads, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Image compression failed: {outcome}")
+            results.append(Rendition(upload, None, None))
+        else:
+            (name, data), (thumb_name, thumb_data), phash = outcome
+            results.append(Rendition(ContentFile(data, name=name), ContentFile(thumb_data, name=thumb_name), phash))
+    return results
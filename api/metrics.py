@@ -0,0 +1,224 @@
+"""Prometheus metrics, served at /metrics.
+
+Per URL name: request latency, response size, DB queries and DB time (from
+an execute wrapper on every connection) and serializer time. Elsewhere:
+image/video compression time, notification outcomes and cache lookups.
+
+Gunicorn workers are separate processes. With PROMETHEUS_MULTIPROC_DIR set
+(before start-up), each one writes its samples to mmap files in that
+directory and /metrics adds them all up. Without prometheus_client
+installed, or with METRICS_ENABLED off, every hook here does nothing.
+"""
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+except Exception:
+    prometheus_client = None
+
+
+def enabled():
+    return prometheus_client is not None and getattr(settings, "METRICS_ENABLED", True)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "serializer_time", "serializing")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+# Follows the request into sync_to_async threads, so queries made there count too
+_current = contextvars.ContextVar("urbaniq_request_stats", default=None)
+
+if prometheus_client is not None:
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+    FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+    REQUEST_SECONDS = Histogram(
+        "urbaniq_http_request_duration_seconds", "Time to produce the response", ["view", "method", "status"],
+    )
+    RESPONSE_BYTES = Histogram(
+        "urbaniq_http_response_size_bytes", "Response body size (streamed bodies excluded)", ["view"],
+        buckets=SIZE_BUCKETS,
+    )
+    DB_QUERIES = Histogram("urbaniq_db_queries_per_request", "Queries run per request", ["view"], buckets=QUERY_BUCKETS)
+    DB_SECONDS = Histogram("urbaniq_db_duration_seconds", "Time in queries per request", ["view"], buckets=FAST_BUCKETS)
+    SERIALIZER_SECONDS = Histogram(
+        "urbaniq_serializer_duration_seconds", "Time in serializers per request", ["view"], buckets=FAST_BUCKETS,
+    )
+    COMPRESSION_SECONDS = Histogram(
+        "urbaniq_media_compression_seconds", "Image (per request) and video (per job) compression time", ["kind"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    )
+    NOTIFICATIONS = Counter("urbaniq_notifications_total", "Notification outcomes", ["channel", "outcome"])
+    CACHE_LOOKUPS = Counter("urbaniq_cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def install():
+    """Hook every database connection; called from ApiConfig.ready()."""
+    if enabled():
+        connection_created.connect(_instrument_connection, dispatch_uid="urbaniq_metrics")
+
+
+def _timed_representation(method):
+    @functools.wraps(method)
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return method(self, instance)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return method(self, instance)
+        finally:
+            stats.serializing = False
+            stats.serializer_time += time.perf_counter() - started
+    return to_representation
+
+
+class TimedRepresentation:
+    """Serializer mixin: adds `to_representation` time to the request's serializer time.
+
+    Also wraps a `to_representation` the serializer defines itself. Only the
+    outermost call is timed, so nested serializers are not counted twice.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "to_representation" in cls.__dict__:
+            cls.to_representation = _timed_representation(cls.__dict__["to_representation"])
+
+    @_timed_representation
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+
+class MetricsMiddleware:
+    """Records per-view request metrics; works for sync and async views alike."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        _record(request, response, stats, time.perf_counter() - started)
+        return response
+
+
+def _record(request, response, stats, elapsed):
+    match = request.resolver_match
+    view = match.view_name if match is not None and match.view_name else "unmatched"
+    REQUEST_SECONDS.labels(view, request.method, response.status_code).observe(elapsed)
+    if not response.streaming:
+        RESPONSE_BYTES.labels(view).observe(len(response.content))
+    DB_QUERIES.labels(view).observe(stats.queries)
+    DB_SECONDS.labels(view).observe(stats.db_time)
+    SERIALIZER_SECONDS.labels(view).observe(stats.serializer_time)
+
+
+@contextmanager
+def compression_timer(kind):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if enabled():
+            COMPRESSION_SECONDS.labels(kind).observe(time.perf_counter() - started)
+
+
+def count_notification(channel, outcome, amount=1):
+    if enabled() and amount:
+        NOTIFICATIONS.labels(channel, outcome).inc(amount)
+
+
+def count_cache(cache, result):
+    if enabled():
+        CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def registry():
+    """The registry to expose: every process's samples in multiprocess mode, this one's otherwise."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        collected = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collected)
+        return collected
+    return prometheus_client.REGISTRY
+
+
+def metrics_view(request):
+    if not enabled():
+        return HttpResponse("Metrics are disabled\n", status=404, content_type="text/plain")
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        # Only a development server serves metrics without a token
+        if not settings.DEBUG:
+            return HttpResponse("METRICS_TOKEN is not set\n", status=403, content_type="text/plain")
+    elif request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(prometheus_client.generate_latest(registry()), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def start_worker_server(port):
+    """Serve this process's (or, in multiprocess mode, all processes') metrics on `port`; for Celery workers."""
+    if enabled() and port:
+        prometheus_client.start_http_server(port, registry=registry())
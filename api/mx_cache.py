@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache as default_cache
+
+from .metrics import count_cache
+
+try:
+    import dns.resolver  # type: ignore
+except Exception:
+    dns = None
+
+
+MIN_POSITIVE_TTL = 60
+MAX_POSITIVE_TTL = 24 * 3600
+NEGATIVE_TTL = 300
+
+
+class MXLookupError(Exception):
+    """The resolver gave no verdict (timeout, SERVFAIL, no nameservers, network error)."""
+
+
+def dns_mx_lookup(domain: str):
+    """Resolve MX for `domain`; returns (has_mx, ttl_seconds or None).
+
+    Only NXDOMAIN and an empty answer mean "no MX"; any other failure raises
+    MXLookupError, so a transient DNS problem is never cached as a verdict.
+    """
+    if not dns or not hasattr(dns, "resolver"):
+        return True, MAX_POSITIVE_TTL  # cannot verify; do not block
+    try:
+        answers = dns.resolver.resolve(domain, "MX")  # type: ignore[attr-defined]
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):  # type: ignore[attr-defined]
+        return False, None
+    except Exception as e:
+        raise MXLookupError(f"MX lookup for {domain} failed: {e!r}") from e
+    return len(answers) > 0, answers.rrset.ttl
+
+
+class MXCache:
+    """Two-level cache of MX lookups: a per-process LRU in front of the shared Django cache.
+
+    Positive answers live for the DNS TTL (clamped), negative ones for `negative_ttl`.
+    A lookup that fails (MXLookupError) counts as "no MX" for that call only
+    and is not cached. Concurrent misses for the same domain share a single
+    resolver call.
+    """
+
+    def __init__(self, resolver=None, shared_cache=None, max_entries=1024,
+                 negative_ttl=NEGATIVE_TTL, key_prefix="mx:", clock=time.time):
+        self.resolver = resolver or dns_mx_lookup
+        self.shared_cache = shared_cache if shared_cache is not None else default_cache
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.key_prefix = key_prefix
+        self.clock = clock
+        self._local = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("local_hits", "shared_hits", "misses", "negative", "errors", "coalesced"), 0)
+
+    def has_mx(self, domain: str) -> bool:
+        domain = domain.lower()
+        while True:
+            with self._lock:
+                value = self._get_local(domain)
+                if value is not None:
+                    self._counters["local_hits"] += 1
+                    count_cache("mx", "local_hit")
+                    return value
+                event = self._inflight.get(domain)
+                if event is None:
+                    event = self._inflight[domain] = threading.Event()
+                    leader = True
+                else:
+                    self._counters["coalesced"] += 1
+                    leader = False
+            if not leader:
+                event.wait()
+                continue  # the leader filled the local tier (unless it failed; then retry)
+            try:
+                return self._fill(domain)
+            finally:
+                with self._lock:
+                    self._inflight.pop(domain, None)
+                event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["local_entries"] = len(self._local)
+        lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+        counters["hit_ratio"] = (lookups - counters["misses"]) / lookups if lookups else 0.0
+        return counters
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            for key in self._counters:
+                self._counters[key] = 0
+
+    def _get_local(self, domain):
+        entry = self._local.get(domain)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self.clock():
+            del self._local[domain]
+            return None
+        self._local.move_to_end(domain)
+        return value
+
+    def _set_local(self, domain, value, expires_at):
+        with self._lock:
+            self._local[domain] = (value, expires_at)
+            self._local.move_to_end(domain)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _fill(self, domain):
+        key = self.key_prefix + domain
+        try:
+            shared = self.shared_cache.get(key)
+        except Exception:
+            shared = None  # shared tier unavailable; fall through to DNS
+        if shared and shared["expires_at"] > self.clock():
+            with self._lock:
+                self._counters["shared_hits"] += 1
+            count_cache("mx", "shared_hit")
+            self._set_local(domain, shared["ok"], shared["expires_at"])
+            return shared["ok"]
+
+        try:
+            ok, ttl = self.resolver(domain)
+        except MXLookupError:
+            with self._lock:
+                self._counters["errors"] += 1
+            count_cache("mx", "error")
+            return False
+        ttl = max(MIN_POSITIVE_TTL, min(MAX_POSITIVE_TTL, ttl or 0)) if ok else self.negative_ttl
+        expires_at = self.clock() + ttl
+        with self._lock:
+            self._counters["misses"] += 1
+            if not ok:
+                self._counters["negative"] += 1
+        count_cache("mx", "miss")
+        self._set_local(domain, ok, expires_at)
+        try:
+            self.shared_cache.set(key, {"ok": ok, "expires_at": expires_at}, timeout=ttl)
+        except Exception:
+            pass
+        return ok
+
+
+mx_cache = MXCache()
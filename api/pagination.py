@@ -0,0 +1,166 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+DEFAULT_PAGE_SIZE = 10
+COUNT_MODES = ("exact", "approx", "none")
+
+
+class InvalidPageParam(ValueError):
+    pass
+
+
+def max_page_size():
+    return int(getattr(settings, "REPORTS_MAX_PAGE_SIZE", 100))
+
+
+def parse_page_size(raw, default=DEFAULT_PAGE_SIZE):
+    """Parse `page_size`, capped server-side at REPORTS_MAX_PAGE_SIZE."""
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidPageParam("page_size must be an integer")
+    return max(1, min(value, max_page_size()))
+
+
+def parse_page(raw):
+    if raw in (None, ""):
+        return 1
+    try:
+        return max(1, int(raw))
+    except (TypeError, ValueError):
+        raise InvalidPageParam("page must be an integer")
+
+
+def parse_count_mode(raw, default):
+    mode = raw or default
+    if mode not in COUNT_MODES:
+        raise InvalidPageParam(f"count must be one of {', '.join(COUNT_MODES)}")
+    return mode
+
+
+def encode_cursor(obj, direction):
+    payload = {"t": obj.created_at.isoformat(), "id": obj.pk, "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (created_at, pk, direction) from an opaque cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        direction = payload["d"]
+        if direction not in ("n", "p"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), int(payload["id"]), direction
+    except Exception:
+        raise InvalidPageParam("Invalid cursor")
+
+
+def paginate_by_cursor(qs, cursor, page_size):
+    """Keyset page over `(created_at, id)` newest first.
+
+    Returns (rows, next_cursor, prev_cursor). Each page is one indexed range scan
+    with LIMIT, so deep pages cost the same as the first one.
+    """
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+    else:
+        created_at, pk, direction = None, None, "n"
+
+    if direction == "n":
+        if created_at is not None:
+            # The redundant `created_at <= t` gives the planner an index range bound.
+            qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk), created_at__lte=created_at)
+        rows = list(qs.order_by("-created_at", "-id")[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1], "n") if has_more and rows else None
+        prev_cursor = encode_cursor(rows[0], "p") if created_at is not None and rows else None
+    else:
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk), created_at__gte=created_at)
+        rows = list(qs.order_by("created_at", "id")[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        next_cursor = encode_cursor(rows[-1], "n") if rows else None
+        prev_cursor = encode_cursor(rows[0], "p") if has_more and rows else None
+    return rows, next_cursor, prev_cursor
+
+
+def encode_rank_cursor(obj):
+    raw = json.dumps({"r": obj.rank, "id": obj.pk}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return float(payload["r"]), int(payload["id"])
+    except Exception:
+        raise InvalidPageParam("Invalid cursor")
+
+
+def paginate_by_rank(qs, cursor, page_size):
+    """Forward keyset page over `(rank, id)` best match first; `qs` must be annotated with `rank`.
+
+    Returns (rows, next_cursor).
+    """
+    if cursor:
+        rank, pk = decode_rank_cursor(cursor)
+        qs = qs.filter(Q(rank__lt=rank) | Q(rank=rank, pk__lt=pk))
+    rows = list(qs.order_by("-rank", "-id")[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return rows, encode_rank_cursor(rows[-1]) if has_more and rows else None
+
+
+def estimate_count(qs):
+    """Planner row estimate for `qs` on Postgres; exact count elsewhere.
+
+    Uses the same statistics as `pg_class.reltuples` but honours the filters,
+    so it works for the role-scoped listings too.
+    """
+    connection = connections[qs.db]
+    if connection.vendor != "postgresql":
+        return qs.count()
+    sql, params = qs.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_for_mode(qs, mode):
+    if mode == "exact":
+        return qs.count()
+    if mode == "approx":
+        return estimate_count(qs)
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator for huge querysets: planner estimate instead of COUNT(*).
+
+    Small results are still counted exactly (cheap there, and an under-estimate
+    would hide rows on the last page).
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        return self.object_list.count() if estimate < self.exact_below else estimate
@@ -0,0 +1,46 @@
+import codecs
+import csv
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+def ndjson_rows(lines):
+    """Dicts from an iterable of NDJSON text lines; blank lines are skipped."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise ParseError(f"Line {number}: {e}")
+        if not isinstance(row, dict):
+            raise ParseError(f"Line {number}: expected a JSON object")
+        yield row
+
+
+def csv_rows(lines):
+    """Dicts keyed by the header row; empty cells are dropped rather than passed on as ''."""
+    for row in csv.DictReader(lines):
+        yield {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+class NDJSONParser(BaseParser):
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return list(ndjson_rows(codecs.getreader("utf-8")(stream)))
+        except UnicodeDecodeError as e:
+            raise ParseError(f"Invalid NDJSON: {e}")
+
+
+class CSVParser(BaseParser):
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return list(csv_rows(codecs.getreader("utf-8")(stream)))
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ParseError(f"Invalid CSV: {e}")
@@ -0,0 +1,253 @@
+"""Push of report changes to connected clients (Server-Sent Events over ASGI).
+
+Every ASGI worker keeps one hub: a map from channel (`user:<id>`, `dept:<id>`,
+`all`) to the asyncio queues of its open streams. A connection costs one
+small queue and one suspended coroutine, so thousands of idle streams fit in
+a worker. Changes reach the hubs through a broker: Redis pub/sub in
+production (one subscription per worker, not per client), or in-process
+delivery when PUSH_REDIS_URL is unset (tests, single-process development).
+"""
+import asyncio
+import json
+import secrets
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+REDIS_CHANNEL = "urbaniq:push"
+TICKET_PREFIX = "push:ticket:"
+ALL_CHANNEL = "all"
+
+
+def heartbeat_seconds():
+    return float(getattr(settings, "PUSH_HEARTBEAT_SECONDS", 25))
+
+
+def queue_size():
+    return int(getattr(settings, "PUSH_QUEUE_SIZE", 100))
+
+
+def channels_for(role, user_id, department_id):
+    """Channels a subscriber with this role may listen on; mirrors `visible_complaints`.
+
+    `role` must come from `acting_role`, which only grants AUTHORITY to staff.
+    """
+    from .roles import ADMIN, AUTHORITY
+
+    if role == ADMIN:
+        return [ALL_CHANNEL]
+    channels = [f"user:{user_id}"]
+    if role == AUTHORITY and department_id is not None:
+        channels.append(f"dept:{department_id}")
+    return channels
+
+
+def complaint_channels(user_id, department_ids):
+    departments = sorted({pk for pk in department_ids if pk is not None})
+    return [ALL_CHANNEL, f"user:{user_id}", *(f"dept:{pk}" for pk in departments)]
+
+
+class Subscription:
+    """One stream's queue. When a slow client lets it fill up, the oldest event is dropped."""
+
+    def __init__(self, channels, loop):
+        self.channels = channels
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size())
+
+    def deliver(self, event):
+        # Runs on the subscription's loop
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def add(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+
+    def remove(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def __len__(self):
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+    def dispatch(self, channels, event):
+        """Hand `event` to every local stream on any of `channels`, each exactly once; callable from any thread."""
+        with self._lock:
+            targets = {s for channel in channels for s in self._subscribers.get(channel, ())}
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Loop already closed: the stream is going away
+                self.remove(subscription)
+
+
+class InMemoryBroker:
+    """Delivers within this process only."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, messages):
+        for channels, event in messages:
+            self.hub.dispatch(channels, event)
+
+    def start(self):
+        pass
+
+
+class RedisBroker:
+    """Fans messages out to the hubs of every worker through one Redis channel."""
+
+    def __init__(self, hub, url):
+        import redis
+
+        self.hub = hub
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def publish(self, messages):
+        pipe = self._client.pipeline(transaction=False)
+        for channels, event in messages:
+            pipe.publish(REDIS_CHANNEL, json.dumps({"channels": channels, "event": event}))
+        pipe.execute()
+
+    def start(self):
+        """Start this worker's listener thread on first use."""
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="push-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import time
+
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    self.hub.dispatch(payload["channels"], payload["event"])
+            except Exception as e:
+                print(f"push listener reconnecting: {e}")
+                time.sleep(1)
+
+
+hub = Hub()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = getattr(settings, "PUSH_REDIS_URL", "")
+                _broker = RedisBroker(hub, url) if url else InMemoryBroker(hub)
+    return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def complaint_event(kind, complaint, department_ids=None):
+    """(channels, event) for a change of `complaint`; `department_ids` adds departments it just left."""
+    departments = {complaint.assigned_department_id, *(department_ids or ())}
+    event = {
+        "type": kind,
+        "id": complaint.pk,
+        "tracking_id": str(complaint.tracking_id),
+        "status": complaint.status,
+        "updated_at": complaint.updated_at.isoformat() if complaint.updated_at else None,
+    }
+    return complaint_channels(complaint.user_id, departments), event
+
+
+def publish(messages):
+    """Publish (channels, event) pairs once the current transaction commits; never raises into the caller."""
+    messages = list(messages)
+    if not messages:
+        return
+
+    def send():
+        try:
+            get_broker().publish(messages)
+        except Exception as e:
+            print(f"push publish failed: {e}")
+
+    transaction.on_commit(send)
+
+
+def issue_ticket(user):
+    """Single-use token for opening a stream, for clients (EventSource) that cannot send headers."""
+    ticket = secrets.token_urlsafe(24)
+    cache.set(TICKET_PREFIX + ticket, user.pk, int(getattr(settings, "PUSH_TICKET_TTL", 30)))
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """User id the ticket was issued to, or None; a ticket works once."""
+    if not ticket:
+        return None
+    key = TICKET_PREFIX + ticket
+    user_id = cache.get(key)
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
+
+
+def sse(event=None, comment=None, retry=None):
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event is not None:
+        lines.append(f"event: {event['type']}")
+        lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def event_stream(channels):
+    """SSE body for one client: events on `channels`, and a comment line when idle so proxies keep it open."""
+    subscription = Subscription(channels, asyncio.get_running_loop())
+    get_broker().start()
+    hub.add(subscription)
+    try:
+        yield sse(comment="connected", retry=3000)
+        while True:
+            try:
+                event = await subscription.get(heartbeat_seconds())
+            except asyncio.TimeoutError:
+                yield sse(comment="ping")
+                continue
+            yield sse(event)
+    finally:
+        hub.remove(subscription)
@@ -0,0 +1,119 @@
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+from complaints.models import AuthorityProfile, Complaint
+from .metrics import count_cache
+
+
+ADMIN = "admin"
+AUTHORITY = "authority"
+CITIZEN = "citizen"
+
+# Memo on the user instance; request.user lives exactly as long as the request.
+_INSTANCE_ATTR = "_urbaniq_role"
+
+
+class UserRole(NamedTuple):
+    role: str
+    department_id: Optional[int]
+    department_name: Optional[str]
+
+    @property
+    def department(self):
+        if self.department_id is None:
+            return None
+        return {"id": self.department_id, "name": self.department_name}
+
+
+def _cache_key(user_id):
+    return f"role:dept:{user_id}"
+
+
+def _load_department(user):
+    """(department_id, department_name) of the user's authority profile, or (None, None)."""
+    # Rows loaded with select_related("user__authority_profile__department") need no lookup.
+    if get_user_model().authority_profile.is_cached(user):
+        try:
+            profile = user.authority_profile
+        except ObjectDoesNotExist:
+            return None, None
+        return profile.department_id, profile.department.name
+
+    key = _cache_key(user.pk)
+    cached = cache.get(key)
+    count_cache("role", "miss" if cached is None else "hit")
+    if cached is None:
+        profile = AuthorityProfile.objects.select_related("department").filter(user_id=user.pk).first()
+        cached = {"id": profile.department_id, "name": profile.department.name} if profile else {}
+        cache.set(key, cached, int(getattr(settings, "ROLE_CACHE_TTL", 300)))
+    return cached.get("id"), cached.get("name")
+
+
+def resolve_role(user) -> UserRole:
+    """Role and authority department of `user`, resolved at most once per instance.
+
+    The department part is shared across requests through the Django cache and
+    invalidated when the user's AuthorityProfile changes.
+    """
+    resolved = getattr(user, _INSTANCE_ATTR, None)
+    if resolved is not None:
+        return resolved
+    department_id, department_name = _load_department(user)
+    if user.is_superuser:
+        role = ADMIN
+    elif department_id is not None:
+        role = AUTHORITY
+    else:
+        role = CITIZEN
+    resolved = UserRole(role, department_id, department_name)
+    setattr(user, _INSTANCE_ATTR, resolved)
+    return resolved
+
+
+def acting_role(user) -> UserRole:
+    """The role `user` acts with on reports other than their own.
+
+    An authority profile only counts for staff users, as in visible_complaints
+    and can_view_complaint; resolve_role reports the profile regardless (it is
+    what /api/user/me shows), so access decisions go through here.
+    """
+    role = resolve_role(user)
+    if role.role == AUTHORITY and not user.is_staff:
+        return UserRole(CITIZEN, None, None)
+    return role
+
+
+def invalidate_role(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_roles(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def visible_complaints(user, qs=None):
+    """Active complaints `user` may see: admins all, authorities their department, citizens their own."""
+    qs = Complaint.objects.all() if qs is None else qs
+    qs = qs.filter(is_active=True)
+    if user.is_superuser:
+        return qs
+    if user.is_staff:
+        department_id = resolve_role(user).department_id
+        if department_id is None:
+            return qs.none()
+        return qs.filter(assigned_department_id=department_id)
+    return qs.filter(user_id=user.pk)
+
+
+def can_view_complaint(user, user_id, assigned_department_id):
+    """Visibility check for one complaint, given its owner and department ids."""
+    if user_id == user.pk or user.is_superuser:
+        return True
+    if user.is_staff:
+        department_id = resolve_role(user).department_id
+        return department_id is not None and department_id == assigned_department_id
+    return False
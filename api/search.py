@@ -0,0 +1,53 @@
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from complaints.models import Complaint
+
+
+# Must match the configuration the search_vector trigger was created with (migration 0009).
+SEARCH_CONFIG = "english"
+FTS5_TABLE = "complaints_complaint_fts"
+# bm25 column weights in FTS5 column order (title, description, location): ts_rank's
+# defaults for the weights the trigger sets (title A, location B, description C)
+FTS5_WEIGHTS = "1.0, 0.2, 0.4"
+
+
+def _fts5_query(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax.
+    return " ".join('"%s"' % term.replace('"', '""') for term in query.split())
+
+
+def search_expressions(query, using="default"):
+    """(condition, rank) expressions for a full-text match of `query`.
+
+    Postgres matches against the trigger-maintained `search_vector` column
+    (GIN indexed) and ranks with ts_rank; SQLite uses the FTS5 shadow table
+    and bm25. Higher rank is better on both.
+    """
+    table = Complaint._meta.db_table
+    vendor = connections[using].vendor
+    if vendor == "postgresql":
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        condition = RawSQL(f"{table}.search_vector @@ {tsquery}", [SEARCH_CONFIG, query], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank({table}.search_vector, {tsquery})::float8", [SEARCH_CONFIG, query], output_field=FloatField())
+        return condition, rank
+    if vendor == "sqlite":
+        match = _fts5_query(query)
+        condition = RawSQL(
+            f"{table}.id IN (SELECT rowid FROM {FTS5_TABLE} WHERE {FTS5_TABLE} MATCH %s)", [match],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS5_TABLE}, {FTS5_WEIGHTS}) FROM {FTS5_TABLE} WHERE {FTS5_TABLE} MATCH %s AND rowid = {table}.id)",
+            [match], output_field=FloatField(),
+        )
+        return condition, rank
+    condition = Q(title__icontains=query) | Q(description__icontains=query) | Q(location__icontains=query)
+    return condition, Value(0.0, output_field=FloatField())
+
+
+def search_complaints(qs, query):
+    """`qs` narrowed to full-text matches of `query`, annotated with `rank`."""
+    condition, rank = search_expressions(query, qs.db)
+    return qs.filter(condition).annotate(rank=rank)
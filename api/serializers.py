@@ -1,12 +1,73 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from complaints.models import Complaint, ComplaintImage, Department
+from complaints.models import Complaint, ComplaintImage, Department, VideoJob
+from .metrics import TimedRepresentation
+from .roles import resolve_role
 
 
 User = get_user_model()
 
+# Relations every complaint representation reads; with these joined a page of
+# complaints serializes in two queries (rows + images) whatever its size.
+COMPLAINT_SELECT_RELATED = ("user__authority_profile__department", "assigned_department", "video_job")
+# Columns no representation reads; the legacy timeline blob can be large.
+COMPLAINT_DEFERRED = ("timeline",)
 
-class UserSerializer(serializers.ModelSerializer):
+
+def user_role(user):
+    return resolve_role(user).role
+
+
+def user_department(user):
+    return resolve_role(user).department
+
+
+def absolute_url(context, url):
+    """Absolute form of a storage URL, resolving the request origin once per serialization."""
+    request = context.get("request")
+    if not request or not url.startswith("/"):
+        return url
+    origin = context.get("_origin")
+    if origin is None:
+        origin = context["_origin"] = request.build_absolute_uri("/").rstrip("/")
+    return origin + url
+
+
+def image_urls(obj, context):
+    return [
+        absolute_url(context, img.image.url)
+        for img in obj.images.all()
+        if img.image and hasattr(img.image, "url")
+    ]
+
+
+def _video_job(obj):
+    if not obj.video:
+        return None
+    try:
+        return obj.video_job
+    except VideoJob.DoesNotExist:
+        return None
+
+
+def video_url(obj, context):
+    # While the worker is still transcoding, the stored file is the raw upload.
+    job = _video_job(obj)
+    if job and job.is_pending:
+        return None
+    if obj.video and hasattr(obj.video, "url"):
+        return absolute_url(context, obj.video.url)
+    return None
+
+
+def video_status(obj):
+    job = _video_job(obj)
+    if not job:
+        return None
+    return {"status": job.status, "progress": job.progress}
+
+
+class UserSerializer(TimedRepresentation, serializers.ModelSerializer):
     role = serializers.SerializerMethodField()
     department = serializers.SerializerMethodField()
     
@@ -15,25 +76,10 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "role", "department"]
     
     def get_role(self, obj):
-        if obj.is_superuser:
-            return "admin"
-        try:
-            if hasattr(obj, 'authority_profile'):
-                return "authority"
-        except:
-            pass
-        return "citizen"
-    
+        return user_role(obj)
+
     def get_department(self, obj):
-        try:
-            if hasattr(obj, 'authority_profile'):
-                return {
-                    "id": obj.authority_profile.department.id,
-                    "name": obj.authority_profile.department.name
-                }
-        except:
-            pass
-        return None
+        return user_department(obj)
 
 
 class ComplaintImageSerializer(serializers.ModelSerializer):
@@ -42,17 +88,19 @@ class ComplaintImageSerializer(serializers.ModelSerializer):
         fields = ["id", "image"]
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(TimedRepresentation, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ["id", "name"]
 
 
-class ComplaintSerializer(serializers.ModelSerializer):
+class ComplaintSerializer(TimedRepresentation, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     imageUrls = serializers.SerializerMethodField()
     videoUrl = serializers.SerializerMethodField()
+    videoStatus = serializers.SerializerMethodField()
     status = serializers.CharField(read_only=True)
+    duplicate_of = serializers.PrimaryKeyRelatedField(read_only=True)
     assigned_department = DepartmentSerializer(read_only=True)
     assigned_department_id = serializers.PrimaryKeyRelatedField(
         source="assigned_department", queryset=Department.objects.all(), write_only=True, required=True
@@ -66,30 +114,65 @@ class ComplaintSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "location",
+            "latitude",
+            "longitude",
             "complaint_type",
             "status",
             "assigned_department",
             "assigned_department_id",
             "imageUrls",
             "videoUrl",
+            "videoStatus",
+            "duplicate_of",
             "created_at",
             "updated_at",
             "user",
         ]
 
     def get_imageUrls(self, obj):
-        request = self.context.get("request")
-        urls = []
-        for img in obj.images.all():
-            if img.image and hasattr(img.image, "url"):
-                if request:
-                    urls.append(request.build_absolute_uri(img.image.url))
-                else:
-                    urls.append(img.image.url)
-        return urls
+        return image_urls(obj, self.context)
 
     def get_videoUrl(self, obj):
-        if obj.video and hasattr(obj.video, "url"):
-            request = self.context.get("request")
-            return request.build_absolute_uri(obj.video.url) if request else obj.video.url
-        return None
\ No newline at end of file
+        return video_url(obj, self.context)
+
+    def get_videoStatus(self, obj):
+        return video_status(obj)
+
+
+class ComplaintListSerializer(TimedRepresentation, serializers.BaseSerializer):
+    """Read-only, list-view representation of a complaint.
+
+    Produces exactly what ComplaintSerializer does but builds the dict directly,
+    skipping per-field serializer machinery. Querysets must be loaded with
+    COMPLAINT_SELECT_RELATED and prefetch `images`.
+    """
+    _datetime = serializers.DateTimeField()
+
+    def to_representation(self, obj):
+        user = obj.user
+        dept = obj.assigned_department
+        return {
+            "id": obj.id,
+            "tracking_id": str(obj.tracking_id),
+            "title": obj.title,
+            "description": obj.description,
+            "location": obj.location,
+            "latitude": obj.latitude,
+            "longitude": obj.longitude,
+            "complaint_type": obj.complaint_type,
+            "status": obj.status,
+            "assigned_department": {"id": dept.id, "name": dept.name} if dept else None,
+            "imageUrls": image_urls(obj, self.context),
+            "videoUrl": video_url(obj, self.context),
+            "videoStatus": video_status(obj),
+            "duplicate_of": obj.duplicate_of_id,
+            "created_at": self._datetime.to_representation(obj.created_at),
+            "updated_at": self._datetime.to_representation(obj.updated_at),
+            "user": {
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "role": user_role(user),
+                "department": user_department(user),
+            },
+        }
@@ -1,15 +1,12 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.utils.text import Truncator
-from complaints.models import Complaint
+from complaints.models import Complaint, NotificationOutbox
+from .metrics import count_notification
+from .mx_cache import mx_cache
+from .tasks import kick_notification_outbox
 import re
 
-try:
-    import dns.resolver  # type: ignore
-except Exception:
-    dns = None
-
-
 ALLOWED_GMAIL_DOMAINS = {"gmail.com", "googlemail.com"}
 BLOCKED_TEST_DOMAINS = {"test.com", "example.com", "invalid", "fake.com", "localhost"}
 
@@ -19,13 +16,7 @@ def _is_valid_email_format(email: str) -> bool:
 
 
 def _has_mx_record(domain: str) -> bool:
-    if not dns or not hasattr(dns, "resolver"):
-        return True  # cannot verify; do not block
-    try:
-        answers = dns.resolver.resolve(domain, "MX")  # type: ignore[attr-defined]
-        return len(answers) > 0
-    except Exception:
-        return False
+    return mx_cache.has_mx(domain)
 
 
 def _validate_recipient(email: str):
@@ -46,7 +37,8 @@ def _build_tracking_link(tracking_id):
     return f"/reports/track/{tracking_id}"
 
 
-def _send_smart_mail(subject: str, message: str, recipient: str):
+def _queue_smart_mail(kind: str, complaint: Complaint, subject: str, message: str, recipient: str):
+    """Write the email to the outbox in the caller's transaction; delivery happens on the worker."""
     if not recipient:
         return False, "Missing recipient"
 
@@ -54,28 +46,32 @@ def _send_smart_mail(subject: str, message: str, recipient: str):
     if not ok:
         info = "Email notifications could not be delivered because this email address is not a valid Google-registered inbox."
         print(f"Email skipped for {recipient}: {reason}")
+        count_notification("email", "rejected")
         return False, info
 
     if not getattr(settings, "EMAIL_CONFIGURED", False):
         info = "Email configuration is missing; notification was not sent."
         print(info)
+        count_notification("email", "unconfigured")
         return False, info
 
-    try:
-        send_mail(
-            subject,
-            message,
-            getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@urbaniq.local'),
-            [recipient],
-            fail_silently=False,
-        )
-        return True, "Sent"
-    except Exception as e:
-        print(f"Email notification failed for {recipient}: {e}")
-        return False, "Notification could not be delivered."
+    NotificationOutbox.objects.bulk_create(
+        [NotificationOutbox(
+            complaint=complaint,
+            kind=kind,
+            recipient=recipient,
+            subject=subject,
+            body=message,
+            dedup_key=f"{kind}:{complaint.pk}:{recipient.lower()}",
+        )],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(kick_notification_outbox)
+    count_notification("email", "queued")
+    return True, "Queued"
 
 
-def notify_report_created(complaint: Complaint):
+def _created_mail(complaint: Complaint):
     short_desc = Truncator(complaint.description or "").chars(120)
     tracking_link = _build_tracking_link(complaint.tracking_id)
     dept = getattr(complaint.assigned_department, 'name', 'Concerned Department')
@@ -92,7 +88,12 @@ def notify_report_created(complaint: Complaint):
         f"The concerned department will begin working on your complaint as soon as possible.\n"
         f"Thank you for helping improve our city."
     )
-    return _send_smart_mail(subject, message, complaint.user.email)
+    return subject, message
+
+
+def notify_report_created(complaint: Complaint):
+    subject, message = _created_mail(complaint)
+    return _queue_smart_mail("created", complaint, subject, message, complaint.user.email)
 
     try:
         send_sms_placeholder(complaint)
@@ -100,7 +101,48 @@ def notify_report_created(complaint: Complaint):
         print(f"SMS placeholder failed: {e}")
 
 
-def notify_report_in_review(complaint: Complaint, person_in_charge: str):
+def _queue_batch(kind: str, complaints, build):
+    """Outbox rows for many complaints at once; returns how many were queued.
+
+    `build(complaint)` gives (subject, message). Each distinct recipient is
+    validated once, and all rows go in with one insert and one worker kick,
+    in the caller's transaction.
+    """
+    if not getattr(settings, "EMAIL_CONFIGURED", False):
+        count_notification("email", "unconfigured", len(complaints))
+        return 0
+    verdicts = {}
+    rows = []
+    for complaint in complaints:
+        recipient = complaint.user.email
+        if not recipient:
+            continue
+        if recipient not in verdicts:
+            verdicts[recipient] = _validate_recipient(recipient)[0]
+        if not verdicts[recipient]:
+            count_notification("email", "rejected")
+            continue
+        subject, message = build(complaint)
+        rows.append(NotificationOutbox(
+            complaint=complaint,
+            kind=kind,
+            recipient=recipient,
+            subject=subject,
+            body=message,
+            dedup_key=f"{kind}:{complaint.pk}:{recipient.lower()}",
+        ))
+    if rows:
+        NotificationOutbox.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+        transaction.on_commit(kick_notification_outbox)
+        count_notification("email", "queued", len(rows))
+    return len(rows)
+
+
+def queue_created_notifications(complaints):
+    return _queue_batch("created", complaints, _created_mail)
+
+
+def _in_review_mail(complaint: Complaint, person_in_charge: str):
     dept = getattr(complaint.assigned_department, 'name', 'Concerned Department')
     subject = f"Complaint In Review: {complaint.tracking_id}"
     greeting = complaint.user.username or complaint.user.email or "Citizen"
@@ -112,10 +154,15 @@ def notify_report_in_review(complaint: Complaint, person_in_charge: str):
         f"Person in Charge: {person_in_charge or 'Department Representative'}\n\n"
         f"Your complaint is being handled and we will update you upon completion."
     )
-    return _send_smart_mail(subject, message, complaint.user.email)
+    return subject, message
 
 
-def notify_report_resolved(complaint: Complaint, person_in_charge: str):
+def notify_report_in_review(complaint: Complaint, person_in_charge: str):
+    subject, message = _in_review_mail(complaint, person_in_charge)
+    return _queue_smart_mail("in_review", complaint, subject, message, complaint.user.email)
+
+
+def _resolved_mail(complaint: Complaint, person_in_charge: str):
     dept = getattr(complaint.assigned_department, 'name', 'Concerned Department')
     subject = f"Complaint Resolved: {complaint.tracking_id}"
     greeting = complaint.user.username or complaint.user.email or "Citizen"
@@ -128,7 +175,28 @@ def notify_report_resolved(complaint: Complaint, person_in_charge: str):
         f"Proof of resolution has been recorded and is available with the department.\n"
         f"Thank you for helping improve our city."
     )
-    return _send_smart_mail(subject, message, complaint.user.email)
+    return subject, message
+
+
+def notify_report_resolved(complaint: Complaint, person_in_charge: str):
+    subject, message = _resolved_mail(complaint, person_in_charge)
+    return _queue_smart_mail("resolved", complaint, subject, message, complaint.user.email)
+
+
+def queue_status_notifications(complaints, previous_status, person_in_charge=""):
+    """Batch counterpart of the in-review/resolved notices `ComplaintDetailView.patch` sends.
+
+    `complaints` all moved from `previous_status` to their current status.
+    """
+    complaints = list(complaints)
+    if not complaints:
+        return 0
+    status = complaints[0].status
+    if previous_status == Complaint.Status.OPEN and status == Complaint.Status.IN_PROGRESS:
+        return _queue_batch("in_review", complaints, lambda c: _in_review_mail(c, person_in_charge or c.person_in_charge or ''))
+    if previous_status == Complaint.Status.IN_PROGRESS and status == Complaint.Status.RESOLVED:
+        return _queue_batch("resolved", complaints, lambda c: _resolved_mail(c, person_in_charge or c.person_in_charge or ''))
+    return 0
 
 
 def send_sms_placeholder(complaint: Complaint):
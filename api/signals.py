@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from complaints.models import AuthorityProfile, Complaint, Department, VideoJob
+from .conditional import bump_report_versions
+from .departments import bump_department_version
+from .duplicates import reindex_text_signature
+from .geo import encode as geohash_encode
+from .push import complaint_event, publish
+from .roles import invalidate_role, invalidate_roles
+
+
+def _invalidate_now_and_on_commit(invalidate, *args):
+    # Dropping the entry only now would let another worker re-cache the
+    # pre-commit row before this transaction lands.
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver([post_save, post_delete], sender=AuthorityProfile)
+def authority_profile_changed(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(invalidate_role, instance.user_id)
+
+
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, created, **kwargs):
+    _invalidate_now_and_on_commit(bump_department_version)
+    if not created:
+        user_ids = list(instance.authorities.values_list("user_id", flat=True))
+        _invalidate_now_and_on_commit(invalidate_roles, user_ids)
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(bump_department_version)
+
+
+@receiver(pre_save, sender=Complaint)
+def complaint_geohash(sender, instance, **kwargs):
+    # Saves with update_fields must list "geohash" along with the coordinates.
+    if instance.latitude is None or instance.longitude is None:
+        instance.geohash = None
+    else:
+        instance.geohash = geohash_encode(instance.latitude, instance.longitude)
+
+
+TEXT_FIELDS = ("title", "description", "location")
+
+
+@receiver(pre_save, sender=Complaint)
+def complaint_previous_values(sender, instance, update_fields=None, **kwargs):
+    # A reassignment must also invalidate the department the complaint leaves,
+    # and a text edit must re-index the text signature. One query for both.
+    instance._previous_department_id = None
+    instance._text_changed = False
+    if not instance.pk:
+        return
+    columns = [
+        column for column, field in [("assigned_department_id", "assigned_department"), *zip(TEXT_FIELDS, TEXT_FIELDS)]
+        if update_fields is None or field in update_fields
+    ]
+    if not columns:
+        return
+    previous = Complaint.objects.filter(pk=instance.pk).values(*columns).first()
+    if previous is None:
+        return
+    instance._previous_department_id = previous.get("assigned_department_id")
+    instance._text_changed = any(
+        field in previous and previous[field] != getattr(instance, field) for field in TEXT_FIELDS
+    )
+
+
+@receiver([post_save, post_delete], sender=Complaint)
+def complaint_changed(sender, instance, signal, created=False, **kwargs):
+    department_ids = [instance.assigned_department_id, getattr(instance, "_previous_department_id", None)]
+    bump_report_versions([instance.user_id], department_ids)
+    if created:
+        kind = "report.created"
+    elif signal is post_delete or not instance.is_active:
+        kind = "report.deleted"
+    else:
+        kind = "report.updated"
+    publish([complaint_event(kind, instance, department_ids)])
+    if signal is post_save and getattr(instance, "_text_changed", False):
+        instance._text_changed = False
+        reindex_text_signature(instance)
+
+
+@receiver([post_save, post_delete], sender=VideoJob)
+def video_job_changed(sender, instance, **kwargs):
+    complaint = instance.complaint
+    bump_report_versions([complaint.user_id], [complaint.assigned_department_id])
@@ -0,0 +1,99 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintStat, Department
+
+
+def stat_bucket(complaint):
+    """(department_id, status, complaint_type) the complaint is counted under, or None if it is not counted."""
+    if not complaint.is_active:
+        return None
+    return complaint.assigned_department_id, complaint.status, complaint.complaint_type
+
+
+def _add(bucket, delta):
+    department_id, status, complaint_type = bucket
+    rows = ComplaintStat.objects.filter(department_id=department_id, status=status, complaint_type=complaint_type)
+    if rows.update(count=F("count") + delta, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            ComplaintStat.objects.create(
+                department_id=department_id, status=status, complaint_type=complaint_type, count=delta
+            )
+    except IntegrityError:
+        # Another transaction created the bucket first; its row is there to increment now.
+        rows.update(count=F("count") + delta, updated_at=timezone.now())
+
+
+def apply_stat_changes(changes):
+    """Apply (before, after) bucket pairs from `stat_bucket` in the current transaction.
+
+    Buckets are updated in a fixed order so two transactions touching the same
+    buckets cannot deadlock on the counter rows.
+    """
+    deltas = Counter()
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    for bucket in sorted((b for b, d in deltas.items() if d), key=lambda b: (b[0] or 0, b[1], b[2])):
+        _add(bucket, deltas[bucket])
+
+
+def record_stat_change(before, after):
+    apply_stat_changes([(before, after)])
+
+
+def _reconcile_department(department_id):
+    fixed = 0
+    with transaction.atomic():
+        # Same order as apply_stat_changes, so a request updating several of
+        # these buckets cannot deadlock with the recount.
+        stored = {
+            (s.status, s.complaint_type): s
+            for s in ComplaintStat.objects.select_for_update()
+            .filter(department_id=department_id).order_by("status", "complaint_type")
+        }
+        actual = {
+            (row["status"], row["complaint_type"]): row["n"]
+            for row in Complaint.objects.filter(is_active=True, assigned_department_id=department_id)
+            .values("status", "complaint_type").annotate(n=Count("id")).order_by()
+        }
+        for key in stored.keys() | actual.keys():
+            count = actual.get(key, 0)
+            stat = stored.get(key)
+            if stat is None:
+                try:
+                    with transaction.atomic():
+                        ComplaintStat.objects.create(
+                            department_id=department_id, status=key[0], complaint_type=key[1], count=count
+                        )
+                except IntegrityError:
+                    continue  # a request created the bucket since the rows were locked; the next run checks it
+            elif stat.count != count:
+                stat.count = count
+                stat.save(update_fields=["count", "updated_at"])
+            else:
+                continue
+            fixed += 1
+    return fixed
+
+
+def reconcile_stats():
+    """Rewrite the counters from the complaints table, one department at a time; returns the buckets fixed.
+
+    Each department's counter rows are locked while its complaints are
+    recounted, so increments from in-flight requests land either fully
+    before or fully after that recount. Requests for other departments never
+    wait, and each lock lasts one index-backed aggregate.
+    """
+    departments = {None, *Department.objects.values_list("id", flat=True)}
+    departments.update(ComplaintStat.objects.values_list("department_id", flat=True).distinct())
+    return sum(_reconcile_department(pk) for pk in sorted(departments, key=lambda pk: pk or 0))
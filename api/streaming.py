@@ -0,0 +1,30 @@
+import json
+from itertools import islice
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def stream_chunk_size():
+    return int(getattr(settings, "STREAM_CHUNK_SIZE", 500))
+
+
+def iter_chunks(qs, chunk_size):
+    """Yield lists of at most `chunk_size` objects read through a server-side cursor.
+
+    `prefetch_related()` lookups on `qs` are resolved once per chunk, so memory
+    stays bounded by the chunk rather than by the size of the result.
+    """
+    rows = qs.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ndjson_lines(qs, serializer_class, context=None, chunk_size=None):
+    chunk_size = chunk_size or stream_chunk_size()
+    for chunk in iter_chunks(qs, chunk_size):
+        data = serializer_class(chunk, many=True, context=context or {}).data
+        yield "".join(json.dumps(row, cls=JSONEncoder) + "\n" for row in data)
@@ -0,0 +1,268 @@
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from complaints.models import NotificationOutbox, VideoJob
+from .conditional import bump_versions_for_jobs
+from .stats import reconcile_stats
+from .media import TranscodeError, compressed_video_name, ffmpeg_available, transcode_video
+from .metrics import compression_timer, count_notification
+
+
+VIDEO_JOB_MAX_RETRIES = int(getattr(settings, "VIDEO_JOB_MAX_RETRIES", 3))
+VIDEO_JOB_STALE_SECONDS = int(getattr(settings, "VIDEO_JOB_STALE_SECONDS", 600))
+VIDEO_PROGRESS_INTERVAL = 2.0  # seconds between progress/heartbeat writes
+
+NOTIFICATION_BATCH_SIZE = int(getattr(settings, "NOTIFICATION_BATCH_SIZE", 50))
+NOTIFICATION_MAX_ATTEMPTS = int(getattr(settings, "NOTIFICATION_MAX_ATTEMPTS", 5))
+NOTIFICATION_RETRY_BASE_SECONDS = int(getattr(settings, "NOTIFICATION_RETRY_BASE_SECONDS", 60))
+NOTIFICATION_SENDING_TIMEOUT = 600  # a SENDING row older than this lost its worker
+
+
+def enqueue_video_job(job_id):
+    """Hand a job to the broker. A lost publish is picked up by `recover_video_jobs`."""
+    try:
+        transcode_complaint_video.delay(job_id)
+    except Exception as e:
+        print(f"Could not enqueue video job {job_id}: {e}")
+
+
+def _claim(job_id):
+    """Atomically move a queued (or abandoned running) job to RUNNING."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=VIDEO_JOB_STALE_SECONDS)
+    claimed = VideoJob.objects.filter(
+        Q(status=VideoJob.Status.QUEUED) | Q(status=VideoJob.Status.RUNNING, updated_at__lt=stale),
+        pk=job_id,
+    ).update(
+        status=VideoJob.Status.RUNNING,
+        progress=0,
+        attempts=F("attempts") + 1,
+        started_at=now,
+        updated_at=now,
+        error=None,
+    )
+    if claimed:
+        bump_versions_for_jobs([job_id])
+    return claimed
+
+
+def _finish(job_id, status, error=None):
+    now = timezone.now()
+    fields = {"status": status, "error": error, "updated_at": now, "finished_at": now}
+    if status == VideoJob.Status.DONE:
+        fields["progress"] = 100
+    VideoJob.objects.filter(pk=job_id).update(**fields)
+    bump_versions_for_jobs([job_id])
+
+
+def _replace_video(complaint, out_path):
+    storage = complaint.video.storage
+    old_name = complaint.video.name
+    with open(out_path, "rb") as f:
+        complaint.video.save(compressed_video_name(old_name), File(f), save=False)
+    complaint.save(update_fields=["video", "updated_at"])
+    if old_name and old_name != complaint.video.name:
+        storage.delete(old_name)
+
+
+@shared_task(bind=True, acks_late=True, max_retries=VIDEO_JOB_MAX_RETRIES)
+def transcode_complaint_video(self, job_id):
+    if not _claim(job_id):
+        return "skipped"
+    job = VideoJob.objects.select_related("complaint").get(pk=job_id)
+    complaint = job.complaint
+    if not complaint.video:
+        _finish(job_id, VideoJob.Status.FAILED, "Complaint has no video")
+        return VideoJob.Status.FAILED
+    if not ffmpeg_available():
+        # Nothing to compress with; the original upload stays as the video.
+        _finish(job_id, VideoJob.Status.DONE)
+        return VideoJob.Status.DONE
+
+    last_write = [0.0]
+
+    def on_progress(percent):
+        # updated_at is the heartbeat recover_video_jobs checks, so it is written
+        # even when the percentage is unknown (percent is None).
+        now = time.monotonic()
+        if now - last_write[0] < VIDEO_PROGRESS_INTERVAL:
+            return
+        last_write[0] = now
+        if percent is None:
+            VideoJob.objects.filter(pk=job_id).update(updated_at=timezone.now())
+            return
+        VideoJob.objects.filter(pk=job_id).update(progress=percent, updated_at=timezone.now())
+        bump_versions_for_jobs([job_id])
+
+    suffix = os.path.splitext(complaint.video.name)[1]
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path = os.path.join(tmp, "in" + suffix)
+        out_path = os.path.join(tmp, "out.mp4")
+        try:
+            with complaint.video.open("rb") as src, open(in_path, "wb") as dst:
+                for chunk in src.chunks():
+                    dst.write(chunk)
+            with compression_timer("video"):
+                transcode_video(in_path, out_path, on_progress)
+            _replace_video(complaint, out_path)
+        except (TranscodeError, OSError) as e:
+            if self.request.retries < self.max_retries:
+                VideoJob.objects.filter(pk=job_id).update(
+                    status=VideoJob.Status.QUEUED, error=str(e)[:2000], updated_at=timezone.now()
+                )
+                bump_versions_for_jobs([job_id])
+                raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+            # Keep the original upload so the complaint still has a playable video.
+            _finish(job_id, VideoJob.Status.FAILED, str(e)[:2000])
+            return VideoJob.Status.FAILED
+    _finish(job_id, VideoJob.Status.DONE)
+    return VideoJob.Status.DONE
+
+
+@shared_task
+def recover_video_jobs():
+    """Re-enqueue jobs whose message was lost or whose worker died mid-encode."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=VIDEO_JOB_STALE_SECONDS)
+    abandoned = VideoJob.objects.filter(
+        Q(status=VideoJob.Status.QUEUED) | Q(status=VideoJob.Status.RUNNING),
+        updated_at__lt=stale,
+    )
+    # Jobs that keep killing their worker are given up on rather than retried forever.
+    exhausted_ids = list(abandoned.filter(attempts__gt=VIDEO_JOB_MAX_RETRIES).values_list("pk", flat=True))
+    failed = VideoJob.objects.filter(pk__in=exhausted_ids).update(
+        status=VideoJob.Status.FAILED, error="Abandoned after repeated worker failures",
+        updated_at=now, finished_at=now,
+    )
+    if exhausted_ids:
+        bump_versions_for_jobs(exhausted_ids)
+    requeued = 0
+    for job_id in abandoned.values_list("pk", flat=True):
+        enqueue_video_job(job_id)
+        requeued += 1
+    return {"requeued": requeued, "failed": failed}
+
+
+def kick_notification_outbox():
+    """Ask a worker to drain the outbox now; the beat schedule drains it regardless."""
+    try:
+        drain_notification_outbox.delay()
+    except Exception as e:
+        print(f"Could not enqueue outbox drain: {e}")
+
+
+def _claim_notifications(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NotificationOutbox.objects.filter(
+                status=NotificationOutbox.Status.PENDING, next_attempt_at__lte=now
+            )
+            .order_by("next_attempt_at")
+            .select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if ids:
+            NotificationOutbox.objects.filter(pk__in=ids).update(
+                status=NotificationOutbox.Status.SENDING, updated_at=now
+            )
+    return ids
+
+
+def _record_failure(row, error):
+    now = timezone.now()
+    attempts = row.attempts + 1
+    if attempts >= NOTIFICATION_MAX_ATTEMPTS:
+        status, next_attempt = NotificationOutbox.Status.DEAD, row.next_attempt_at
+        print(f"Notification {row.pk} to {row.recipient} dead-lettered: {error}")
+        count_notification("email", "dead")
+    else:
+        count_notification("email", "failed")
+        status = NotificationOutbox.Status.PENDING
+        next_attempt = now + timedelta(seconds=NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    NotificationOutbox.objects.filter(pk=row.pk).update(
+        status=status, attempts=attempts, next_attempt_at=next_attempt,
+        last_error=str(error)[:2000], updated_at=now,
+    )
+
+
+def _deliver(rows):
+    """Send rows over one SMTP connection; returns the ids that were delivered."""
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@urbaniq.local")
+    connection = get_connection(fail_silently=False)
+    delivered, failed = [], set()
+    try:
+        connection.open()
+    except Exception as e:
+        for row in rows:
+            _record_failure(row, e)
+        return delivered
+    try:
+        for row in rows:
+            message = EmailMessage(row.subject, row.body, from_email, [row.recipient], connection=connection)
+            try:
+                # One message per call so a rejected recipient fails only its own row.
+                connection.send_messages([message])
+                delivered.append(row.pk)
+            except Exception as e:
+                failed.add(row.pk)
+                _record_failure(row, e)
+                # A dropped session would fail the rest of the batch; reconnect once.
+                connection.close()
+                connection.open()
+    except Exception as e:
+        # Could not reconnect: every row not yet sent goes back for retry.
+        for row in rows:
+            if row.pk not in delivered and row.pk not in failed:
+                _record_failure(row, e)
+    finally:
+        connection.close()
+    return delivered
+
+
+@shared_task
+def drain_notification_outbox(batch_size=None):
+    batch_size = batch_size or NOTIFICATION_BATCH_SIZE
+    now = timezone.now()
+    NotificationOutbox.objects.filter(
+        status=NotificationOutbox.Status.SENDING,
+        updated_at__lt=now - timedelta(seconds=NOTIFICATION_SENDING_TIMEOUT),
+    ).update(status=NotificationOutbox.Status.PENDING, updated_at=now)
+
+    sent = 0
+    while True:
+        ids = _claim_notifications(batch_size)
+        if not ids:
+            break
+        rows = list(NotificationOutbox.objects.filter(pk__in=ids).order_by("pk"))
+        delivered = _deliver(rows)
+        if delivered:
+            now = timezone.now()
+            NotificationOutbox.objects.filter(pk__in=delivered).update(
+                status=NotificationOutbox.Status.SENT, sent_at=now, updated_at=now,
+                attempts=F("attempts") + 1, last_error=None,
+            )
+            count_notification("email", "sent", len(delivered))
+        sent += len(delivered)
+        if len(ids) < batch_size:
+            break
+    return sent
+
+
+@shared_task
+def reconcile_complaint_stats():
+    """Correct counter drift (admin edits, raw SQL, crashed requests) from the complaints table."""
+    fixed = reconcile_stats()
+    if fixed:
+        print(f"Complaint stats reconciled: {fixed} bucket(s) corrected")
+    return fixed
@@ -0,0 +1,102 @@
+"""Status changes for many complaints in one request.
+
+Permission is part of the SQL: rows the caller cannot see (visible_complaints)
+are never read or written. Rows are locked, grouped by their current status, and moved
+with one UPDATE per source status, so the previous status of every changed
+row is known for its event, its counter bucket and its notification.
+"""
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from complaints.models import Complaint, ComplaintEvent
+from .conditional import bump_report_versions
+from .events import record_events
+from .push import complaint_event, publish
+from .roles import visible_complaints
+from .services import queue_status_notifications
+from .stats import apply_stat_changes, stat_bucket
+
+
+def bulk_status_max_ids():
+    return int(getattr(settings, "BULK_STATUS_MAX_IDS", 1000))
+
+
+def _parse_keys(ids, tracking_ids):
+    pks, uuids, rejected = set(), set(), []
+    for raw in ids:
+        try:
+            pks.add(int(raw))
+        except (TypeError, ValueError):
+            rejected.append({"id": raw, "error": "Invalid id"})
+    for raw in tracking_ids:
+        try:
+            uuids.add(uuid.UUID(str(raw)))
+        except ValueError:
+            rejected.append({"tracking_id": raw, "error": "Invalid tracking_id"})
+    return pks, uuids, rejected
+
+
+def bulk_transition(actor, target, ids=(), tracking_ids=(), person_in_charge=None):
+    """Move the given complaints to `target`; returns {"changed", "rejected", "notifications"}.
+
+    Only complaints `actor` can see are read or written (visible_complaints);
+    the rest are rejected as not found.
+    """
+    pks, uuids, rejected = _parse_keys(ids, tracking_ids)
+    scope = visible_complaints(actor)
+
+    changed, notifications = [], 0
+    with transaction.atomic():
+        rows = list(
+            scope.filter(Q(pk__in=pks) | Q(tracking_id__in=uuids))
+            .select_related("user", "assigned_department")
+            .select_for_update(of=("self",))
+            .order_by("pk")
+        )
+        # Not found and not visible look the same, so ids of other departments are not confirmed.
+        found_pks = {c.pk for c in rows}
+        found_uuids = {c.tracking_id for c in rows}
+        rejected += [{"id": pk, "error": "Not found"} for pk in sorted(pks - found_pks)]
+        rejected += [{"tracking_id": str(u), "error": "Not found"} for u in sorted(uuids - found_uuids, key=str)]
+
+        by_status = defaultdict(list)
+        for complaint in rows:
+            if complaint.status == target:
+                rejected.append({"id": complaint.pk, "tracking_id": str(complaint.tracking_id), "error": f"Already {target}"})
+            else:
+                by_status[complaint.status].append(complaint)
+
+        now = timezone.now()
+        updates = {"status": target, "updated_at": now}
+        if person_in_charge:
+            updates["person_in_charge"] = person_in_charge
+        events, stat_changes = [], []
+        for source, group in sorted(by_status.items()):
+            scope.filter(pk__in=[c.pk for c in group], status=source).update(**updates)
+            for complaint in group:
+                before = stat_bucket(complaint)
+                for field, value in updates.items():
+                    setattr(complaint, field, value)
+                stat_changes.append((before, stat_bucket(complaint)))
+                events.append(ComplaintEvent(
+                    complaint=complaint, kind=ComplaintEvent.Kind.STATUS, from_status=source, to_status=target,
+                    actor=actor, created_at=now, data={"person_in_charge": person_in_charge} if person_in_charge else {},
+                ))
+                changed.append({"id": complaint.pk, "tracking_id": str(complaint.tracking_id), "from_status": source})
+            notifications += queue_status_notifications(group, source, person_in_charge)
+        if events:
+            record_events(events)
+            apply_stat_changes(stat_changes)
+            # Queryset updates send no signals
+            bump_report_versions(
+                {c.user_id for g in by_status.values() for c in g},
+                {c.assigned_department_id for g in by_status.values() for c in g},
+            )
+            publish(complaint_event("report.updated", c) for g in by_status.values() for c in g)
+    changed.sort(key=lambda row: row["id"])
+    return {"changed": changed, "rejected": rejected, "notifications": notifications}
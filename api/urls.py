@@ -1,13 +1,25 @@
 from django.urls import path
-from .views import RegisterView, LoginView, MeView, ComplaintListCreateView, MyReportsView, ComplaintDetailView, ReportTrackView, DepartmentListView
+from .async_views import read_view
+from .views import RegisterView, LoginView, MeView, ComplaintListCreateView, MyReportsView, BulkIngestView, BulkStatusView, ReportSearchView, ReportBBoxView, NearbyReportsView, ReportClusterView, ReportExportView, ComplaintDetailView, ComplaintTimelineView, ReportTrackView, PushTicketView, StatsView, report_stream, DepartmentListView
 
 urlpatterns = [
     path("auth/register", RegisterView.as_view(), name="auth-register"),
     path("auth/login", LoginView.as_view(), name="auth-login"),
-    path("user/me", MeView.as_view(), name="user-me"),
-    path("reports", ComplaintListCreateView.as_view(), name="reports"),
+    path("user/me", read_view(MeView), name="user-me"),
+    path("reports", read_view(ComplaintListCreateView), name="reports"),
     path("reports/mine", MyReportsView.as_view(), name="my-reports"),
-    path("reports/<int:pk>", ComplaintDetailView.as_view(), name="report-detail"),
-    path("reports/<uuid:tracking_id>/track", ReportTrackView.as_view(), name="report-track"),
-    path("departments", DepartmentListView.as_view(), name="departments"),
+    path("reports/bulk", BulkIngestView.as_view(), name="report-bulk"),
+    path("reports/bulk-status", BulkStatusView.as_view(), name="report-bulk-status"),
+    path("reports/search", ReportSearchView.as_view(), name="report-search"),
+    path("reports/geo/bbox", ReportBBoxView.as_view(), name="report-geo-bbox"),
+    path("reports/geo/nearby", NearbyReportsView.as_view(), name="report-geo-nearby"),
+    path("reports/geo/clusters", ReportClusterView.as_view(), name="report-geo-clusters"),
+    path("reports/export", ReportExportView.as_view(), name="report-export"),
+    path("reports/<int:pk>", read_view(ComplaintDetailView), name="report-detail"),
+    path("reports/<int:pk>/timeline", ComplaintTimelineView.as_view(), name="report-timeline"),
+    path("reports/<uuid:tracking_id>/track", read_view(ReportTrackView), name="report-track"),
+    path("reports/stream", report_stream, name="report-stream"),
+    path("reports/stream/ticket", PushTicketView.as_view(), name="report-stream-ticket"),
+    path("stats", StatsView.as_view(), name="stats"),
+    path("departments", read_view(DepartmentListView), name="departments"),
 ]
\ No newline at end of file
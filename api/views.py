@@ -1,24 +1,63 @@
-from django.contrib.auth import get_user_model, authenticate
-from django.db import transaction
-from django.core.files.base import ContentFile
+import heapq
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-import io
-import os
-import subprocess
-from PIL import Image
-import shutil
+from django.contrib.auth import get_user_model, authenticate
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import Substr
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from rest_framework import status, permissions
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from complaints.models import Complaint, ComplaintImage, Department, AuthorityProfile
-from .serializers import ComplaintSerializer, UserSerializer, DepartmentSerializer
+from complaints.models import Complaint, ComplaintEvent, ComplaintImage, ComplaintStat, VideoJob
+from .serializers import (
+    COMPLAINT_DEFERRED, COMPLAINT_SELECT_RELATED, ComplaintListSerializer, ComplaintSerializer, UserSerializer,
+)
 from .services import notify_report_created, notify_report_in_review, notify_report_resolved
+from .conditional import (
+    add_validators, complaint_meta, complaint_validators, is_conditional, list_validators, not_modified, validators_for,
+)
+from .departments import department_registry
+from .events import change_events, created_events, deleted_event, event_representation, record_events
+from .duplicates import flag_duplicates, link_similar_texts, similar_reports, to_signed
+from .export import FORMATS as EXPORT_FORMATS, export_lines
+from .ingest import ingest_max_rows, ingest_rows
+from .media import compress_images
+from .parsers import CSVParser, NDJSONParser
+from .renderers import NDJSONRenderer
+from .roles import ADMIN, AUTHORITY, acting_role, can_view_complaint, resolve_role, visible_complaints
+from .stats import record_stat_change, stat_bucket
+from .streaming import ndjson_lines
+from .filters import InvalidFilter, filter_complaints
+from .geo import (
+    InvalidGeoParam, bbox_around, cells_filter, covering_cells, decode_bbox, haversine_m, parse_bbox, parse_point,
+    parse_radius, zoom_precision,
+)
+from .push import channels_for, event_stream, issue_ticket, redeem_ticket
+from .pagination import (
+    InvalidPageParam, count_for_mode, paginate_by_cursor, paginate_by_rank, parse_count_mode, parse_page, parse_page_size,
+)
+from .search import search_complaints
+from .tasks import enqueue_video_job
+from .transitions import bulk_status_max_ids, bulk_transition
 
 User = get_user_model()
 
+# Marker payload for map endpoints; far smaller than the full report
+MAP_POINT_FIELDS = ("id", "tracking_id", "title", "status", "complaint_type", "latitude", "longitude")
+# Any of these opts /api/reports/mine into cursor pages
+MY_REPORTS_PAGE_PARAMS = ("cursor", "page_size", "count")
+
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -73,35 +112,60 @@ class ComplaintListCreateView(APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
+        # The list validator is a per-scope version counter, so a poll that finds
+        # nothing new never reaches the database.
+        etag, last_modified = list_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = self._list(request)
+        if response.status_code == 200:
+            add_validators(response, etag, last_modified)
+        return response
+
+    def _list(self, request):
+        params = request.query_params
+        # Cursor mode is opt-in; page/page_size stays the default for existing clients.
+        cursor_mode = "cursor" in params or params.get("pagination") == "cursor"
+        try:
+            page = parse_page(params.get("page"))
+            page_size = parse_page_size(params.get("page_size"))
+            count_mode = parse_count_mode(params.get("count"), "none" if cursor_mode else "exact")
+        except InvalidPageParam as e:
+            return Response({"error": str(e)}, status=400)
 
         # Role-based visibility
-        user = request.user
-        if user.is_superuser:
-            qs = Complaint.objects.filter(is_active=True)
-        elif user.is_staff:
-            # Authority: limit to their department
-            try:
-                dept = user.authority_profile.department
-                qs = Complaint.objects.filter(is_active=True, assigned_department=dept)
-            except AuthorityProfile.DoesNotExist:
-                qs = Complaint.objects.none()
-        else:
-            # Citizen: only own
-            qs = Complaint.objects.filter(is_active=True, user=user)
+        try:
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except InvalidFilter as e:
+            return Response({"error": str(e)}, status=400)
 
-        qs = qs.select_related("user", "assigned_department").prefetch_related("images").order_by('-created_at')
-        total = qs.count()
+        qs = qs.select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related("images")
+        if cursor_mode:
+            try:
+                rows, next_cursor, prev_cursor = paginate_by_cursor(qs, params.get("cursor"), page_size)
+            except InvalidPageParam as e:
+                return Response({"error": str(e)}, status=400)
+            serializer = ComplaintListSerializer(rows, many=True, context={"request": request})
+            return Response({
+                "results": serializer.data,
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "count": count_for_mode(qs, count_mode),
+            })
+
+        qs = qs.order_by('-created_at', '-id')
+        total = count_for_mode(qs, count_mode)
         start = (page - 1) * page_size
         end = start + page_size
-        serializer = ComplaintSerializer(qs[start:end], many=True, context={"request": request})
+        serializer = ComplaintListSerializer(qs[start:end], many=True, context={"request": request})
         return Response({
             "results": serializer.data,
             "page": page,
             "page_size": page_size,
             "count": total,
-            "total_pages": (total + page_size - 1) // page_size,
+            "total_pages": (total + page_size - 1) // page_size if total is not None else None,
         })
 
     @transaction.atomic
@@ -114,113 +178,298 @@ class ComplaintListCreateView(APIView):
 
         if not title or not description or not dept_id:
             return Response({"error": "Title, description and assigned_department_id are required"}, status=400)
-        try:
-            department = Department.objects.get(pk=dept_id)
-        except Department.DoesNotExist:
+        department = department_registry.get(dept_id)
+        if department is None:
             return Response({"error": "Invalid department"}, status=400)
+        try:
+            latitude, longitude = parse_point(request.data.get("latitude"), request.data.get("longitude"))
+        except InvalidGeoParam as e:
+            return Response({"error": str(e)}, status=400)
 
+        # The raw upload is stored as-is; transcoding happens on the worker after commit.
+        video = request.FILES.get("video")
         complaint = Complaint.objects.create(
             user=request.user,
             title=title,
             description=description,
             location=location,
+            latitude=latitude,
+            longitude=longitude,
             complaint_type=complaint_type,
             assigned_department=department,
+            video=video,
         )
-        # Handle video compression if provided
-        video = request.FILES.get("video")
         if video:
-            try:
-                compressed_video = self._compress_video(video)
-                if compressed_video:
-                    complaint.video.save(compressed_video.name, compressed_video, save=True)
-            except Exception as e:
-                # Log but do not fail the request
-                print(f"Video compression failed: {e}")
-                complaint.video = video
-                complaint.save()
-        # Handle images compression
+            job = VideoJob.objects.create(complaint=complaint)
+            transaction.on_commit(lambda: enqueue_video_job(job.pk))
+        # Compress all images of the upload in parallel, then insert them in one go
         images = request.FILES.getlist("images")
-        for img in images:
-            try:
-                optimized_image = self._compress_image(img)
-                ComplaintImage.objects.create(complaint=complaint, image=optimized_image)
-            except Exception as e:
-                print(f"Image compression failed: {e}")
-                ComplaintImage.objects.create(complaint=complaint, image=img)
+        duplicates = {}
+        if images:
+            saved = ComplaintImage.objects.bulk_create([
+                ComplaintImage(
+                    complaint=complaint, image=r.image, thumbnail=r.thumbnail,
+                    phash=to_signed(r.phash) if r.phash is not None else None,
+                )
+                for r in compress_images(images)
+            ])
+            # Near-identical photos of an earlier report mark this one as its probable duplicate
+            duplicates = flag_duplicates(complaint, saved)
+        # Near-identical wording of an open report in the same department links the two
+        similar = link_similar_texts(complaint)
+        record_events(created_events([complaint], request.user))
+        # Counters last, so the bucket row is locked for as short a time as possible
+        record_stat_change(None, stat_bucket(complaint))
         serializer = ComplaintSerializer(complaint, context={"request": request})
         email_notice = None
+        notification = None
         try:
-            _, info = notify_report_created(complaint)
-            email_notice = info if info and info != "Sent" else None
+            queued, info = notify_report_created(complaint)
+            notification = "queued" if queued else None
+            email_notice = info if info and not queued else None
         except Exception as e:
             print(f"notify_report_created failed: {e}")
-        return Response({"success": True, "report": serializer.data, "email_notice": email_notice}, status=201)
-
-    def _compress_image(self, uploaded):
-        """Compress/resize image to max width keeping aspect ratio; return ContentFile."""
-        MAX_WIDTH = int(getattr(settings, "IMAGE_MAX_WIDTH", 1280))
-        QUALITY = int(getattr(settings, "IMAGE_JPEG_QUALITY", 70))
-        img = Image.open(uploaded)
-        img_format = (img.format or "JPEG").upper()
-        if img.width > MAX_WIDTH:
-            ratio = MAX_WIDTH / float(img.width)
-            new_size = (MAX_WIDTH, int(img.height * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
-        buffer = io.BytesIO()
-        save_kwargs = {"optimize": True}
-        if img_format in ("JPEG", "JPG"):
-            save_kwargs["quality"] = QUALITY
-            img_format = "JPEG"
-        else:
-            img_format = "PNG"  # fallback
-        img.save(buffer, format=img_format, **save_kwargs)
-        buffer.seek(0)
-        base_name = os.path.splitext(uploaded.name)[0]
-        new_name = f"{base_name}_compressed.{ 'jpg' if img_format=='JPEG' else 'png'}"
-        return ContentFile(buffer.read(), name=new_name)
-
-    def _compress_video(self, uploaded):
-        """Compress video using ffmpeg if available; returns ContentFile or None."""
-        if shutil.which("ffmpeg") is None:
-            return None
-        import tempfile, shutil
-        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(uploaded.name)[1], delete=False) as in_tmp:
-            for chunk in uploaded.chunks():
-                in_tmp.write(chunk)
-            in_path = in_tmp.name
-        out_path = in_path + "_out.mp4"
-        cmd = [
-            "ffmpeg", "-y", "-i", in_path,
-            "-vf", "scale=-2:720",
-            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
-            "-c:a", "aac", "-b:a", "128k",
-            out_path,
-        ]
+        # Only reports the caller may open are listed; the flag alone says the rest.
+        visible = visible_complaints(request.user).filter(pk__in=duplicates).values_list("pk", flat=True) if duplicates else []
+        visible_similar = visible_complaints(request.user).filter(pk__in=similar).values_list("pk", flat=True) if similar else []
+        return Response({
+            "success": True,
+            "report": serializer.data,
+            "email_notice": email_notice,
+            "notification": notification,
+            "possible_duplicate": bool(duplicates),
+            "duplicates": [{"id": pk, "distance": duplicates[pk]} for pk in sorted(visible)],
+            "similar_reports": [{"id": pk, "similarity": round(similar[pk], 3)} for pk in sorted(visible_similar)],
+        }, status=201)
+
+
+class BulkIngestView(APIView):
+    """Many reports in one request, as NDJSON, CSV or a JSON array; answers with one result per row."""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [NDJSONParser, CSVParser, JSONParser]
+
+    def post(self, request):
+        role = acting_role(request.user)
+        if role.role not in (ADMIN, AUTHORITY):
+            return Response({'error': 'Forbidden'}, status=403)
+        rows = request.data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response({"error": "Expected a list of report objects"}, status=400)
+        if not rows:
+            return Response({"error": "No rows"}, status=400)
+        if len(rows) > ingest_max_rows():
+            return Response({"error": f"At most {ingest_max_rows()} rows per request"}, status=413)
+        # Admins may file on behalf of citizens; an authority only into its own department.
+        results = ingest_rows(
+            rows, request.user,
+            on_behalf=role.role == ADMIN,
+            department_id=role.department_id if role.role == AUTHORITY else None,
+        )
+        created = sum(1 for r in results if "id" in r)
+        return Response({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }, status=201 if created else 400)
+
+
+class BulkStatusView(APIView):
+    """Move many reports (by `ids` and/or `tracking_ids`) to one `status`."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if acting_role(request.user).role not in (ADMIN, AUTHORITY):
+            return Response({'error': 'Forbidden'}, status=403)
+        target = request.data.get("status")
+        if target not in Complaint.Status.values:
+            return Response({"error": "Invalid status"}, status=400)
+        ids = request.data.get("ids") or []
+        tracking_ids = request.data.get("tracking_ids") or []
+        if not isinstance(ids, list) or not isinstance(tracking_ids, list):
+            return Response({"error": "ids and tracking_ids must be lists"}, status=400)
+        person_in_charge = request.data.get("person_in_charge")
+        max_length = Complaint._meta.get_field("person_in_charge").max_length
+        if person_in_charge is not None and (not isinstance(person_in_charge, str) or len(person_in_charge) > max_length):
+            return Response({"error": f"person_in_charge must be a string of at most {max_length} characters"}, status=400)
+        if not ids and not tracking_ids:
+            return Response({"error": "ids or tracking_ids are required"}, status=400)
+        if len(ids) + len(tracking_ids) > bulk_status_max_ids():
+            return Response({"error": f"At most {bulk_status_max_ids()} reports per request"}, status=413)
+        result = bulk_transition(
+            request.user, target, ids, tracking_ids, person_in_charge=person_in_charge,
+        )
+        return Response({"status": target, **result})
+
+
+class ReportSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        query = (params.get("q") or "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
         try:
-            subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-            with open(out_path, "rb") as f:
-                data = f.read()
-            content = ContentFile(data, name=os.path.splitext(uploaded.name)[0] + "_compressed.mp4")
-            return content
-        finally:
-            try:
-                os.remove(in_path)
-            except Exception:
-                pass
-            try:
-                os.remove(out_path)
-            except Exception:
-                pass
+            page_size = parse_page_size(params.get("page_size"))
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except (InvalidPageParam, InvalidFilter) as e:
+            return Response({"error": str(e)}, status=400)
+
+        # Matched through the GIN-indexed search_vector, best rank first
+        qs = search_complaints(qs, query).select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related("images")
+        try:
+            rows, next_cursor = paginate_by_rank(qs, params.get("cursor"), page_size)
+        except InvalidPageParam as e:
+            return Response({"error": str(e)}, status=400)
+        serializer = ComplaintListSerializer(rows, many=True, context={"request": request})
+        return Response({
+            "results": serializer.data,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        })
+
+
+def _map_limit():
+    return int(getattr(settings, "GEO_MAX_POINTS", 500))
+
+
+def _in_bbox(qs, bbox):
+    """Cell prefix match (index) first, then the exact coordinate range on what is left."""
+    min_lat, min_lng, max_lat, max_lng = bbox
+    return qs.filter(
+        cells_filter(covering_cells(bbox)),
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+
+
+class ReportBBoxView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            bbox = parse_bbox(params.get("bbox"))
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except (InvalidGeoParam, InvalidFilter) as e:
+            return Response({"error": str(e)}, status=400)
+        limit = _map_limit()
+        rows = list(_in_bbox(qs, bbox).order_by("-created_at", "-id").values(*MAP_POINT_FIELDS)[:limit + 1])
+        return Response({"results": rows[:limit], "truncated": len(rows) > limit})
+
+
+class NearbyReportsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            lat, lng = parse_point(params.get("lat"), params.get("lng"))
+            if lat is None:
+                raise InvalidGeoParam("lat and lng are required")
+            radius = parse_radius(params.get("radius", 500))
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except (InvalidGeoParam, InvalidFilter) as e:
+            return Response({"error": str(e)}, status=400)
+
+        # The bounding box of the circle narrows by index; the exact distance
+        # check and ordering only ever see those candidates.
+        candidates = _in_bbox(qs, bbox_around(lat, lng, radius)).values(*MAP_POINT_FIELDS).iterator()
+        within = (
+            (distance, row["id"], row)
+            for row in candidates
+            for distance in [haversine_m(lat, lng, row["latitude"], row["longitude"])]
+            if distance <= radius
+        )
+        nearest = heapq.nsmallest(_map_limit(), within, key=lambda item: (item[0], item[1]))
+        return Response({
+            "results": [{**row, "distance_m": round(distance, 1)} for distance, _, row in nearest],
+        })
+
+
+class ReportClusterView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            bbox = parse_bbox(params.get("bbox"))
+            precision = zoom_precision(params.get("zoom"))
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except (InvalidGeoParam, InvalidFilter) as e:
+            return Response({"error": str(e)}, status=400)
+
+        # One row per geohash cell at the zoom's precision, aggregated in the database
+        cells = (
+            _in_bbox(qs, bbox)
+            .annotate(cell=Substr("geohash", 1, precision))
+            .values("cell")
+            .annotate(count=Count("id"), latitude=Avg("latitude"), longitude=Avg("longitude"))
+            .order_by("cell")
+        )
+        clusters = []
+        for cell in cells:
+            min_lat, min_lng, max_lat, max_lng = decode_bbox(cell["cell"])
+            clusters.append({
+                "cell": cell["cell"],
+                "count": cell["count"],
+                "latitude": cell["latitude"],
+                "longitude": cell["longitude"],
+                "bbox": [min_lng, min_lat, max_lng, max_lat],
+            })
+        return Response({"precision": precision, "results": clusters})
 
 
 class MyReportsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
     def get(self, request):
-        qs = Complaint.objects.filter(user=request.user, is_active=True).select_related("user", "assigned_department").prefetch_related("images").order_by('-created_at')
-        serializer = ComplaintSerializer(qs, many=True, context={"request": request})
-        return Response(serializer.data)
+        qs = Complaint.objects.filter(user=request.user, is_active=True).select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related("images")
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            # Whole history, one report per line, read and serialized chunk by chunk
+            lines = ndjson_lines(qs.order_by('-created_at', '-id'), ComplaintListSerializer, {"request": request})
+            return StreamingHttpResponse(lines, content_type=NDJSONRenderer.media_type)
+
+        params = request.query_params
+        if not any(name in params for name in MY_REPORTS_PAGE_PARAMS):
+            # Existing clients expect the whole history as a bare list; paging is opt-in
+            rows = qs.order_by('-created_at', '-id')
+            return Response(ComplaintListSerializer(rows, many=True, context={"request": request}).data)
+        try:
+            page_size = parse_page_size(params.get("page_size"))
+            count_mode = parse_count_mode(params.get("count"), "none")
+            rows, next_cursor, prev_cursor = paginate_by_cursor(qs, params.get("cursor"), page_size)
+        except InvalidPageParam as e:
+            return Response({"error": str(e)}, status=400)
+        serializer = ComplaintListSerializer(rows, many=True, context={"request": request})
+        return Response({
+            "results": serializer.data,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "count": count_for_mode(qs, count_mode),
+        })
+
+
+class ReportExportView(APIView):
+    """Every report the caller can see, as CSV (default) or `?output=ndjson`, streamed."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        # Not `format`: DRF reserves that for renderer negotiation.
+        output = params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response({"error": "output must be csv or ndjson"}, status=400)
+        try:
+            qs = filter_complaints(visible_complaints(request.user), params)
+        except InvalidFilter as e:
+            return Response({"error": str(e)}, status=400)
+        response = StreamingHttpResponse(export_lines(qs, output), content_type=EXPORT_FORMATS[output])
+        response["Content-Disposition"] = f'attachment; filename="reports.{output}"'
+        patch_cache_control(response, private=True, no_store=True)
+        return response
 
 
 class ComplaintDetailView(APIView):
@@ -228,44 +477,45 @@ class ComplaintDetailView(APIView):
 
     def get_object(self, pk, user):
         try:
-            obj = Complaint.objects.select_related('user').prefetch_related('images').get(pk=pk, is_active=True)
+            obj = Complaint.objects.select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related('images').get(pk=pk, is_active=True)
         except Complaint.DoesNotExist:
             return None
-        # Citizen: only own
-        if obj.user == user:
+        # Citizen: only own; admin: all; authority: only same department
+        if can_view_complaint(user, obj.user_id, obj.assigned_department_id):
             return obj
-        # Admin: all
-        if user.is_superuser:
-            return obj
-        # Authority: only same department
-        if user.is_staff:
-            try:
-                dept = user.authority_profile.department
-                if obj.assigned_department_id == dept.id:
-                    return obj
-            except AuthorityProfile.DoesNotExist:
-                pass
         return None
 
     def get(self, request, pk):
+        if is_conditional(request):
+            meta = complaint_meta(pk=pk)
+            # Visibility first, so a 304 can never confirm someone else's report.
+            if meta is None or not can_view_complaint(request.user, meta["user_id"], meta["assigned_department_id"]):
+                return Response({'error': 'Not found'}, status=404)
+            response = not_modified(request, *complaint_validators(meta["id"], meta["updated_at"], meta["job_updated_at"]))
+            if response is not None:
+                return response
         obj = self.get_object(pk, request.user)
         if not obj:
             return Response({'error': 'Not found'}, status=404)
         serializer = ComplaintSerializer(obj, context={'request': request})
-        return Response(serializer.data)
+        data = serializer.data
+        data['similar_reports'] = similar_reports(obj, visible_complaints(request.user))
+        return add_validators(Response(data), *validators_for(obj))
 
+    @transaction.atomic
     def patch(self, request, pk):
         obj = self.get_object(pk, request.user)
         if not obj:
             return Response({'error': 'Not found'}, status=404)
         previous_status = obj.status
+        previous_bucket = stat_bucket(obj)
         status_val = request.data.get('status')
         allowed = {c[0] for c in Complaint.Status.choices}
         if status_val and status_val in allowed:
             obj.status = status_val
         person_in_charge = request.data.get('person_in_charge')
         signature = request.data.get('signature')
-        updates = ['status']
+        updates = ['status', 'updated_at']  # updated_at drives the ETag
         if person_in_charge:
             obj.person_in_charge = person_in_charge
             updates.append('person_in_charge')
@@ -273,61 +523,190 @@ class ComplaintDetailView(APIView):
             obj.resolution_signature = signature
             updates.append('resolution_signature')
         obj.save(update_fields=list(set(updates)))
+        record_events(change_events(obj, request.user, previous_status, set(updates) - {'status', 'updated_at'}))
+        record_stat_change(previous_bucket, stat_bucket(obj))
 
         email_notice = None
+        notification = None
         try:
             if previous_status == Complaint.Status.OPEN and obj.status == Complaint.Status.IN_PROGRESS:
-                sent, info = notify_report_in_review(obj, obj.person_in_charge or '')
-                email_notice = info if info and info != "Sent" else None
+                queued, info = notify_report_in_review(obj, obj.person_in_charge or '')
+                notification = "queued" if queued else None
+                email_notice = info if info and not queued else None
             if previous_status == Complaint.Status.IN_PROGRESS and obj.status == Complaint.Status.RESOLVED:
-                sent, info = notify_report_resolved(obj, obj.person_in_charge or '')
-                email_notice = info if info and info != "Sent" else email_notice
+                queued, info = notify_report_resolved(obj, obj.person_in_charge or '')
+                notification = "queued" if queued else notification
+                email_notice = info if info and not queued else email_notice
         except Exception as e:
             print(f"notify_status_change failed: {e}")
         serializer = ComplaintSerializer(obj, context={'request': request})
         data = serializer.data
         if email_notice:
             data['email_notice'] = email_notice
+        if notification:
+            data['notification'] = notification
         return Response(data)
 
+    @transaction.atomic
     def delete(self, request, pk):
         obj = self.get_object(pk, request.user)
         if not obj:
             return Response({'error': 'Not found'}, status=404)
+        previous_bucket = stat_bucket(obj)
         obj.is_active = False
-        obj.save(update_fields=['is_active'])
+        obj.save(update_fields=['is_active', 'updated_at'])
+        record_events([deleted_event(obj, request.user)])
+        record_stat_change(previous_bucket, None)
         return Response({'success': True}, status=204)
 
 
+class ComplaintTimelineView(APIView):
+    """History of one report, newest first, a keyset page at a time; reads only the event table."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        meta = Complaint.objects.filter(pk=pk, is_active=True).values("user_id", "assigned_department_id").first()
+        if meta is None or not can_view_complaint(request.user, meta["user_id"], meta["assigned_department_id"]):
+            return Response({'error': 'Not found'}, status=404)
+        params = request.query_params
+        try:
+            page_size = parse_page_size(params.get("page_size"))
+            events = ComplaintEvent.objects.filter(complaint_id=pk).select_related("actor")
+            rows, next_cursor, prev_cursor = paginate_by_cursor(events, params.get("cursor"), page_size)
+        except InvalidPageParam as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({
+            "results": [event_representation(event) for event in rows],
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        })
+
+
 class ReportTrackView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, tracking_id):
+        if is_conditional(request):
+            meta = complaint_meta(tracking_id=tracking_id)
+            if meta is None:
+                return Response({'error': 'Not found'}, status=404)
+            if not can_view_complaint(request.user, meta["user_id"], meta["assigned_department_id"]):
+                return Response({'error': 'Forbidden'}, status=403)
+            response = not_modified(request, *complaint_validators(meta["id"], meta["updated_at"], meta["job_updated_at"]))
+            if response is not None:
+                return response
         try:
-            obj = Complaint.objects.select_related('user', 'assigned_department').get(tracking_id=tracking_id, is_active=True)
+            obj = Complaint.objects.select_related(*COMPLAINT_SELECT_RELATED).defer(*COMPLAINT_DEFERRED).prefetch_related('images').get(tracking_id=tracking_id, is_active=True)
         except Complaint.DoesNotExist:
             return Response({'error': 'Not found'}, status=404)
 
         # Authorize same as detail view
-        user = request.user
-        if obj.user == user or user.is_superuser:
-            serializer = ComplaintSerializer(obj, context={'request': request})
-            return Response(serializer.data)
-        if user.is_staff:
+        if not can_view_complaint(request.user, obj.user_id, obj.assigned_department_id):
+            return Response({'error': 'Forbidden'}, status=403)
+        serializer = ComplaintSerializer(obj, context={'request': request})
+        data = serializer.data
+        data['similar_reports'] = similar_reports(obj, visible_complaints(request.user))
+        return add_validators(Response(data), *validators_for(obj))
+
+
+class PushTicketView(APIView):
+    """Single-use ticket for opening `/api/reports/stream` from clients that cannot set headers (EventSource)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            "ticket": issue_ticket(request.user),
+            "expires_in": int(getattr(settings, "PUSH_TICKET_TTL", 30)),
+        }, status=201)
+
+
+def _stream_subscriber(request):
+    """(user, channels) for a stream request, authenticated by ticket or bearer token; (None, None) otherwise.
+
+    Closes this thread's database connection before returning, even with
+    persistent connections: the stream never queries again, and
+    request_finished only fires when the client disconnects.
+    """
+    try:
+        user_id = redeem_ticket(request.GET.get("ticket"))
+        if user_id is not None:
+            user = User.objects.filter(pk=user_id, is_active=True).first()
+        else:
             try:
-                dept = user.authority_profile.department
-                if obj.assigned_department_id == dept.id:
-                    serializer = ComplaintSerializer(obj, context={'request': request})
-                    return Response(serializer.data)
-            except AuthorityProfile.DoesNotExist:
-                pass
-        return Response({'error': 'Forbidden'}, status=403)
+                authenticated = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                authenticated = None
+            user = authenticated[0] if authenticated else None
+        if user is None:
+            return None, None
+        role = acting_role(user)
+        return user, channels_for(role.role, user.pk, role.department_id)
+    finally:
+        connection.close()
+
+
+async def report_stream(request):
+    """Server-Sent Events of report changes the caller can see, for as long as the client stays connected.
+
+    Authenticated once, when the stream opens. Needs the ASGI server: under
+    WSGI every open stream would hold a whole worker.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "Streaming needs the ASGI server"}, status=501)
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    user, channels = await sync_to_async(_stream_subscriber)(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid"}, status=401)
+    response = StreamingHttpResponse(event_stream(channels), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx must pass events through as they come
+    return response
+
+
+class StatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # Reads only the maintained counters; never aggregates complaints.
+        role = acting_role(request.user)
+        rows = ComplaintStat.objects.filter(count__gt=0)
+        if role.role == AUTHORITY:
+            rows = rows.filter(department_id=role.department_id)
+        elif role.role != ADMIN:
+            return Response({'error': 'Forbidden'}, status=403)
+
+        names = {d.pk: d.name for d in department_registry.all()}
+        results, by_status, by_type = [], {}, {}
+        for stat in rows.order_by('department_id', 'status', 'complaint_type'):
+            results.append({
+                "department": {"id": stat.department_id, "name": names.get(stat.department_id)} if stat.department_id else None,
+                "status": stat.status,
+                "complaint_type": stat.complaint_type,
+                "count": stat.count,
+            })
+            by_status[stat.status] = by_status.get(stat.status, 0) + stat.count
+            by_type[stat.complaint_type] = by_type.get(stat.complaint_type, 0) + stat.count
+        return Response({
+            "results": results,
+            "by_status": by_status,
+            "by_type": by_type,
+            "total": sum(by_status.values()),
+        })
 
 
 class DepartmentListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        qs = Department.objects.all().order_by('name')
-        data = DepartmentSerializer(qs, many=True).data
-        return Response(data)
\ No newline at end of file
+        # Pre-rendered by the registry; the body only changes when a department does.
+        body, etag = department_registry.rendered_list()
+        client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in client_etags or "*" in client_etags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
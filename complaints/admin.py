@@ -1,9 +1,20 @@
 from django.contrib import admin
-from django.utils.html import format_html
-from .models import Complaint, ComplaintImage, ResolutionProofImage
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from api.media import attach_thumbnail
+from api.pagination import EstimatedCountPaginator
+from .models import Complaint, ComplaintImage, ComplaintStat, ResolutionProofImage, VideoJob, NotificationOutbox
 
 # Register your models here.
 
+def thumb_url(img):
+    # Rows uploaded before thumbnails existed fall back to the full image
+    # until `manage.py generate_thumbnails` has run.
+    return img.thumbnail.url if img.thumbnail else img.image.url
+
+
 class ComplaintImageInline(admin.TabularInline):
     model = ComplaintImage
     extra = 0
@@ -13,8 +24,8 @@ class ComplaintImageInline(admin.TabularInline):
     def image_preview(self, obj):
         if obj.image:
             return format_html(
-                '<img src="{}" width="150" height="auto" style="max-height: 200px;" />',
-                obj.image.url
+                '<a href="{}" target="_blank"><img src="{}" width="150" height="auto" style="max-height: 200px;" /></a>',
+                obj.image.url, thumb_url(obj)
             )
         return "No image"
     image_preview.short_description = 'Preview'
@@ -31,15 +42,20 @@ class ResolutionProofInline(admin.TabularInline):
     def image_preview(self, obj):
         if obj.image:
             return format_html(
-                '<a href="{0}" target="_blank"><img src="{0}" width="150" style="max-height:200px;" /></a>',
-                obj.image.url
+                '<a href="{}" target="_blank"><img src="{}" width="150" style="max-height:200px;" /></a>',
+                obj.image.url, thumb_url(obj)
             )
         return "No image"
     image_preview.short_description = 'Preview'
 
 
 class ComplaintAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'complaint_type', 'status', 'is_active', 'created_at', 'updated_at')
+    list_display = ('title', 'preview', 'user', 'complaint_type', 'status', 'is_active', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    # No COUNT(*) over the whole table on every changelist load
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    date_hierarchy = 'created_at'
     list_filter = ('complaint_type', 'status', 'is_active', 'created_at')
     search_fields = ('title', 'description', 'location', 'user__username', 'user__email')
     readonly_fields = ('created_at', 'updated_at', 'image_gallery', 'resolution_proof_gallery')
@@ -56,28 +72,99 @@ class ComplaintAdmin(admin.ModelAdmin):
         }),
     )
     inlines = [ComplaintImageInline, ResolutionProofInline]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text match on the indexed search_vector instead of icontains
+        # scans; username/email stay exact matches on the (small) user table.
+        from api.search import search_expressions
+
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        condition, _ = search_expressions(search_term, queryset.db)
+        user_ids = list(
+            get_user_model().objects.filter(
+                Q(username__iexact=search_term) | Q(email__iexact=search_term)
+            ).values_list('pk', flat=True)[:50]
+        )
+        if user_ids:
+            condition = Q(condition) | Q(user_id__in=user_ids)
+        return queryset.filter(condition), False
     
+    def get_queryset(self, request):
+        # One query per relation for the whole page (changelist) or object (change form)
+        return super().get_queryset(request).prefetch_related('images', 'resolution_proofs').defer('timeline')
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        changed = [obj for obj, fields in formset.changed_objects if 'image' in fields]
+        for obj in formset.new_objects + changed:
+            if hasattr(obj, 'thumbnail') and obj.image:
+                attach_thumbnail(obj)
+
+    def _gallery(self, images):
+        return format_html(
+            '<div style="display: flex; flex-wrap: wrap; gap: 10px;">{}</div>',
+            format_html_join(
+                '', '<a href="{}" target="_blank"><img src="{}" width="120" style="max-height:150px; border-radius:5px;" /></a>',
+                ((img.image.url, thumb_url(img)) for img in images)
+            )
+        )
+
+    def preview(self, obj):
+        images = obj.images.all()
+        if not images:
+            return "-"
+        return format_html('<img src="{}" width="60" style="max-height:60px;" />', thumb_url(images[0]))
+    preview.short_description = 'Preview'
+
     def image_gallery(self, obj):
-        if obj.images.exists():
-            html = '<div style="display: flex; flex-wrap: wrap; gap: 10px;">'
-            for img in obj.images.all():
-                html += f'<img src="{img.image.url}" width="120" height="auto" style="max-height: 150px; border-radius: 5px;" />'
-            html += '</div>'
-            return format_html(html)
+        images = obj.images.all()
+        if images:
+            return self._gallery(images)
         return "No images uploaded"
     image_gallery.short_description = 'Image Gallery'
 
     def resolution_proof_gallery(self, obj):
-        if obj.resolution_proofs.exists():
-            html = '<div style="display: flex; flex-wrap: wrap; gap: 10px;">'
-            for img in obj.resolution_proofs.all():
-                html += f'<a href="{img.image.url}" target="_blank"><img src="{img.image.url}" width="120" style="max-height:150px; border-radius:5px;" /></a>'
-            html += '</div>'
-            return format_html(html)
+        proofs = obj.resolution_proofs.all()
+        if proofs:
+            return self._gallery(proofs)
         return "No resolution proof images"
     resolution_proof_gallery.short_description = 'Resolution Proofs'
 
 
+class VideoJobAdmin(admin.ModelAdmin):
+    list_display = ('complaint', 'status', 'progress', 'attempts', 'updated_at')
+    list_filter = ('status',)
+    list_select_related = ('complaint',)
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+
+
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('recipient', 'dedup_key')
+    readonly_fields = ('created_at', 'updated_at', 'sent_at', 'last_error')
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=NotificationOutbox.Status.SENT).update(
+            status=NotificationOutbox.Status.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} notification(s) re-queued")
+    requeue.short_description = 'Re-queue selected notifications'
+
+
+class ComplaintStatAdmin(admin.ModelAdmin):
+    list_display = ('department', 'status', 'complaint_type', 'count', 'updated_at')
+    list_filter = ('department', 'status', 'complaint_type')
+    list_select_related = ('department',)
+    readonly_fields = ('updated_at',)
+
+
 admin.site.register(Complaint, ComplaintAdmin)
 admin.site.register(ComplaintImage)
-admin.site.register(ResolutionProofImage)
\ No newline at end of file
+admin.site.register(ResolutionProofImage)
+admin.site.register(VideoJob, VideoJobAdmin)
+admin.site.register(NotificationOutbox, NotificationOutboxAdmin)
+admin.site.register(ComplaintStat, ComplaintStatAdmin)
\ No newline at end of file
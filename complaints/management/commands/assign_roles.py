@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from complaints.models import Department, AuthorityProfile
+from api.roles import invalidate_roles
 
 User = get_user_model()
 
@@ -26,6 +27,7 @@ class Command(BaseCommand):
         }
 
         self.stdout.write(self.style.SUCCESS('\n=== Starting Role Assignment ===\n'))
+        touched_user_ids = []
 
         # Process ADMIN users
         for email in role_mapping['ADMIN']:
@@ -37,6 +39,7 @@ class Command(BaseCommand):
             user.is_staff = True
             user.is_superuser = True
             user.save()
+            touched_user_ids.append(user.pk)
             self.stdout.write(self.style.SUCCESS(f'✔ Assigned ADMIN to {email}'))
 
         # Process CITIZEN users
@@ -55,6 +58,7 @@ class Command(BaseCommand):
             if hasattr(user, 'authority_profile'):
                 user.authority_profile.delete()
             
+            touched_user_ids.append(user.pk)
             self.stdout.write(self.style.SUCCESS(f'✔ Assigned CITIZEN to {email}'))
 
         # Process AUTHORITY users
@@ -83,6 +87,9 @@ class Command(BaseCommand):
                 authority_profile.department = department
                 authority_profile.save()
             
+            touched_user_ids.append(user.pk)
             self.stdout.write(self.style.SUCCESS(f'✔ Assigned AUTHORITY ({dept_name}) to {email}'))
 
+        # Drop cached role/department entries so running workers pick up the change
+        invalidate_roles(touched_user_ids)
         self.stdout.write(self.style.SUCCESS('\n=== Role Assignment Complete ===\n'))
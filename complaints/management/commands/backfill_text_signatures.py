@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.duplicates import index_text_signatures
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = 'Compute MinHash signatures and LSH bands for reports filed before text matching existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows loaded per query')
+
+    def handle(self, *args, **options):
+        done = skipped = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Complaint.objects.filter(pk__gt=last_id, text_signature__isnull=True)
+                .only('id', 'title', 'description', 'location', 'assigned_department_id')
+                .order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            indexed = index_text_signatures(batch)
+            done += len(indexed)
+            skipped += len(batch) - len(indexed)
+            last_id = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'✔ {done} reports indexed, {skipped} without text'))
@@ -0,0 +1,305 @@
+import io
+import json
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.bench_utils import percentile
+from api.events import created_events, record_events
+from api.geo import encode
+from complaints.models import AuthorityProfile, Complaint, ComplaintImage, Department
+
+User = get_user_model()
+
+DEFAULT_BUDGET = Path(settings.BASE_DIR) / "bench_budgets.json"
+PASSWORD = "bench-password"
+# Seeded reports scatter over this box (around Bengaluru), so the map endpoints find some
+CENTER = (12.97, 77.59)
+SPREAD = 0.1
+WORDS = ("pothole", "streetlight", "garbage", "water", "leak", "drain", "signal", "tree", "road", "noise", "park")
+
+# Endpoints that cannot run in-process under the test client
+SKIPPED = {
+    "report-stream GET": "Server-Sent Events need the ASGI server; load it with manage.py bench_http",
+}
+
+
+class Case(NamedTuple):
+    """One endpoint call; `build(i)` gives (path, client kwargs) for the i-th run."""
+    name: str
+    method: str
+    user: object
+    status: int
+    build: Callable
+
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.effect_noise((320, 240), 64).convert("RGB").save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Seed a dataset, call every API endpoint in-process and check latency/query budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=8)
+        parser.add_argument('--users', type=int, default=200, help='Citizens; each department also gets one authority')
+        parser.add_argument('--complaints', type=int, default=5000)
+        parser.add_argument('--images', type=int, default=2, help='Images per complaint')
+        parser.add_argument('--runs', type=int, default=20, help='Timed calls per endpoint')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', help='Comma separated endpoint names (URL names) to run')
+        parser.add_argument('--budget', default=str(DEFAULT_BUDGET), help='JSON budget file ("" to skip checks)')
+        parser.add_argument('--queries-only', action='store_true', help='Check query budgets but not latency')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--write-budget', action='store_true',
+                            help='Rewrite the budget file from this run (queries as measured, 3x the p95)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        only = {n.strip() for n in (options['only'] or '').split(',') if n.strip()}
+        started = time.perf_counter()
+        # Everything runs inside a rolled back transaction so the bench leaves no rows behind.
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], DEBUG=False,
+        ), transaction.atomic():
+            data = self._seed(rng, options)
+            self.stdout.write(
+                f"Seeded {options['complaints']} reports for {len(data['citizens'])} citizens "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            results = {}
+            for case in self._cases(data, rng):
+                if only and case.name.split(" ")[0] not in only:
+                    continue
+                results[case.name] = self._measure(case, options['runs'])
+            transaction.set_rollback(True)
+
+        self._report(results)
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "volumes": {k: options[k] for k in ('departments', 'users', 'complaints', 'images')},
+            "runs": options['runs'],
+            "results": results,
+            "skipped": SKIPPED,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✔ Results written to {options['output']}"))
+        if options['write_budget']:
+            self._write_budget(options['budget'], results)
+            return
+        if options['budget']:
+            self._check(options['budget'], results, options['queries_only'])
+
+    def _seed(self, rng, options):
+        departments = Department.objects.bulk_create(
+            [Department(name=f"Bench department {i} {rng.getrandbits(32):08x}") for i in range(options['departments'])]
+        )
+        password = make_password(PASSWORD)
+        tag = f"{rng.getrandbits(32):08x}"
+        citizens = User.objects.bulk_create([
+            User(username=f"bench-{tag}-{i}", email=f"bench-{tag}-{i}@urbaniq.local", password=password)
+            for i in range(options['users'])
+        ])
+        authorities = User.objects.bulk_create([
+            User(username=f"bench-{tag}-auth-{i}", email=f"bench-{tag}-auth-{i}@urbaniq.local", password=password,
+                 is_staff=True)
+            for i in range(len(departments))
+        ])
+        AuthorityProfile.objects.bulk_create(
+            [AuthorityProfile(user=user, department=dept) for user, dept in zip(authorities, departments)]
+        )
+        admin = User.objects.create_superuser(
+            username=f"bench-{tag}-admin", email=f"bench-{tag}-admin@urbaniq.local", password=PASSWORD,
+        )
+
+        now = timezone.now()
+        statuses = Complaint.Status.values
+        types = Complaint.ComplaintType.values
+        rows = []
+        for i in range(options['complaints']):
+            lat = CENTER[0] + rng.uniform(-SPREAD, SPREAD)
+            lng = CENTER[1] + rng.uniform(-SPREAD, SPREAD)
+            words = rng.sample(WORDS, 4)
+            created = now - timedelta(minutes=i)
+            rows.append(Complaint(
+                user=rng.choice(citizens), title=" ".join(words[:2]).capitalize(),
+                description=f"Bench report {i}: {' '.join(words)} near block {rng.randint(1, 400)}",
+                location=f"Block {rng.randint(1, 400)}", latitude=lat, longitude=lng, geohash=encode(lat, lng),
+                complaint_type=rng.choice(types), status=rng.choice(statuses),
+                assigned_department=rng.choice(departments), created_at=created, updated_at=created,
+            ))
+        complaints = Complaint.objects.bulk_create(rows, batch_size=1000)
+        ComplaintImage.objects.bulk_create([
+            ComplaintImage(complaint=c, image=f"complaints/images/bench_{c.pk}_{n}.jpg",
+                           thumbnail=f"complaints/images/thumbs/bench_{c.pk}_{n}.jpg")
+            for c in complaints for n in range(options['images'])
+        ], batch_size=5000)
+        record_events(created_events(complaints, None))
+        return {
+            "departments": departments, "citizens": citizens, "authorities": authorities, "admin": admin,
+            "complaints": complaints,
+        }
+
+    def _cases(self, data, rng):
+        admin = data["admin"]
+        citizen = max(data["citizens"], key=lambda u: sum(c.user_id == u.pk for c in data["complaints"][:500]))
+        authority = data["authorities"][0]
+        department = data["departments"][0]
+        own = next(c for c in data["complaints"] if c.user_id == citizen.pk)
+        in_department = [c for c in data["complaints"] if c.assigned_department_id == department.pk]
+        disposable = iter(data["complaints"][-1000:])
+        # Same type and starting status, so every run touches the same counter buckets
+        kind = in_department[0].complaint_type
+        moved = [c.pk for c in in_department if c.complaint_type == kind and c.status == Complaint.Status.OPEN][:20]
+        photo = _jpeg()
+        lat, lng = CENTER
+        bbox = f"{lng - SPREAD / 4},{lat - SPREAD / 4},{lng + SPREAD / 4},{lat + SPREAD / 4}"
+        tag = f"{rng.getrandbits(32):08x}"
+
+        def ingest_rows(i):
+            return [
+                {"title": f"Bulk {i}-{n}", "description": "Imported by the bench", "department": department.pk,
+                 "latitude": lat, "longitude": lng}
+                for n in range(100)
+            ]
+
+        def upload(i):
+            return SimpleUploadedFile(f"bench_{i}.jpg", photo, content_type="image/jpeg")
+
+        return [
+            Case("auth-register POST", "post", None, 201, lambda i: (
+                "/api/auth/register",
+                {"data": {"name": "Bench", "email": f"bench-{tag}-new-{i}@urbaniq.local", "password": PASSWORD}},
+            )),
+            Case("auth-login POST", "post", None, 200, lambda i: (
+                "/api/auth/login", {"data": {"email": citizen.email, "password": PASSWORD}},
+            )),
+            Case("user-me GET", "get", citizen, 200, lambda i: ("/api/user/me", {})),
+            Case("reports GET", "get", admin, 200, lambda i: (f"/api/reports?page={i % 5 + 1}", {})),
+            Case("reports POST", "post", citizen, 201, lambda i: ("/api/reports", {"format": "multipart", "data": {
+                "title": f"Bench upload {i}", "description": "Pothole on the bench road",
+                "assigned_department_id": department.pk, "latitude": lat, "longitude": lng, "images": [upload(i)],
+            }})),
+            Case("my-reports GET", "get", citizen, 200, lambda i: ("/api/reports/mine", {})),
+            Case("report-bulk POST", "post", admin, 201, lambda i: (
+                "/api/reports/bulk", {"format": "json", "data": ingest_rows(i)},
+            )),
+            Case("report-bulk-status POST", "post", authority, 200, lambda i: ("/api/reports/bulk-status", {
+                "format": "json",
+                "data": {"ids": moved, "status": Complaint.Status.IN_PROGRESS if i % 2 else Complaint.Status.OPEN},
+            })),
+            Case("report-search GET", "get", admin, 200, lambda i: (f"/api/reports/search?q={WORDS[i % len(WORDS)]}", {})),
+            Case("report-geo-bbox GET", "get", admin, 200, lambda i: (f"/api/reports/geo/bbox?bbox={bbox}", {})),
+            Case("report-geo-nearby GET", "get", admin, 200, lambda i: (
+                f"/api/reports/geo/nearby?lat={lat}&lng={lng}&radius=2000", {},
+            )),
+            Case("report-geo-clusters GET", "get", admin, 200, lambda i: (
+                f"/api/reports/geo/clusters?bbox={bbox}&zoom=14", {},
+            )),
+            Case("report-export GET", "get", authority, 200, lambda i: ("/api/reports/export?output=ndjson", {})),
+            Case("report-detail GET", "get", citizen, 200, lambda i: (f"/api/reports/{own.pk}", {})),
+            Case("report-detail PATCH", "patch", authority, 200, lambda i: (
+                f"/api/reports/{in_department[-1].pk}", {"format": "json", "data": {"person_in_charge": f"Officer {i}"}},
+            )),
+            Case("report-detail DELETE", "delete", admin, 204, lambda i: (f"/api/reports/{next(disposable).pk}", {})),
+            Case("report-timeline GET", "get", citizen, 200, lambda i: (f"/api/reports/{own.pk}/timeline", {})),
+            Case("report-track GET", "get", citizen, 200, lambda i: (f"/api/reports/{own.tracking_id}/track", {})),
+            Case("report-stream-ticket POST", "post", citizen, 201, lambda i: ("/api/reports/stream/ticket", {})),
+            Case("stats GET", "get", admin, 200, lambda i: ("/api/stats", {})),
+            Case("departments GET", "get", citizen, 200, lambda i: ("/api/departments", {})),
+            Case("complaint-list-create GET", "get", citizen, 200, lambda i: ("/complaints/complaint/", {})),
+            Case("complaint-list-create POST", "post", citizen, 201, lambda i: ("/complaints/complaint/", {
+                "format": "json", "data": {"title": f"Legacy {i}", "description": "Bench", "complaint_type": "Other"},
+            })),
+        ]
+
+    def _measure(self, case, runs):
+        client = APIClient()
+        if case.user is not None:
+            # A real token, so the JWT user lookup is part of what is measured
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(case.user).access_token}")
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        samples, counts = [], []
+        for i in range(runs + 1):
+            path, kwargs = case.build(i)
+            queries[0] = 0
+            started = time.perf_counter()
+            with connection.execute_wrapper(count):
+                res = getattr(client, case.method)(path, **kwargs)
+                if res.streaming:
+                    for _ in res.streaming_content:
+                        pass
+            elapsed = (time.perf_counter() - started) * 1000
+            if res.status_code != case.status:
+                body = b"".join(res.streaming_content) if res.streaming else res.content
+                raise CommandError(f"{case.name}: expected {case.status}, got {res.status_code}: {body[:200]!r}")
+            # The first call warms per-process caches (roles, departments); it is not representative.
+            if i:
+                samples.append(elapsed)
+                counts.append(queries[0])
+        return {
+            "status": case.status,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "queries": max(counts),
+            "queries_p50": percentile(counts, 50),
+        }
+
+    def _report(self, results):
+        self.stdout.write(f"{'endpoint':<30}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<30}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['queries']:>9}")
+        for name, reason in SKIPPED.items():
+            self.stdout.write(self.style.WARNING(f"⚠ {name} skipped: {reason}"))
+
+    def _check(self, path, results, queries_only):
+        try:
+            budget = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            raise CommandError(f"No budget file at {path}; create one with --write-budget")
+        violations = []
+        for name, r in results.items():
+            limits = budget.get(name)
+            if limits is None:
+                violations.append(f"{name}: no budget")
+                continue
+            if r["queries"] > limits["queries"]:
+                violations.append(f"{name}: {r['queries']} queries, budget {limits['queries']}")
+            if not queries_only and r["p95_ms"] > limits["p95_ms"]:
+                violations.append(f"{name}: p95 {r['p95_ms']} ms, budget {limits['p95_ms']} ms")
+        if violations:
+            raise CommandError("Budget exceeded:\n  " + "\n  ".join(violations))
+        self.stdout.write(self.style.SUCCESS(f"✔ {len(results)} endpoints within budget"))
+
+    def _write_budget(self, path, results):
+        budget = {}
+        if Path(path).exists():
+            budget = json.loads(Path(path).read_text())
+        for name, r in results.items():
+            budget[name] = {"queries": r["queries"], "p95_ms": max(5, int(r["p95_ms"] * 3 + 0.5))}
+        Path(path).write_text(json.dumps(dict(sorted(budget.items())), indent=2) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"✔ Budget written to {path}"))
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.bench_utils import percentile
+
+User = get_user_model()
+
+DEFAULT_PATHS = "/api/reports,/api/reports?page=2,/api/user/me,/api/departments"
+
+
+async def _read_response(reader):
+    """Status of one HTTP/1.1 response; the body is read and dropped so the connection can be reused."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get("connection") != "close"
+
+
+async def _client(host, port, requests, deadline, samples, errors, index):
+    reader = writer = None
+    n = index
+    while time.perf_counter() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        request = requests[n % len(requests)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            writer.write(request)
+            status, keep_alive = await _read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            errors["connection"] = errors.get("connection", 0) + 1
+            writer.close()
+            writer = None
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+        if status >= 400:
+            errors[status] = errors.get(status, 0) + 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run(host, port, requests, concurrency, duration):
+    samples, errors = [], {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, requests, deadline, samples, errors, i) for i in range(concurrency)
+    ))
+    return samples, errors, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Load a running server with keep-alive GETs at several concurrency levels; reports req/s and latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test')
+        parser.add_argument('--paths', default=DEFAULT_PATHS, help='Comma separated paths, requested round robin')
+        parser.add_argument('--concurrency', default='50,100,500', help='Comma separated numbers of open connections')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per concurrency level')
+        parser.add_argument('--user', help='Username to mint an access token for (default: first superuser)')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("--url must be a plain http:// URL")
+        user = (
+            User.objects.filter(username=options['user']).first() if options['user']
+            else User.objects.filter(is_superuser=True).order_by('pk').first()
+        )
+        if user is None:
+            raise CommandError("No user to authenticate as; pass --user")
+        token = str(RefreshToken.for_user(user).access_token)
+        host_header = url.netloc
+        requests = [
+            (
+                f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nAuthorization: Bearer {token}\r\n"
+                "Accept: application/json\r\nConnection: keep-alive\r\n\r\n"
+            ).encode()
+            for path in (p.strip() for p in options['paths'].split(',')) if path
+        ]
+        levels = [int(c) for c in options['concurrency'].split(',') if c.strip()]
+
+        self.stdout.write(f"{'conns':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  errors")
+        for concurrency in levels:
+            samples, errors, elapsed = asyncio.run(
+                _run(url.hostname, url.port or 80, requests, concurrency, options['duration'])
+            )
+            if not samples:
+                self.stdout.write(self.style.WARNING(f"⚠ {concurrency} connections: no completed requests {errors}"))
+                continue
+            self.stdout.write(
+                f"{concurrency:>6}{len(samples) / elapsed:>10.0f}{percentile(samples, 50):>10.1f}"
+                f"{percentile(samples, 95):>10.1f}{percentile(samples, 99):>10.1f}  {errors or '-'}"
+            )
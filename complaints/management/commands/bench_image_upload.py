@@ -0,0 +1,86 @@
+import io
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.bench_utils import percentile
+from complaints.models import Department
+
+User = get_user_model()
+
+
+def _photo(index, size):
+    """A noisy JPEG roughly as expensive to re-encode as a phone photo."""
+    img = Image.effect_noise(size, 64).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=92)
+    return SimpleUploadedFile(f"bench_{index}.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+class Command(BaseCommand):
+    help = 'Benchmark POST /api/reports latency with 1, 4 and 8 images, sequential vs pooled compression'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--counts', default='1,4,8', help='Comma separated image counts per upload')
+        parser.add_argument('--runs', type=int, default=15, help='Timed requests per configuration')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='Pool size for the pooled run')
+        parser.add_argument('--width', type=int, default=3000, help='Width of the synthetic photos')
+
+    def handle(self, *args, **options):
+        counts = [int(c) for c in options['counts'].split(',') if c.strip()]
+        size = (options['width'], options['width'] * 3 // 4)
+        photos = [_photo(i, size) for i in range(max(counts))]
+        modes = [('sequential', 0), ('pooled', options['workers'])]
+
+        self.stdout.write(f"{'mode':<12}{'images':>8}{'p50 ms':>10}{'p95 ms':>10}")
+        with tempfile.TemporaryDirectory() as media_root:
+            for mode, workers in modes:
+                overrides = {
+                    "MEDIA_ROOT": media_root,
+                    "IMAGE_POOL_WORKERS": workers,
+                    "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+                }
+                with override_settings(**overrides):
+                    for count in counts:
+                        samples = self._measure(photos[:count], options['runs'])
+                        self.stdout.write(
+                            f"{mode:<12}{count:>8}{percentile(samples, 50):>10.1f}{percentile(samples, 95):>10.1f}"
+                        )
+
+    def _measure(self, photos, runs):
+        samples = []
+        # Everything runs inside a rolled back transaction so the bench leaves no rows behind.
+        with transaction.atomic():
+            user = User.objects.create_user(username="bench-image-upload", email="bench@urbaniq.local")
+            department = Department.objects.order_by('pk').first() or Department.objects.create(name="Bench")
+            client = APIClient()
+            client.force_authenticate(user=user)
+            for attempt in range(runs + 1):
+                for photo in photos:
+                    photo.seek(0)
+                payload = {
+                    "title": "Bench",
+                    "description": f"Image upload bench {random.random()}",
+                    "assigned_department_id": department.pk,
+                    "images": photos,
+                }
+                started = time.perf_counter()
+                res = client.post("/api/reports", payload, format="multipart")
+                elapsed = (time.perf_counter() - started) * 1000
+                if res.status_code != 201:
+                    raise RuntimeError(f"Unexpected status {res.status_code}: {res.content[:200]}")
+                # The first request pays for pool start-up; it is not representative.
+                if attempt:
+                    samples.append(elapsed)
+            transaction.set_rollback(True)
+        return samples
@@ -0,0 +1,107 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.bench_utils import percentile
+from api.duplicates import BANDS, BKTree, band_probes, hamming, index_image_hashes, similar_images, split_bands, to_signed
+from complaints.models import Complaint, ComplaintImage, Department
+
+
+def _near(value, rng, flips):
+    for bit in rng.sample(range(64), flips):
+        value ^= 1 << bit
+    return value
+
+
+class Command(BaseCommand):
+    help = 'Benchmark near-duplicate photo lookup (linear scan vs BK-tree vs banded index) over stored dHashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashes', type=int, default=1_000_000, help='Stored hashes')
+        parser.add_argument('--queries', type=int, default=200, help='Timed lookups per method')
+        parser.add_argument('--radius', type=int, default=6, help='Hamming radius')
+        parser.add_argument('--db', action='store_true', help='Also time the ImageHashBand table (rows are rolled back)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        radius = options['radius']
+        # Photos of the same scene cluster: seed "scenes" and store noisy copies of them.
+        scenes = [rng.getrandbits(64) for _ in range(max(1, options['hashes'] // 20))]
+        stored = [_near(rng.choice(scenes), rng, rng.randint(0, 10)) for _ in range(options['hashes'])]
+        queries = [_near(rng.choice(scenes), rng, rng.randint(0, 4)) for _ in range(options['queries'])]
+        self.stdout.write(f"{len(stored)} stored hashes, {len(queries)} queries, radius {radius}")
+
+        started = time.perf_counter()
+        tree = BKTree()
+        for i, value in enumerate(stored):
+            tree.add(value, i)
+        self.stdout.write(f"BK-tree built in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        bands = [dict() for _ in range(BANDS)]
+        for i, value in enumerate(stored):
+            for band, part in enumerate(split_bands(value)):
+                bands[band].setdefault(part, []).append(i)
+        self.stdout.write(f"Band index built in {time.perf_counter() - started:.1f}s")
+
+        def linear(q):
+            return sorted(i for i, v in enumerate(stored) if hamming(q, v) <= radius)
+
+        def bk(q):
+            return sorted(item for _, _, item in tree.search(q, radius))
+
+        def banded(q):
+            candidates = set()
+            for band, part in enumerate(split_bands(q)):
+                for probe in band_probes(part, radius // BANDS):
+                    candidates.update(bands[band].get(probe, ()))
+            return sorted(i for i in candidates if hamming(q, stored[i]) <= radius)
+
+        self.stdout.write(f"{'method':<14}{'p50 ms':>10}{'p95 ms':>10}{'hits':>8}")
+        expected = None
+        for name, search, sample in (
+            ('linear', linear, queries[:10]),
+            ('bk-tree', bk, queries),
+            ('bands', banded, queries),
+        ):
+            samples, hits = [], []
+            for q in sample:
+                started = time.perf_counter()
+                hits.append(search(q))
+                samples.append((time.perf_counter() - started) * 1000)
+            if expected is None:
+                expected = hits
+            elif hits[:len(expected)] != expected:
+                raise RuntimeError(f"{name} disagrees with the linear scan")
+            self.stdout.write(
+                f"{name:<14}{percentile(samples, 50):>10.2f}{percentile(samples, 95):>10.2f}{sum(map(len, hits)) / len(hits):>8.1f}"
+            )
+
+        if options['db']:
+            self._bench_db(stored, queries, radius)
+
+    def _bench_db(self, stored, queries, radius):
+        # Everything runs inside a rolled back transaction so the bench leaves no rows behind.
+        with transaction.atomic():
+            department = Department.objects.order_by('pk').first() or Department.objects.create(name="Bench")
+            from django.contrib.auth import get_user_model
+            user = get_user_model().objects.create_user(username="bench-phash", email="bench@urbaniq.local")
+            complaint = Complaint.objects.create(user=user, title="Bench", description="phash", assigned_department=department)
+            started = time.perf_counter()
+            for start in range(0, len(stored), 10000):
+                images = ComplaintImage.objects.bulk_create([
+                    ComplaintImage(complaint=complaint, image="bench.jpg", phash=to_signed(v))
+                    for v in stored[start:start + 10000]
+                ])
+                index_image_hashes(images)
+            self.stdout.write(f"DB index loaded in {time.perf_counter() - started:.1f}s")
+            samples = []
+            for q in queries:
+                started = time.perf_counter()
+                similar_images(q, radius)
+                samples.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"{'db bands':<14}{percentile(samples, 50):>10.2f}{percentile(samples, 95):>10.2f}")
+            transaction.set_rollback(True)
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import FORMATS, export_lines
+from api.filters import InvalidFilter, filter_complaints
+from api.roles import visible_complaints
+from complaints.models import Complaint
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Stream active reports as CSV or NDJSON, read through a server-side cursor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--file', help='Write here instead of stdout')
+        parser.add_argument('--as-user', help='Export only what this username may see (default: everything)')
+        parser.add_argument('--status')
+        parser.add_argument('--type')
+        parser.add_argument('--department', help='Department id')
+        parser.add_argument('--created-after', help='ISO date or datetime')
+        parser.add_argument('--created-before', help='ISO date or datetime')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per cursor round trip')
+
+    def handle(self, *args, **options):
+        if options['as_user']:
+            user = User.objects.filter(username=options['as_user']).first()
+            if user is None:
+                raise CommandError(f"User not found: {options['as_user']}")
+            qs = visible_complaints(user)
+        else:
+            qs = Complaint.objects.filter(is_active=True)
+        params = {
+            key: options[key] for key in ('status', 'type', 'department', 'created_after', 'created_before')
+        }
+        try:
+            qs = filter_complaints(qs, params)
+        except InvalidFilter as e:
+            raise CommandError(str(e))
+
+        out = open(options['file'], 'w', encoding='utf-8', newline='') if options['file'] else None
+        try:
+            for part in export_lines(qs, options['output'], options['chunk_size']):
+                if out:
+                    out.write(part)
+                else:
+                    self.stdout.write(part, ending='')
+        finally:
+            if out:
+                out.close()
+        if out:
+            self.stderr.write(self.style.SUCCESS(f"✔ Exported to {options['file']}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.media import attach_thumbnail
+from complaints.models import ComplaintImage, ResolutionProofImage
+
+
+class Command(BaseCommand):
+    help = 'Create admin thumbnails for images uploaded before renditions existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows loaded per query')
+
+    def handle(self, *args, **options):
+        for model in (ComplaintImage, ResolutionProofImage):
+            done = failed = 0
+            last_id = 0
+            while True:
+                batch = list(
+                    model.objects.filter(pk__gt=last_id, thumbnail__isnull=True)
+                    .exclude(image='').order_by('pk')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                for obj in batch:
+                    try:
+                        attach_thumbnail(obj)
+                        done += 1
+                    except Exception as e:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'⚠ {model.__name__} {obj.pk}: {e}'))
+                last_id = batch[-1].pk
+            self.stdout.write(self.style.SUCCESS(f'✔ {model.__name__}: {done} thumbnails, {failed} failed'))
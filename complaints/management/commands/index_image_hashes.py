@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from api.duplicates import index_image_hashes, to_signed
+from api.media import dhash
+from complaints.models import ComplaintImage
+
+
+class Command(BaseCommand):
+    help = 'Compute dHashes and duplicate-search bands for images uploaded before hashing existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows loaded per query')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                ComplaintImage.objects.filter(pk__gt=last_id, phash__isnull=True)
+                .exclude(image='').order_by('pk')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            hashed = []
+            for image in batch:
+                try:
+                    with image.image.open('rb') as f:
+                        image.phash = to_signed(dhash(f.read()))
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'⚠ ComplaintImage {image.pk}: {e}'))
+                    continue
+                hashed.append(image)
+            ComplaintImage.objects.bulk_update(hashed, ['phash'])
+            index_image_hashes(hashed)
+            done += len(hashed)
+            last_id = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'✔ {done} images hashed, {failed} failed'))
@@ -0,0 +1,42 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+
+from api.ingest import ingest_rows
+from api.parsers import csv_rows, ndjson_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Create reports in bulk from an NDJSON or CSV file (one report per line/row)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--as-user', required=True, help='Username the reports are filed by')
+        parser.add_argument('--input', choices=['csv', 'ndjson'], help='Default: from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows per INSERT')
+        parser.add_argument('--errors', help='Write the failed rows\' results here as NDJSON')
+
+    def handle(self, *args, **options):
+        submitter = User.objects.filter(username=options['as_user']).first()
+        if submitter is None:
+            raise CommandError(f"User not found: {options['as_user']}")
+        kind = options['input'] or ('csv' if options['path'].lower().endswith('.csv') else 'ndjson')
+        with open(options['path'], encoding='utf-8', newline='') as f:
+            try:
+                rows = list((csv_rows if kind == 'csv' else ndjson_rows)(f))
+            except ParseError as e:
+                raise CommandError(str(e.detail))
+
+        # Run from the server itself: rows may name the citizen they are filed for.
+        results = ingest_rows(rows, submitter, on_behalf=True, chunk_size=options['chunk_size'])
+        failed = [r for r in results if 'error' in r]
+        for result in failed[:20]:
+            self.stdout.write(self.style.WARNING(f"⚠ Row {result['row']}: {result['error']}"))
+        if options['errors'] and failed:
+            with open(options['errors'], 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(r) + '\n' for r in failed)
+        self.stdout.write(self.style.SUCCESS(f'✔ {len(results) - len(failed)} reports created, {len(failed)} failed'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.events import legacy_events, record_events
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = 'Move entries of the legacy Complaint.timeline JSON into ComplaintEvent rows, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Complaints per transaction')
+
+    def handle(self, *args, **options):
+        moved = events = 0
+        last_id = 0
+        while True:
+            # Each batch commits on its own and clears what it moved, so a rerun resumes where this stopped.
+            with transaction.atomic():
+                batch = list(
+                    Complaint.objects.filter(pk__gt=last_id, timeline__isnull=False)
+                    .select_for_update().only('id', 'timeline', 'created_at').order_by('pk')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                rows = [event for c in batch for event in legacy_events(c.pk, c.timeline, c.created_at)]
+                record_events(rows)
+                Complaint.objects.filter(pk__in=[c.pk for c in batch]).update(timeline=None)
+            moved += len(batch)
+            events += len(rows)
+            last_id = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'✔ {moved} timelines moved into {events} events'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:43
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so the complaints table stays writable on large installs
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0007_notification_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='cmpl_active_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['assigned_department', '-created_at', '-id'], name='cmpl_dept_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-created_at', '-id'], name='cmpl_user_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status', '-created_at', '-id'], name='cmpl_status_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['assigned_department', 'status', '-created_at', '-id'], name='cmpl_dept_status_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+from django.db import migrations
+
+
+BACKFILL_BATCH = 10000
+
+PG_FORWARD = [
+    "ALTER TABLE complaints_complaint ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION complaints_complaint_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.location, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS complaints_complaint_search_vector_trg ON complaints_complaint",
+    """
+    CREATE TRIGGER complaints_complaint_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, description, location ON complaints_complaint
+    FOR EACH ROW EXECUTE FUNCTION complaints_complaint_search_vector()
+    """,
+]
+
+PG_BACKWARD = [
+    "DROP INDEX CONCURRENTLY IF EXISTS cmpl_search_vector_idx",
+    "DROP TRIGGER IF EXISTS complaints_complaint_search_vector_trg ON complaints_complaint",
+    "DROP FUNCTION IF EXISTS complaints_complaint_search_vector()",
+    "ALTER TABLE complaints_complaint DROP COLUMN IF EXISTS search_vector",
+]
+
+# Porter stemming, so "streetlights" finds "streetlight" as to_tsvector('english', ...) does
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS complaints_complaint_fts USING fts5(
+        title, description, location, content='complaints_complaint', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS complaints_complaint_fts_ai AFTER INSERT ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS complaints_complaint_fts_ad AFTER DELETE ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS complaints_complaint_fts_au AFTER UPDATE OF title, description, location ON complaints_complaint BEGIN
+        INSERT INTO complaints_complaint_fts(complaints_complaint_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO complaints_complaint_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    "INSERT INTO complaints_complaint_fts(complaints_complaint_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ai",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_ad",
+    "DROP TRIGGER IF EXISTS complaints_complaint_fts_au",
+    "DROP TABLE IF EXISTS complaints_complaint_fts",
+]
+
+
+def _run(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+        return
+    if vendor != "postgresql":
+        return
+    _run(schema_editor, PG_FORWARD)
+    # Touch existing rows in id batches so the trigger fills the column
+    # without one long transaction over the whole table.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT coalesce(max(id), 0) FROM complaints_complaint")
+        max_id = cursor.fetchone()[0]
+        for start in range(0, max_id + 1, BACKFILL_BATCH):
+            cursor.execute(
+                "UPDATE complaints_complaint SET title = title WHERE id >= %s AND id < %s AND search_vector IS NULL",
+                [start, start + BACKFILL_BATCH],
+            )
+        cursor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS cmpl_search_vector_idx "
+            "ON complaints_complaint USING gin (search_vector)"
+        )
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == "postgresql":
+        _run(schema_editor, PG_BACKWARD)
+
+
+class Migration(migrations.Migration):
+    # The column is maintained by the database (trigger / FTS5 shadow table),
+    # not the ORM, so list queries never load it. Non-atomic for the batched
+    # backfill and the concurrent GIN build.
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0008_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Index built concurrently, as in 0008
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0009_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaintimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='complaints/images/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='resolutionproofimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='complaints/proof/thumbs/'),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(fields=['created_at'], name='cmpl_created_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_stats(apps, schema_editor):
+    Complaint = apps.get_model("complaints", "Complaint")
+    ComplaintStat = apps.get_model("complaints", "ComplaintStat")
+    buckets = (
+        Complaint.objects.filter(is_active=True)
+        .values("assigned_department_id", "status", "complaint_type")
+        .annotate(n=models.Count("id"))
+        .order_by()
+    )
+    ComplaintStat.objects.bulk_create([
+        ComplaintStat(
+            department_id=b["assigned_department_id"], status=b["status"],
+            complaint_type=b["complaint_type"], count=b["n"],
+        )
+        for b in buckets
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0010_admin_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('complaint_type', models.CharField(choices=[('Garbage', 'Garbage'), ('Road', 'Road'), ('Water', 'Water'), ('Electricity', 'Electricity'), ('Other', 'Other')], max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='complaints.department')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('department', 'status', 'complaint_type'), name='complaint_stat_bucket_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(seed_stats, reverse_code=migrations.RunPython.noop),
+    ]
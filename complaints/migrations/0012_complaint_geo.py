@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:59
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Index built concurrently, as in 0008
+    atomic = False
+
+    dependencies = [
+        ('complaints', '0011_complaint_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['geohash'], name='cmpl_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0013_image_hashes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintTextSignature',
+            fields=[
+                ('complaint', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text_signature', serialize=False, to='complaints.complaint')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ComplaintTextMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='text_matches', to='complaints.complaint')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='text_matched_by', to='complaints.complaint')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('complaint', 'match'), name='text_match_pair_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TextHashBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='text_bands', to='complaints.complaint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='texthash_band_bucket_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 # Create your models here.
@@ -24,7 +25,12 @@ class Complaint(TimestampModel):
     title = models.CharField(max_length=200)
     description = models.TextField()
     location = models.CharField(max_length=255, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    # Derived from latitude/longitude on save (api/geo.py); the spatial index
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False)
     is_active = models.BooleanField(default=True)
+    # Legacy; history lives in ComplaintEvent (manage.py migrate_timeline moves old entries there)
     timeline = models.JSONField(blank=True, null=True)
     complaint_type = models.CharField(choices=ComplaintType.choices, max_length=50)
     video = models.FileField(upload_to="complaints/videos/", blank=True, null=True)
@@ -38,6 +44,23 @@ class Complaint(TimestampModel):
         RESOLVED = 'resolved', 'Resolved'
         CLOSED = 'closed', 'Closed'
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
+    # Full-text search uses a `search_vector` column kept current by a database
+    # trigger (migration 0009), deliberately not a model field; see api/search.py.
+
+    class Meta:
+        # Partial (is_active) indexes matching the listing order, so each role's
+        # page is a single index range scan with no sort step.
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="cmpl_active_recent_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["assigned_department", "-created_at", "-id"], name="cmpl_dept_recent_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["user", "-created_at", "-id"], name="cmpl_user_recent_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["status", "-created_at", "-id"], name="cmpl_status_recent_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["assigned_department", "status", "-created_at", "-id"], name="cmpl_dept_status_recent_idx", condition=models.Q(is_active=True)),
+            # All rows, for the admin date hierarchy and date range filters
+            models.Index(fields=["created_at"], name="cmpl_created_idx"),
+            # Prefix (LIKE 'u4pr%') lookups for the map and nearby queries
+            models.Index(fields=["geohash"], name="cmpl_geohash_idx", opclasses=["varchar_pattern_ops"], condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return self.title
@@ -46,6 +69,9 @@ class Complaint(TimestampModel):
 class ComplaintImage(TimestampModel):
     complaint = models.ForeignKey(Complaint, related_name="images", on_delete=models.CASCADE)
     image = models.ImageField(upload_to="complaints/images/")
+    thumbnail = models.ImageField(upload_to="complaints/images/thumbs/", blank=True, null=True)
+    # 64-bit dHash stored as signed; see api/duplicates.py
+    phash = models.BigIntegerField(blank=True, null=True)
 
     def __str__(self):
         return f"Image for complaint {self.complaint_id}"
@@ -74,10 +100,190 @@ Complaint.add_to_class(
     models.ForeignKey(Department, on_delete=models.PROTECT, related_name='complaints', null=True, db_index=True)
 )
 
+# Earlier complaint this one probably repeats (set by duplicate detection)
+Complaint.add_to_class(
+    'duplicate_of',
+    models.ForeignKey('self', on_delete=models.SET_NULL, related_name='duplicates', null=True, blank=True)
+)
+
+
+class ImageHashBand(models.Model):
+    """One 16-bit slice of a ComplaintImage's dHash.
+
+    Two hashes within Hamming distance r agree within r // 4 bits on at least
+    one of the four slices, so a near-duplicate search is a few indexed
+    equality lookups per band instead of a scan over every hash.
+    """
+    image = models.ForeignKey(ComplaintImage, related_name="hash_bands", on_delete=models.CASCADE)
+    complaint = models.ForeignKey(Complaint, related_name="hash_bands", on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    value = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["band", "value"], name="imghash_band_value_idx"),
+        ]
+
+
+class ComplaintTextSignature(models.Model):
+    """MinHash signature of a complaint's title, description and location (api/duplicates.py)."""
+    complaint = models.OneToOneField(Complaint, related_name="text_signature", on_delete=models.CASCADE, primary_key=True)
+    signature = models.BinaryField()
+
+
+class TextHashBand(models.Model):
+    """One LSH band of a ComplaintTextSignature.
+
+    Complaints whose texts are similar share a bucket in at least one band with
+    high probability, so candidates come from a few indexed lookups instead of
+    comparing against every open complaint. The department is read from the
+    complaint at lookup time, so reassignments need no re-indexing.
+    """
+    complaint = models.ForeignKey(Complaint, related_name="text_bands", on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["band", "bucket"], name="texthash_band_bucket_idx"),
+        ]
+
+
+class ComplaintTextMatch(models.Model):
+    """A newer complaint found textually similar to an earlier open one."""
+    complaint = models.ForeignKey(Complaint, related_name="text_matches", on_delete=models.CASCADE)
+    match = models.ForeignKey(Complaint, related_name="text_matched_by", on_delete=models.CASCADE)
+    similarity = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["complaint", "match"], name="text_match_pair_uniq"),
+        ]
+
 
 class ResolutionProofImage(TimestampModel):
     complaint = models.ForeignKey(Complaint, related_name="resolution_proofs", on_delete=models.CASCADE)
     image = models.ImageField(upload_to="complaints/proof/")
+    thumbnail = models.ImageField(upload_to="complaints/proof/thumbs/", blank=True, null=True)
 
     def __str__(self):
         return f"Proof for complaint {self.complaint_id}"
+
+
+class VideoJob(TimestampModel):
+    """Background transcode of a complaint's uploaded video.
+
+    `updated_at` doubles as the worker heartbeat: progress writes touch it, so a
+    RUNNING job whose heartbeat goes stale belonged to a crashed worker.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    complaint = models.OneToOneField(Complaint, related_name="video_job", on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def is_pending(self):
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+
+    def __str__(self):
+        return f"Video job for complaint {self.complaint_id} ({self.status})"
+
+
+class NotificationOutbox(TimestampModel):
+    """Email waiting to be delivered by the outbox worker.
+
+    Rows are written in the same transaction as the complaint change that caused
+    them, so a notification exists if and only if that change committed.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENDING = 'sending', 'Sending'
+        SENT = 'sent', 'Sent'
+        DEAD = 'dead', 'Dead letter'
+
+    complaint = models.ForeignKey(Complaint, related_name="notifications", on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=32)
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    # One row per (event, complaint, recipient); re-queuing the same event is a no-op.
+    dedup_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="outbox_pending_due_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} -> {self.recipient} ({self.status})"
+
+
+class ComplaintStat(models.Model):
+    """Number of active complaints per department x status x type.
+
+    Kept in step by the report endpoints inside the same transaction as the
+    change, and periodically reconciled against the complaints table.
+    """
+    department = models.ForeignKey(Department, related_name="stats", on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=Complaint.Status.choices)
+    complaint_type = models.CharField(max_length=50, choices=Complaint.ComplaintType.choices)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "status", "complaint_type"],
+                name="complaint_stat_bucket_uniq",
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.department_id}/{self.status}/{self.complaint_type}: {self.count}"
+
+
+class ComplaintEvent(models.Model):
+    """One entry of a complaint's history; rows are only ever appended."""
+    class Kind(models.TextChoices):
+        CREATED = 'created', 'Created'
+        STATUS = 'status', 'Status changed'
+        UPDATED = 'updated', 'Updated'
+        DELETED = 'deleted', 'Deleted'
+        IMPORTED = 'imported', 'Imported from timeline'
+
+    complaint = models.ForeignKey(Complaint, related_name="events", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    from_status = models.CharField(max_length=20, choices=Complaint.Status.choices, blank=True, null=True)
+    to_status = models.CharField(max_length=20, choices=Complaint.Status.choices, blank=True, null=True)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="+", on_delete=models.SET_NULL, null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    # Not auto_now_add, so imported history keeps its original times
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["complaint", "created_at", "id"], name="cmpl_event_timeline_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.complaint_id}: {self.kind} {self.from_status or ''}->{self.to_status or ''}"
@@ -1,12 +1,39 @@
-from django.test import TestCase
+import io
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Complaint, Department, AuthorityProfile
+from .models import Complaint, ComplaintImage, ComplaintStat, Department, AuthorityProfile, VideoJob, NotificationOutbox
 
 
 User = get_user_model()
 
+# Admin pages render static tags; tests have no collectstatic manifest.
+PLAIN_STORAGES = {
+	"default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+	"staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def share_list_versions(test):
+	"""Tests run in one process, so the local cache sees every version bump a shared one would."""
+	patcher = mock.patch("api.conditional.shared_versions", return_value=True)
+	patcher.start()
+	test.addCleanup(patcher.stop)
+
 
 class DepartmentIsolationTest(TestCase):
 	def setUp(self):
@@ -63,3 +90,1751 @@ class DepartmentIsolationTest(TestCase):
 		self.client.force_authenticate(user=self.auth_police)
 		res = self.client.get(url)
 		self.assertEqual(res.status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class VideoJobTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="cz", email="cz@example.com", password="pass")
+		self.client.force_authenticate(user=self.citizen)
+
+	def _post_with_video(self):
+		video = SimpleUploadedFile("clip.mov", b"not really a video", content_type="video/quicktime")
+		return self.client.post("/api/reports", {
+			"title": "Pothole",
+			"description": "Big one",
+			"assigned_department_id": self.police.id,
+			"video": video,
+		}, format="multipart")
+
+	def test_post_stores_upload_and_queues_job_after_commit(self):
+		with mock.patch("api.views.enqueue_video_job") as enqueue:
+			with self.captureOnCommitCallbacks(execute=True):
+				res = self._post_with_video()
+		self.assertEqual(res.status_code, 201)
+		job = VideoJob.objects.get(complaint_id=res.data["report"]["id"])
+		enqueue.assert_called_once_with(job.pk)
+		self.assertTrue(job.complaint.video.name.endswith(".mov"))
+		self.assertIsNone(res.data["report"]["videoUrl"])
+		self.assertEqual(res.data["report"]["videoStatus"], {"status": "queued", "progress": 0})
+
+	def test_worker_finishes_job_and_exposes_video(self):
+		from api.tasks import transcode_complaint_video
+		with mock.patch("api.views.enqueue_video_job"):
+			res = self._post_with_video()
+		job = VideoJob.objects.get(complaint_id=res.data["report"]["id"])
+		with mock.patch("api.tasks.ffmpeg_available", return_value=False):
+			transcode_complaint_video.apply(args=[job.pk])
+		job.refresh_from_db()
+		self.assertEqual(job.status, VideoJob.Status.DONE)
+		self.assertEqual(job.attempts, 1)
+		res = self.client.get(f"/api/reports/{job.complaint_id}")
+		self.assertTrue(res.data["videoUrl"].endswith(".mov"))
+		self.assertEqual(res.data["videoStatus"], {"status": "done", "progress": 100})
+
+	def test_recovery_requeues_orphaned_jobs(self):
+		from api.tasks import recover_video_jobs
+		complaint = Complaint.objects.create(
+			user=self.citizen, title="T", description="D",
+			complaint_type=Complaint.ComplaintType.OTHER, assigned_department=self.police,
+		)
+		job = VideoJob.objects.create(complaint=complaint, status=VideoJob.Status.RUNNING, attempts=1)
+		VideoJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+		with mock.patch("api.tasks.transcode_complaint_video.delay") as delay:
+			result = recover_video_jobs()
+		delay.assert_called_once_with(job.pk)
+		self.assertEqual(result, {"requeued": 1, "failed": 0})
+
+	def test_heartbeat_without_known_duration(self):
+		from api import media
+		from api.tasks import transcode_complaint_video
+		proc = mock.Mock(stdout=iter(["frame=1\n", "out_time_us=500000\n", "progress=continue\n", "progress=end\n"]))
+		proc.stderr.read.return_value = ""
+		proc.wait.return_value = 0
+		calls = []
+		with mock.patch.object(media, "probe_duration", return_value=None), \
+				mock.patch.object(media.subprocess, "Popen", return_value=proc):
+			media.transcode_video("in.mov", "out.mp4", calls.append)
+		self.assertEqual(calls, [None, 100])
+
+		with mock.patch("api.views.enqueue_video_job"):
+			res = self._post_with_video()
+		job = VideoJob.objects.get(complaint_id=res.data["report"]["id"])
+		stale = timezone.now() - timedelta(hours=1)
+		beats = []
+
+		def transcode(in_path, out_path, on_progress):
+			VideoJob.objects.filter(pk=job.pk).update(updated_at=stale)
+			on_progress(None)
+			beats.append(VideoJob.objects.values_list("updated_at", "progress").get(pk=job.pk))
+			raise media.TranscodeError("stop here")
+
+		with mock.patch("api.tasks.ffmpeg_available", return_value=True), \
+				mock.patch("api.tasks.transcode_video", side_effect=transcode):
+			transcode_complaint_video.apply(args=[job.pk])
+		self.assertGreater(beats[0][0], stale)
+		self.assertEqual(beats[0][1], 0)
+
+	def test_progress_parsing(self):
+		from api.media import parse_progress_line
+		self.assertEqual(parse_progress_line("out_time_us=30000000", 120.0), 25)
+		self.assertEqual(parse_progress_line("out_time_ms=30000000\n", 120.0), 25)
+		self.assertIsNone(parse_progress_line("frame=12", 120.0))
+		self.assertIsNone(parse_progress_line("out_time_us=30000000", None))
+		self.assertEqual(parse_progress_line("progress=end", None), 100)
+
+
+def make_jpeg(name="photo.jpg", size=(2000, 1500)):
+	buffer = io.BytesIO()
+	Image.new("RGB", size, (120, 80, 40)).save(buffer, format="JPEG")
+	return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_MAX_WIDTH=1280)
+class ImageUploadTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="cz", email="cz@example.com", password="pass")
+		self.client.force_authenticate(user=self.citizen)
+
+	def _post(self, images):
+		return self.client.post("/api/reports", {
+			"title": "Garbage",
+			"description": "Pile",
+			"assigned_department_id": self.police.id,
+			"images": images,
+		}, format="multipart")
+
+	def _assert_compressed(self, res, count):
+		self.assertEqual(res.status_code, 201)
+		stored = ComplaintImage.objects.filter(complaint_id=res.data["report"]["id"]).order_by("id")
+		self.assertEqual(stored.count(), count)
+		self.assertEqual(len(res.data["report"]["imageUrls"]), count)
+		for row in stored:
+			self.assertIn("_compressed", row.image.name)
+			with Image.open(row.image.path) as img:
+				self.assertEqual(img.width, 1280)
+			with Image.open(row.thumbnail.path) as thumb:
+				self.assertEqual(max(thumb.size), 240)
+
+	@override_settings(IMAGE_POOL_WORKERS=2)
+	def test_pooled_compression(self):
+		res = self._post([make_jpeg(f"p{i}.jpg") for i in range(3)])
+		self._assert_compressed(res, 3)
+
+	@override_settings(IMAGE_POOL_WORKERS=0)
+	def test_inline_compression(self):
+		res = self._post([make_jpeg(f"p{i}.jpg") for i in range(2)])
+		self._assert_compressed(res, 2)
+
+	@override_settings(IMAGE_POOL_WORKERS=2)
+	def test_unreadable_image_keeps_original(self):
+		broken = SimpleUploadedFile("broken.jpg", b"garbage", content_type="image/jpeg")
+		res = self._post([make_jpeg(), broken])
+		self.assertEqual(res.status_code, 201)
+		names = sorted(ComplaintImage.objects.values_list("image", flat=True))
+		self.assertEqual(len(names), 2)
+		self.assertTrue(any("broken" in n and "_compressed" not in n for n in names))
+
+
+@override_settings(EMAIL_CONFIGURED=True)
+class NotificationOutboxTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="cz", email="citizen@gmail.com", password="pass")
+		self.client.force_authenticate(user=self.citizen)
+
+	def _create(self):
+		return self.client.post("/api/reports", {
+			"title": "Streetlight",
+			"description": "Not working",
+			"assigned_department_id": self.police.id,
+		}, format="multipart")
+
+	def test_create_queues_notification_without_sending(self):
+		with mock.patch("api.services.kick_notification_outbox") as kick:
+			with self.captureOnCommitCallbacks(execute=True):
+				res = self._create()
+		self.assertEqual(res.status_code, 201)
+		self.assertEqual(res.data["notification"], "queued")
+		self.assertIsNone(res.data["email_notice"])
+		kick.assert_called_once()
+		self.assertEqual(len(mail.outbox), 0)
+		row = NotificationOutbox.objects.get()
+		self.assertEqual((row.kind, row.recipient, row.status), ("created", "citizen@gmail.com", "pending"))
+
+	def test_requeue_same_event_is_deduplicated(self):
+		from api.services import notify_report_created
+		res = self._create()
+		complaint = Complaint.objects.get(pk=res.data["report"]["id"])
+		notify_report_created(complaint)
+		self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+	def test_drain_sends_batch(self):
+		from api.tasks import drain_notification_outbox
+		for _ in range(3):
+			self._create()
+		self.assertEqual(drain_notification_outbox(batch_size=2), 3)
+		self.assertEqual(len(mail.outbox), 3)
+		self.assertEqual(NotificationOutbox.objects.filter(status="sent").count(), 3)
+
+	def test_failures_back_off_then_dead_letter(self):
+		from api import tasks
+		self._create()
+		with mock.patch.object(tasks, "NOTIFICATION_MAX_ATTEMPTS", 2), \
+				mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("smtp down")):
+			self.assertEqual(tasks.drain_notification_outbox(), 0)
+			row = NotificationOutbox.objects.get()
+			self.assertEqual((row.status, row.attempts), ("pending", 1))
+			self.assertGreater(row.next_attempt_at, timezone.now())
+			NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+			tasks.drain_notification_outbox()
+		row.refresh_from_db()
+		self.assertEqual((row.status, row.attempts), ("dead", 2))
+		self.assertIn("smtp down", row.last_error)
+
+
+class StubResolver:
+	def __init__(self, answers):
+		self.answers = answers
+		self.calls = []
+
+	def __call__(self, domain):
+		self.calls.append(domain)
+		return self.answers[domain]
+
+
+class MXCacheTest(SimpleTestCase):
+	def setUp(self):
+		from django.core.cache.backends.locmem import LocMemCache
+		self.now = 1000.0
+		self.shared = LocMemCache(f"mx-test-{id(self)}", {})
+		self.resolver = StubResolver({"gmail.com": (True, 3600), "nomx.example": (False, None)})
+
+	def _cache(self, **kwargs):
+		from api.mx_cache import MXCache
+		kwargs.setdefault("resolver", self.resolver)
+		return MXCache(shared_cache=self.shared, clock=lambda: self.now, **kwargs)
+
+	def test_positive_answer_cached_for_dns_ttl(self):
+		cache = self._cache()
+		self.assertTrue(cache.has_mx("gmail.com"))
+		self.assertTrue(cache.has_mx("GMAIL.com"))
+		self.now += 3599
+		self.assertTrue(cache.has_mx("gmail.com"))
+		self.assertEqual(self.resolver.calls, ["gmail.com"])
+		self.now += 2
+		cache.has_mx("gmail.com")
+		self.assertEqual(len(self.resolver.calls), 2)
+		stats = cache.stats()
+		self.assertEqual((stats["local_hits"], stats["misses"]), (2, 2))
+
+	def test_negative_answer_uses_shorter_ttl(self):
+		cache = self._cache(negative_ttl=60)
+		self.assertFalse(cache.has_mx("nomx.example"))
+		self.assertFalse(cache.has_mx("nomx.example"))
+		self.now += 61
+		self.assertFalse(cache.has_mx("nomx.example"))
+		self.assertEqual(self.resolver.calls, ["nomx.example", "nomx.example"])
+		self.assertEqual(cache.stats()["negative"], 2)
+
+	def test_lookup_failure_is_not_cached(self):
+		from types import SimpleNamespace
+		from api import mx_cache
+
+		class Timeout(Exception):
+			pass
+
+		class NXDOMAIN(Exception):
+			pass
+
+		failure = Timeout()
+
+		def resolve(domain, rdtype):
+			raise failure
+
+		resolver = SimpleNamespace(resolve=resolve, NXDOMAIN=NXDOMAIN, NoAnswer=type("NoAnswer", (Exception,), {}))
+		with mock.patch.object(mx_cache, "dns", SimpleNamespace(resolver=resolver)):
+			with self.assertRaises(mx_cache.MXLookupError):
+				mx_cache.dns_mx_lookup("gmail.com")
+			cache = self._cache(resolver=mx_cache.dns_mx_lookup)
+			self.assertFalse(cache.has_mx("gmail.com"))  # this mail is lost, not the next ones
+			self.assertIsNone(self.shared.get("mx:gmail.com"))
+			self.assertEqual(cache.stats()["errors"], 1)
+			failure = NXDOMAIN()
+			self.assertEqual(mx_cache.dns_mx_lookup("gmail.com"), (False, None))
+			self.assertFalse(cache.has_mx("gmail.com"))
+			self.assertEqual(cache.stats()["negative"], 1)
+			self.assertFalse(self.shared.get("mx:gmail.com")["ok"])
+
+	def test_shared_tier_serves_other_processes(self):
+		self._cache().has_mx("gmail.com")
+		other = self._cache()
+		self.assertTrue(other.has_mx("gmail.com"))
+		self.assertEqual(self.resolver.calls, ["gmail.com"])
+		self.assertEqual(other.stats()["shared_hits"], 1)
+
+	def test_concurrent_misses_share_one_lookup(self):
+		release = threading.Event()
+
+		def slow_resolver(domain):
+			self.resolver.calls.append(domain)
+			release.wait(5)
+			return True, 3600
+
+		cache = self._cache()
+		cache.resolver = slow_resolver
+		results = []
+		threads = [threading.Thread(target=lambda: results.append(cache.has_mx("gmail.com"))) for _ in range(5)]
+		for t in threads:
+			t.start()
+		while cache.stats()["coalesced"] < 4:
+			time.sleep(0.001)
+		release.set()
+		for t in threads:
+			t.join()
+		self.assertEqual(results, [True] * 5)
+		self.assertEqual(self.resolver.calls, ["gmail.com"])
+
+
+class CursorPaginationTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="cz", email="cz@example.com", password="pass")
+		self.client.force_authenticate(user=self.citizen)
+		Complaint.objects.bulk_create([
+			Complaint(user=self.citizen, title=f"C{i}", description="D", complaint_type="Other", assigned_department=self.police)
+			for i in range(25)
+		])
+		# Several rows sharing a timestamp exercise the id tie-breaker.
+		same = timezone.now()
+		Complaint.objects.filter(pk__in=list(Complaint.objects.values_list("pk", flat=True)[:6])).update(created_at=same)
+		self.expected = list(Complaint.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+	def test_walk_forward_and_back(self):
+		seen, pages, cursor = [], [], ""
+		while cursor is not None:
+			res = self.client.get("/api/reports", {"cursor": cursor, "page_size": 10})
+			self.assertEqual(res.status_code, 200)
+			self.assertIsNone(res.data["count"])
+			pages.append(res.data)
+			seen += [r["id"] for r in res.data["results"]]
+			cursor = res.data["next_cursor"]
+		self.assertEqual(seen, self.expected)
+		self.assertEqual(len(pages), 3)
+		self.assertIsNone(pages[0]["prev_cursor"])
+		res = self.client.get("/api/reports", {"cursor": pages[2]["prev_cursor"], "page_size": 10})
+		self.assertEqual([r["id"] for r in res.data["results"]], self.expected[10:20])
+		res = self.client.get("/api/reports", {"cursor": res.data["prev_cursor"], "page_size": 10})
+		self.assertEqual([r["id"] for r in res.data["results"]], self.expected[:10])
+		self.assertIsNone(res.data["prev_cursor"])
+
+	def test_optional_totals(self):
+		res = self.client.get("/api/reports", {"pagination": "cursor", "count": "exact"})
+		self.assertEqual(res.data["count"], 25)
+		res = self.client.get("/api/reports", {"pagination": "cursor", "count": "approx"})
+		self.assertIsInstance(res.data["count"], int)
+		res = self.client.get("/api/reports", {"page": 2, "count": "none"})
+		self.assertIsNone(res.data["count"])
+		self.assertEqual(len(res.data["results"]), 10)
+
+	def test_page_size_is_capped(self):
+		res = self.client.get("/api/reports", {"page_size": 5000})
+		self.assertEqual(res.data["page_size"], 100)
+		self.assertEqual(res.data["count"], 25)
+		self.assertEqual(res.data["total_pages"], 1)
+
+	def test_bad_params_are_rejected(self):
+		self.assertEqual(self.client.get("/api/reports", {"cursor": "not-a-cursor"}).status_code, 400)
+		self.assertEqual(self.client.get("/api/reports", {"page": "x"}).status_code, 400)
+
+
+def explain_nodes(sql, params=None):
+	"""Flattened list of plan nodes for `sql` (Postgres EXPLAIN FORMAT JSON)."""
+	with connection.cursor() as cursor:
+		cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+		plan = cursor.fetchone()[0]
+	nodes, stack = [], [plan[0]["Plan"]]
+	while stack:
+		node = stack.pop()
+		nodes.append(node)
+		stack.extend(node.get("Plans", []))
+	return nodes
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are checked against Postgres")
+class ListingQueryPlanTest(TestCase):
+	"""Seeds a realistic volume and checks via EXPLAIN that every listing is an index scan without a sort."""
+	USERS = 300
+	COMPLAINTS = 20000
+
+	@classmethod
+	def setUpTestData(cls):
+		rng = random.Random(42)
+		cls.departments = list(Department.objects.all())
+		cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="pass")
+		cls.authority = User.objects.create_user(username="ap", email="ap@example.com", password="pass", is_staff=True)
+		AuthorityProfile.objects.create(user=cls.authority, department=cls.departments[0])
+		users = User.objects.bulk_create([User(username=f"citizen{i}", email=f"c{i}@example.com") for i in range(cls.USERS)])
+		cls.citizen = users[0]
+		now = timezone.now()
+		statuses = Complaint.Status.values
+		Complaint.objects.bulk_create([
+			Complaint(
+				user=rng.choice(users),
+				title=f"Complaint {i}",
+				description="Seeded",
+				complaint_type="Other",
+				assigned_department=rng.choice(cls.departments),
+				status=rng.choice(statuses),
+				is_active=rng.random() > 0.1,
+			)
+			for i in range(cls.COMPLAINTS)
+		], batch_size=2000)
+		# Spread creation times over a year like a real backlog.
+		with connection.cursor() as cursor:
+			cursor.execute(
+				"UPDATE complaints_complaint SET created_at = %s - (random() * interval '365 days')", [now]
+			)
+			cursor.execute("ANALYZE complaints_complaint")
+			cursor.execute("ANALYZE auth_user")
+
+	def _listing_nodes(self, user, params):
+		self.client = APIClient()
+		self.client.force_authenticate(user=user)
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/api/reports", params)
+		self.assertEqual(res.status_code, 200)
+		listing = [
+			q["sql"] for q in ctx.captured_queries
+			if 'FROM "complaints_complaint"' in q["sql"] and "LIMIT" in q["sql"]
+		]
+		self.assertEqual(len(listing), 1)
+		return res, explain_nodes(listing[0])
+
+	def assertIndexScanWithoutSort(self, nodes, index_name):
+		node_types = [n["Node Type"] for n in nodes]
+		self.assertNotIn("Sort", node_types)
+		self.assertNotIn("Incremental Sort", node_types)
+		self.assertFalse([n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == "complaints_complaint"])
+		self.assertIn(index_name, {n.get("Index Name") for n in nodes})
+
+	def test_admin_listing(self):
+		_, nodes = self._listing_nodes(self.admin, {"pagination": "cursor"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_active_recent_idx")
+		_, nodes = self._listing_nodes(self.admin, {"page": 5, "count": "none"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_active_recent_idx")
+
+	def test_authority_listing(self):
+		res, nodes = self._listing_nodes(self.authority, {"pagination": "cursor"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_dept_recent_idx")
+		_, nodes = self._listing_nodes(self.authority, {"cursor": res.data["next_cursor"]})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_dept_recent_idx")
+
+	def test_citizen_listing(self):
+		_, nodes = self._listing_nodes(self.citizen, {"pagination": "cursor"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_user_recent_idx")
+
+	def test_status_filtered_listings(self):
+		_, nodes = self._listing_nodes(self.admin, {"pagination": "cursor", "status": "resolved"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_status_recent_idx")
+		_, nodes = self._listing_nodes(self.authority, {"pagination": "cursor", "status": "open"})
+		self.assertIndexScanWithoutSort(nodes, "cmpl_dept_status_recent_idx")
+
+
+class MyReportsTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="cz", email="cz@example.com", password="pass")
+		other = User.objects.create_user(username="other", email="other@example.com", password="pass")
+		self.client.force_authenticate(user=self.citizen)
+		Complaint.objects.bulk_create([
+			Complaint(user=owner, title=f"C{i}", description="D", complaint_type="Other", assigned_department=self.police)
+			for i in range(15) for owner in (self.citizen, other)
+		])
+		self.expected = list(Complaint.objects.filter(user=self.citizen).order_by("-created_at", "-id").values_list("pk", flat=True))
+
+	def test_paginated_with_cursor(self):
+		res = self.client.get("/api/reports/mine", {"page_size": 10})
+		self.assertEqual([r["id"] for r in res.data["results"]], self.expected[:10])
+		res = self.client.get("/api/reports/mine", {"cursor": res.data["next_cursor"], "page_size": 10})
+		self.assertEqual([r["id"] for r in res.data["results"]], self.expected[10:])
+		self.assertIsNone(res.data["next_cursor"])
+
+	def test_bare_list_without_page_params(self):
+		res = self.client.get("/api/reports/mine")
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([r["id"] for r in res.data], self.expected)
+		self.assertIn("results", self.client.get("/api/reports/mine", {"count": "exact"}).data)
+
+	@override_settings(STREAM_CHUNK_SIZE=4)
+	def test_ndjson_stream_in_chunks(self):
+		import json
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/api/reports/mine", HTTP_ACCEPT="application/x-ndjson")
+			body = b"".join(res.streaming_content).decode()
+		self.assertEqual(res["Content-Type"], "application/x-ndjson")
+		self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], self.expected)
+		# One images prefetch per chunk of 4 rows rather than per row.
+		image_queries = [q for q in ctx.captured_queries if "complaints_complaintimage" in q["sql"]]
+		self.assertEqual(len(image_queries), 4)
+		res = self.client.get("/api/reports/mine", {"format": "ndjson"})
+		self.assertEqual(len(b"".join(res.streaming_content).splitlines()), 15)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ListQueryCountTest(TestCase):
+	@classmethod
+	def setUpTestData(cls):
+		departments = list(Department.objects.all())
+		cls.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="pass")
+		owners = []
+		for i in range(20):
+			user = User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", is_staff=i % 2 == 0)
+			if i % 2 == 0:
+				AuthorityProfile.objects.create(user=user, department=departments[i % len(departments)])
+			owners.append(user)
+		complaints = Complaint.objects.bulk_create([
+			Complaint(user=owners[i % 20], title=f"C{i}", description="D", complaint_type="Other",
+				assigned_department=departments[i % len(departments)], video="complaints/videos/v.mp4" if i % 3 == 0 else None)
+			for i in range(120)
+		])
+		ComplaintImage.objects.bulk_create([
+			ComplaintImage(complaint=c, image=f"complaints/images/{c.pk}_{n}.jpg") for c in complaints for n in range(2)
+		])
+		VideoJob.objects.bulk_create([VideoJob(complaint=c, status="done", progress=100) for c in complaints if c.video])
+
+	def setUp(self):
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.admin)
+
+	def test_constant_queries_per_page(self):
+		for page_size in (10, 50, 100):
+			# One query for the page, one for its images.
+			with self.assertNumQueries(2):
+				res = self.client.get("/api/reports", {"pagination": "cursor", "page_size": page_size})
+			self.assertEqual(len(res.data["results"]), page_size)
+			with self.assertNumQueries(3):  # plus the count
+				self.client.get("/api/reports", {"page_size": page_size})
+
+	def test_list_serializer_matches_full_serializer(self):
+		from api.serializers import COMPLAINT_SELECT_RELATED, ComplaintListSerializer, ComplaintSerializer
+		qs = Complaint.objects.select_related(*COMPLAINT_SELECT_RELATED).prefetch_related("images").order_by("-id")[:12]
+		request = self.client.get("/api/user/me").wsgi_request
+		fast = ComplaintListSerializer(qs, many=True, context={"request": request}).data
+		full = ComplaintSerializer(qs, many=True, context={"request": request}).data
+		self.assertEqual(fast, full)
+		self.assertTrue(fast[0]["imageUrls"][0].startswith("http://testserver/media/"))
+		self.assertTrue(any(row["user"]["role"] == "authority" and row["user"]["department"] for row in fast))
+
+
+class RoleResolutionTest(TestCase):
+	def setUp(self):
+		from django.core.cache import cache
+		cache.clear()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.traffic, _ = Department.objects.get_or_create(name="Traffic")
+		self.authority = User.objects.create_user(username="ap", email="ap@example.com", password="pass", is_staff=True)
+		self.profile = AuthorityProfile.objects.create(user=self.authority, department=self.police)
+
+	def _fresh(self):
+		return User.objects.get(pk=self.authority.pk)
+
+	def test_resolved_once_then_served_from_cache(self):
+		from api.roles import resolve_role
+		user = self._fresh()
+		with self.assertNumQueries(1):
+			role = resolve_role(user)
+			resolve_role(user)
+		self.assertEqual((role.role, role.department_id), ("authority", self.police.id))
+		other_instance = self._fresh()
+		with self.assertNumQueries(0):
+			self.assertEqual(resolve_role(other_instance).department_id, self.police.id)
+
+	def test_profile_changes_invalidate(self):
+		from api.roles import resolve_role
+		resolve_role(self._fresh())
+		self.profile.department = self.traffic
+		self.profile.save()
+		self.assertEqual(resolve_role(self._fresh()).department_id, self.traffic.id)
+		self.profile.delete()
+		self.assertEqual(resolve_role(self._fresh()).role, "citizen")
+
+	def test_views_skip_profile_lookup_when_warm(self):
+		client = APIClient()
+		client.force_authenticate(user=self._fresh())
+		client.get("/api/user/me")
+		client.force_authenticate(user=self._fresh())
+		with self.assertNumQueries(0):
+			res = client.get("/api/user/me")
+		self.assertEqual(res.data["department"], {"id": self.police.id, "name": "Police"})
+		client.force_authenticate(user=self._fresh())
+		with self.assertNumQueries(1):  # the page itself; it is empty so no images query
+			client.get("/api/reports", {"pagination": "cursor"})
+
+
+class DepartmentRegistryTest(TestCase):
+	def setUp(self):
+		from api.departments import department_registry
+		self.registry = department_registry
+		self.registry.clear()
+		self.client = APIClient()
+		self.client.force_authenticate(user=User.objects.create_user(username="cz", email="cz@example.com"))
+
+	def test_loaded_once_per_version(self):
+		with self.assertNumQueries(1):
+			police = self.registry.get_by_name("police")
+			self.assertEqual(self.registry.get(police.pk).name, "Police")
+			self.assertIsNone(self.registry.get("not-an-id"))
+		Department.objects.create(name="Parks")
+		with self.assertNumQueries(1):
+			self.assertIsNotNone(self.registry.get_by_name("Parks"))
+
+	def test_list_is_prerendered_with_etag(self):
+		res = self.client.get("/api/departments")
+		self.assertEqual(res.status_code, 200)
+		expected = list(Department.objects.order_by("name").values("id", "name"))
+		self.assertEqual(res.json(), expected)
+		etag = res["ETag"]
+		with self.assertNumQueries(0):
+			res = self.client.get("/api/departments", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 304)
+		Department.objects.filter(name="Police").get().delete()
+		res = self.client.get("/api/departments", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertNotIn("Police", [d["name"] for d in res.json()])
+
+	def test_report_post_uses_registry(self):
+		police = self.registry.get_by_name("Police")
+		res = self.client.post("/api/reports", {"title": "T", "description": "D", "assigned_department_id": police.pk}, format="multipart")
+		self.assertEqual(res.status_code, 201)
+		self.assertEqual(res.data["report"]["assigned_department"], {"id": police.pk, "name": "Police"})
+		res = self.client.post("/api/reports", {"title": "T", "description": "D", "assigned_department_id": "x"}, format="multipart")
+		self.assertEqual(res.status_code, 400)
+
+
+class ConditionalGetTest(TestCase):
+	def setUp(self):
+		from django.core.cache import cache
+		cache.clear()
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.traffic, _ = Department.objects.get_or_create(name="Traffic")
+		self.owner = User.objects.create_user(username="co", email="co@example.com")
+		self.other = User.objects.create_user(username="cx", email="cx@example.com")
+		self.authority = User.objects.create_user(username="ca", email="ca@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.police)
+		self.complaint = Complaint.objects.create(user=self.owner, title="T", description="D", assigned_department=self.police)
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.owner)
+
+	def test_detail_304_is_one_lightweight_query(self):
+		url = f"/api/reports/{self.complaint.pk}"
+		res = self.client.get(url)
+		self.assertEqual(res.status_code, 200)
+		etag = res["ETag"]
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 304)
+		self.assertEqual(res["ETag"], etag)
+		self.assertEqual(len(ctx.captured_queries), 1)
+		self.assertNotIn("images", ctx.captured_queries[0]["sql"])
+		res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+		self.assertEqual(res.status_code, 304)
+
+		self.client.force_authenticate(user=self.authority)
+		self.client.patch(url, {"status": "in_progress"}, format="json")
+		self.client.force_authenticate(user=self.owner)
+		res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data["status"], "in_progress")
+
+	def test_track_304(self):
+		url = f"/api/reports/{self.complaint.tracking_id}/track"
+		etag = self.client.get(url)["ETag"]
+		with self.assertNumQueries(1):
+			res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 304)
+
+	def test_validators_do_not_leak_across_visibility(self):
+		etag = self.client.get(f"/api/reports/{self.complaint.pk}")["ETag"]
+		self.client.force_authenticate(user=self.other)
+		res = self.client.get(f"/api/reports/{self.complaint.pk}", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 404)
+		res = self.client.get(f"/api/reports/{self.complaint.tracking_id}/track", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 403)
+
+	def test_list_304_without_queries_until_scope_changes(self):
+		share_list_versions(self)
+		res = self.client.get("/api/reports")
+		self.assertEqual(res.status_code, 200)
+		self.assertIn("Authorization", res["Vary"])
+		etag = res["ETag"]
+		self.client.get("/api/user/me")  # warm the role cache
+		with self.assertNumQueries(0):
+			res = self.client.get("/api/reports", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 304)
+		self.assertNotEqual(self.client.get("/api/reports", {"page": 2})["ETag"], etag)
+
+		# Another citizen's report is invisible here, so it must not move this validator.
+		Complaint.objects.create(user=self.other, title="T", description="D", assigned_department=self.traffic)
+		self.assertEqual(self.client.get("/api/reports", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		self.client.force_authenticate(user=self.authority)
+		dept_etag = self.client.get("/api/reports")["ETag"]
+		VideoJob.objects.create(complaint=self.complaint)
+		self.assertEqual(self.client.get("/api/reports", HTTP_IF_NONE_MATCH=dept_etag).status_code, 200)
+		self.client.force_authenticate(user=self.owner)
+		self.assertEqual(self.client.get("/api/reports", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+	def test_no_list_validators_without_shared_cache(self):
+		# Tests use LocMemCache: bumps made by Celery or another worker would never reach it
+		res = self.client.get("/api/reports")
+		self.assertEqual(res.status_code, 200)
+		self.assertNotIn("ETag", res)
+		self.assertEqual(self.client.get("/api/reports", HTTP_IF_NONE_MATCH="*").status_code, 200)
+		# Single reports are validated from the row itself, so they keep theirs
+		self.assertIn("ETag", self.client.get(f"/api/reports/{self.complaint.pk}"))
+
+	def test_reassignment_invalidates_old_department(self):
+		share_list_versions(self)
+		self.client.force_authenticate(user=self.authority)
+		etag = self.client.get("/api/reports")["ETag"]
+		self.complaint.assigned_department = self.traffic
+		self.complaint.save()
+		res = self.client.get("/api/reports", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data["results"], [])
+
+
+class SearchTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.traffic, _ = Department.objects.get_or_create(name="Traffic")
+		self.citizen = User.objects.create_user(username="sc", email="sc@example.com")
+		self.other = User.objects.create_user(username="so", email="so@example.com")
+		self.admin = User.objects.create_superuser(username="sa", email="sa@example.com", password="pass")
+		make = lambda user, title, description, **kw: Complaint.objects.create(
+			user=user, title=title, description=description, assigned_department=kw.pop("department", self.police), **kw
+		)
+		self.title_hit = make(self.citizen, "Broken streetlight", "It is dark at night")
+		self.body_hit = make(self.citizen, "Night hazard", "A streetlight pole is leaning", status="resolved")
+		self.miss = make(self.citizen, "Pothole", "Deep pothole near school")
+		self.foreign = make(self.other, "Streetlight out", "Streetlights off", department=self.traffic)
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.citizen)
+
+	def _ids(self, res):
+		self.assertEqual(res.status_code, 200)
+		return [r["id"] for r in res.data["results"]]
+
+	def test_ranked_and_visibility_scoped(self):
+		ids = self._ids(self.client.get("/api/reports/search", {"q": "streetlights"}))
+		self.assertEqual(ids, [self.title_hit.pk, self.body_hit.pk])
+		self.client.force_authenticate(user=self.admin)
+		ids = self._ids(self.client.get("/api/reports/search", {"q": "streetlight"}))
+		self.assertEqual(set(ids), {self.title_hit.pk, self.body_hit.pk, self.foreign.pk})
+
+	def test_filters_and_validation(self):
+		ids = self._ids(self.client.get("/api/reports/search", {"q": "streetlight", "status": "resolved"}))
+		self.assertEqual(ids, [self.body_hit.pk])
+		self.client.force_authenticate(user=self.admin)
+		ids = self._ids(self.client.get("/api/reports/search", {"q": "streetlight", "department": self.traffic.pk}))
+		self.assertEqual(ids, [self.foreign.pk])
+		self.assertEqual(self.client.get("/api/reports/search").status_code, 400)
+		self.assertEqual(self.client.get("/api/reports/search", {"q": "x", "type": "Nope"}).status_code, 400)
+		self.assertEqual(self.client.get("/api/reports/search", {"q": "x", "cursor": "junk"}).status_code, 400)
+
+	def test_vector_follows_edits(self):
+		self.miss.title = "Flickering streetlight"
+		self.miss.save()
+		ids = self._ids(self.client.get("/api/reports/search", {"q": "streetlight"}))
+		self.assertIn(self.miss.pk, ids)
+		self.assertEqual(self._ids(self.client.get("/api/reports/search", {"q": "pothole"})), [self.miss.pk])
+
+	def test_cursor_walks_every_match_once(self):
+		for i in range(7):
+			Complaint.objects.create(user=self.citizen, title=f"Lamp {i}", description="lamp " * (i % 3 + 1), assigned_department=self.police)
+		seen, cursor = [], None
+		while True:
+			params = {"q": "lamp", "page_size": 3}
+			if cursor:
+				params["cursor"] = cursor
+			res = self.client.get("/api/reports/search", params)
+			seen += self._ids(res)
+			cursor = res.data["next_cursor"]
+			if not cursor:
+				break
+		self.assertEqual(len(seen), 7)
+		self.assertEqual(len(set(seen)), 7)
+
+	@override_settings(STORAGES=PLAIN_STORAGES)
+	def test_admin_search_uses_fulltext(self):
+		self.client.force_login(self.admin)
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/admin/complaints/complaint/", {"q": "streetlight"})
+		self.assertEqual(res.status_code, 200)
+		self.assertContains(res, "Broken streetlight")
+		self.assertNotContains(res, "Pothole")
+		self.assertFalse([q for q in ctx.captured_queries if "LIKE" in q["sql"] and "complaints_complaint" in q["sql"]])
+		res = self.client.get("/admin/complaints/complaint/", {"q": "so@example.com"})
+		self.assertContains(res, "Streetlight out")
+
+	@skipUnless(connection.vendor == "postgresql", "GIN index is Postgres only")
+	def test_match_can_use_gin_index(self):
+		from api.search import search_complaints
+		sql, params = search_complaints(Complaint.objects.all(), "streetlight").query.sql_with_params()
+		with connection.cursor() as cursor:
+			cursor.execute("SET LOCAL enable_seqscan = off")
+		nodes = explain_nodes(sql, params)
+		self.assertIn("cmpl_search_vector_idx", {n.get("Index Name") for n in nodes})
+
+
+@override_settings(STORAGES=PLAIN_STORAGES, MEDIA_ROOT=tempfile.mkdtemp())
+class ComplaintAdminTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.admin = User.objects.create_superuser(username="adm", email="adm@example.com", password="pass")
+		self.client.force_login(self.admin)
+
+	def _add(self, count):
+		users = User.objects.bulk_create([User(username=f"u{User.objects.count()}_{i}") for i in range(count)])
+		complaints = Complaint.objects.bulk_create([
+			Complaint(user=u, title=f"C{u.username}", description="D", assigned_department=self.police) for u in users
+		])
+		ComplaintImage.objects.bulk_create([
+			ComplaintImage(complaint=c, image="complaints/images/a.jpg", thumbnail="complaints/images/thumbs/a_thumb.jpg")
+			for c in complaints
+		])
+
+	def _changelist_queries(self):
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/admin/complaints/complaint/")
+		self.assertEqual(res.status_code, 200)
+		return res, len(ctx.captured_queries)
+
+	def test_changelist_queries_do_not_grow_with_rows(self):
+		self._add(3)
+		_, few = self._changelist_queries()
+		self._add(40)
+		res, many = self._changelist_queries()
+		self.assertEqual(few, many)
+		self.assertContains(res, "a_thumb.jpg", count=43)
+		self.assertNotContains(res, 'src="/media/complaints/images/a.jpg"')
+
+	def test_change_form_gallery_single_query_per_relation(self):
+		self._add(1)
+		complaint = Complaint.objects.get()
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get(f"/admin/complaints/complaint/{complaint.pk}/change/")
+		self.assertEqual(res.status_code, 200)
+		image_queries = [q for q in ctx.captured_queries if 'FROM "complaints_complaintimage"' in q["sql"]]
+		self.assertFalse([q for q in image_queries if "LIMIT 1" in q["sql"]])  # no exists() probes
+		self.assertContains(res, "a_thumb.jpg")
+
+	def test_estimated_paginator(self):
+		from api.pagination import EstimatedCountPaginator
+		self._add(5)
+		paginator = EstimatedCountPaginator(Complaint.objects.order_by("pk"), 2)
+		self.assertEqual(paginator.count, 5)
+		self.assertEqual(paginator.num_pages, 3)
+
+
+class ComplaintStatsTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.traffic, _ = Department.objects.get_or_create(name="Traffic")
+		self.citizen = User.objects.create_user(username="st", email="st@example.com")
+		self.authority = User.objects.create_user(username="sta", email="sta@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.police)
+		self.admin = User.objects.create_superuser(username="stadm", email="stadm@example.com", password="pass")
+		self.client = APIClient()
+
+	def _count(self, department, status, complaint_type="Road"):
+		stat = ComplaintStat.objects.filter(department=department, status=status, complaint_type=complaint_type).first()
+		return stat.count if stat else 0
+
+	def _create(self, department, complaint_type="Road"):
+		self.client.force_authenticate(user=self.citizen)
+		res = self.client.post("/api/reports", {
+			"title": "T", "description": "D", "complaint_type": complaint_type, "assigned_department_id": department.pk,
+		}, format="multipart")
+		self.assertEqual(res.status_code, 201)
+		return res.data["report"]["id"]
+
+	def test_counters_follow_create_patch_delete(self):
+		pk = self._create(self.police)
+		self._create(self.police)
+		self.assertEqual(self._count(self.police, "open"), 2)
+		self.client.force_authenticate(user=self.authority)
+		self.client.patch(f"/api/reports/{pk}", {"status": "in_progress"}, format="json")
+		self.assertEqual(self._count(self.police, "open"), 1)
+		self.assertEqual(self._count(self.police, "in_progress"), 1)
+		self.client.delete(f"/api/reports/{pk}")
+		self.assertEqual(self._count(self.police, "in_progress"), 0)
+
+	def test_endpoint_reads_counters_scoped_by_role(self):
+		self._create(self.police)
+		self._create(self.traffic, "Water")
+		self.client.force_authenticate(user=self.authority)
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/api/stats")
+		self.assertEqual(res.status_code, 200)
+		self.assertFalse([q for q in ctx.captured_queries if 'FROM "complaints_complaint"' in q["sql"]])
+		self.assertEqual(res.data["total"], 1)
+		self.assertEqual(res.data["results"][0]["department"], {"id": self.police.pk, "name": "Police"})
+		self.client.force_authenticate(user=self.admin)
+		res = self.client.get("/api/stats")
+		self.assertEqual(res.data["total"], 2)
+		self.assertEqual(res.data["by_type"], {"Road": 1, "Water": 1})
+		self.client.force_authenticate(user=self.citizen)
+		self.assertEqual(self.client.get("/api/stats").status_code, 403)
+		holder = User.objects.create_user(username="stn", email="stn@example.com")  # profile, but not staff
+		AuthorityProfile.objects.create(user=holder, department=self.police)
+		self.client.force_authenticate(user=holder)
+		self.assertEqual(self.client.get("/api/stats").status_code, 403)
+
+	def test_reconcile_fixes_drift(self):
+		from api.tasks import reconcile_complaint_stats
+		self._create(self.police)
+		Complaint.objects.create(user=self.citizen, title="T", description="D", complaint_type="Water", assigned_department=self.traffic)
+		ComplaintStat.objects.filter(department=self.police).update(count=7)
+		ComplaintStat.objects.create(department=None, status="closed", complaint_type="Other", count=3)
+		self.assertEqual(reconcile_complaint_stats.apply().get(), 3)
+		self.assertEqual(self._count(self.police, "open"), 1)
+		self.assertEqual(self._count(self.traffic, "open", "Water"), 1)
+		self.assertEqual(self._count(None, "closed", "Other"), 0)
+		self.assertEqual(reconcile_complaint_stats.apply().get(), 0)
+
+	@skipUnless(connection.vendor == "postgresql", "SQLite has no row locks")
+	def test_reconcile_locks_one_department_at_a_time(self):
+		from api.stats import reconcile_stats
+		self._create(self.police)
+		with CaptureQueriesContext(connection) as ctx:
+			reconcile_stats()
+		sql = [q["sql"] for q in ctx.captured_queries]
+		self.assertFalse(any("LOCK TABLE" in q for q in sql))
+		locks = [q for q in sql if "FOR UPDATE" in q]
+		self.assertGreaterEqual(len(locks), 3)  # Police, Traffic and unassigned
+		self.assertTrue(all('"department_id" =' in q or '"department_id" IS NULL' in q for q in locks), locks)
+
+
+class GeoHashTest(SimpleTestCase):
+	def test_encode_and_cell_bounds(self):
+		from api import geo
+		self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+		min_lat, min_lng, max_lat, max_lng = geo.decode_bbox("u4pruydqqvj")
+		self.assertTrue(min_lat <= 57.64911 <= max_lat and min_lng <= 10.40744 <= max_lng)
+
+	def test_covering_cells_cover_the_box(self):
+		from api import geo
+		rng = random.Random(7)
+		for _ in range(50):
+			lat, lng = rng.uniform(-60, 60), rng.uniform(-170, 170)
+			bbox = (lat, lng, lat + rng.uniform(0.001, 0.5), lng + rng.uniform(0.001, 0.5))
+			cells = geo.covering_cells(bbox, max_cells=16)
+			self.assertLessEqual(len(cells), 16)
+			for _ in range(20):
+				point = geo.encode(rng.uniform(bbox[0], bbox[2]), rng.uniform(bbox[1], bbox[3]))
+				self.assertTrue(any(point.startswith(c) for c in cells))
+
+
+class GeoQueryTest(TestCase):
+	ORIGIN = (28.6139, 77.2090)
+
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="gc", email="gc@example.com")
+		self.other = User.objects.create_user(username="go", email="go@example.com")
+		lat, lng = self.ORIGIN
+		make = lambda user, title, dlat, dlng, **kw: Complaint.objects.create(
+			user=user, title=title, description="D", assigned_department=self.police,
+			latitude=lat + dlat, longitude=lng + dlng, **kw
+		)
+		self.near = make(self.citizen, "near", 0.001, 0.0)  # ~110 m
+		self.mid = make(self.citizen, "mid", 0.0, 0.01)  # ~980 m
+		self.far = make(self.citizen, "far", 0.05, 0.0)  # ~5.5 km
+		self.foreign = make(self.other, "foreign", 0.0005, 0.0)
+		self.closed = make(self.citizen, "closed", 0.002, 0.0, status="closed")
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.citizen)
+
+	def test_geohash_maintained_on_save(self):
+		self.assertEqual(len(self.near.geohash), 9)
+		self.near.latitude, self.near.longitude = None, None
+		self.near.save()
+		self.assertIsNone(Complaint.objects.get(pk=self.near.pk).geohash)
+
+	def test_nearby_is_exact_ordered_and_visible_only(self):
+		lat, lng = self.ORIGIN
+		res = self.client.get("/api/reports/geo/nearby", {"lat": lat, "lng": lng, "radius": 1500})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([r["title"] for r in res.data["results"]], ["near", "closed", "mid"])
+		self.assertLess(abs(res.data["results"][0]["distance_m"] - 111), 2)
+		res = self.client.get("/api/reports/geo/nearby", {"lat": lat, "lng": lng, "radius": 1500, "status": "open"})
+		self.assertEqual([r["title"] for r in res.data["results"]], ["near", "mid"])
+		self.assertEqual(self.client.get("/api/reports/geo/nearby", {"lat": lat}).status_code, 400)
+		self.assertEqual(self.client.get("/api/reports/geo/nearby", {"lat": lat, "lng": lng, "radius": 10 ** 7}).status_code, 400)
+
+	def test_bbox_and_clusters(self):
+		lat, lng = self.ORIGIN
+		bbox = f"{lng - 0.02},{lat - 0.02},{lng + 0.02},{lat + 0.02}"
+		res = self.client.get("/api/reports/geo/bbox", {"bbox": bbox})
+		self.assertEqual({r["title"] for r in res.data["results"]}, {"near", "mid", "closed"})
+		self.assertFalse(res.data["truncated"])
+		res = self.client.get("/api/reports/geo/clusters", {"bbox": bbox, "zoom": 12})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data["precision"], 5)
+		self.assertEqual(sum(c["count"] for c in res.data["results"]), 3)
+		self.assertEqual(self.client.get("/api/reports/geo/bbox", {"bbox": "1,2,3"}).status_code, 400)
+
+	def test_post_accepts_coordinates(self):
+		res = self.client.post("/api/reports", {
+			"title": "T", "description": "D", "assigned_department_id": self.police.pk, "latitude": "12.97", "longitude": "77.59",
+		}, format="multipart")
+		self.assertEqual(res.status_code, 201)
+		self.assertEqual(res.data["report"]["latitude"], 12.97)
+		self.assertTrue(Complaint.objects.get(pk=res.data["report"]["id"]).geohash.startswith("tdr1"))
+		res = self.client.post("/api/reports", {
+			"title": "T", "description": "D", "assigned_department_id": self.police.pk, "latitude": "95", "longitude": "0",
+		}, format="multipart")
+		self.assertEqual(res.status_code, 400)
+
+	@skipUnless(connection.vendor == "postgresql", "Query plans are checked against Postgres")
+	def test_cell_filter_uses_geohash_index(self):
+		from api.geo import cells_filter, covering_cells
+		lat, lng = self.ORIGIN
+		qs = Complaint.objects.filter(cells_filter(covering_cells((lat - 0.01, lng - 0.01, lat + 0.01, lng + 0.01))), is_active=True)
+		sql, params = qs.values("id").query.sql_with_params()
+		with connection.cursor() as cursor:
+			cursor.execute("SET LOCAL enable_seqscan = off")
+		self.assertIn("cmpl_geohash_idx", {n.get("Index Name") for n in explain_nodes(sql, params)})
+
+
+def make_scene(seed, size=(1600, 1200), name="scene.jpg", resize_to=None):
+	"""A photo-like JPEG with structure, so its dHash is distinctive; `resize_to` gives a re-shot copy."""
+	rng = random.Random(seed)
+	img = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+	from PIL import ImageDraw
+	draw = ImageDraw.Draw(img)
+	for _ in range(12):
+		x, y = rng.randrange(size[0]), rng.randrange(size[1])
+		draw.rectangle([x, y, x + rng.randrange(100, 600), y + rng.randrange(100, 500)], fill=tuple(rng.randrange(256) for _ in range(3)))
+	if resize_to:
+		img = img.resize(resize_to)
+	buffer = io.BytesIO()
+	img.save(buffer, format="JPEG", quality=90)
+	return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class PerceptualHashTest(SimpleTestCase):
+	def test_dhash_survives_reencoding(self):
+		from api.duplicates import hamming
+		from api.media import compress_image_bytes, dhash
+		original = make_scene(1).read()
+		_, smaller = compress_image_bytes(original, "a.jpg", 640, 40)
+		self.assertLessEqual(hamming(dhash(original), dhash(smaller)), 4)
+		self.assertGreater(hamming(dhash(original), dhash(make_scene(2).read())), 12)
+
+	def test_bktree_matches_linear_scan(self):
+		from api.duplicates import BKTree, hamming
+		rng = random.Random(3)
+		values = [rng.getrandbits(64) for _ in range(3000)]
+		values += [v ^ (1 << rng.randrange(64)) for v in values[:200]]
+		tree = BKTree()
+		for i, v in enumerate(values):
+			tree.add(v, i)
+		for q in values[:50]:
+			expected = sorted(i for i, v in enumerate(values) if hamming(q, v) <= 4)
+			self.assertEqual(sorted(item for _, _, item in tree.search(q, 4)), expected)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_POOL_WORKERS=0, PHASH_MAX_DISTANCE=6)
+class DuplicatePhotoTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="dp", email="dp@example.com")
+		self.other = User.objects.create_user(username="dq", email="dq@example.com")
+		self.client = APIClient()
+
+	def _post(self, user, image):
+		self.client.force_authenticate(user=user)
+		res = self.client.post("/api/reports", {
+			"title": "Pothole", "description": "Big one", "assigned_department_id": self.police.pk, "images": [image],
+		}, format="multipart")
+		self.assertEqual(res.status_code, 201)
+		return res
+
+	def test_banded_lookup_finds_every_hash_within_radius(self):
+		from api.duplicates import index_image_hashes, similar_images, to_signed
+		complaint = Complaint.objects.create(user=self.citizen, title="T", description="D")
+		base = 0x0123456789ABCDEF
+		# Six flipped bits spread over all four bands: no band matches exactly.
+		near = base ^ (1 << 1) ^ (1 << 2) ^ (1 << 17) ^ (1 << 33) ^ (1 << 49) ^ (1 << 50)
+		far = base ^ sum(1 << b for b in range(0, 64, 8))
+		images = ComplaintImage.objects.bulk_create([
+			ComplaintImage(complaint=complaint, image="a.jpg", phash=to_signed(v)) for v in (near, far)
+		])
+		index_image_hashes(images)
+		hits = similar_images(base, radius=6)
+		self.assertEqual([(d, i) for d, i, _ in hits], [(6, images[0].pk)])
+
+	def test_create_flags_probable_duplicate(self):
+		first = self._post(self.citizen, make_scene(5)).data["report"]["id"]
+		self._post(self.citizen, make_scene(9))
+		res = self._post(self.citizen, make_scene(5, resize_to=(1200, 900)))
+		self.assertTrue(res.data["possible_duplicate"])
+		self.assertEqual([d["id"] for d in res.data["duplicates"]], [first])
+		self.assertEqual(res.data["report"]["duplicate_of"], first)
+
+		# Another citizen is told it is a duplicate, but not which report it repeats.
+		res = self._post(self.other, make_scene(5, name="other.jpg"))
+		self.assertTrue(res.data["possible_duplicate"])
+		self.assertEqual(res.data["duplicates"], [])
+
+		admin = User.objects.create_superuser(username="dadm", email="dadm@example.com", password="pass")
+		self.client.force_authenticate(user=admin)
+		res = self.client.get("/api/reports", {"duplicate": "true"})
+		self.assertEqual(res.data["count"], 2)
+		self.assertTrue(all(r["duplicate_of"] == first for r in res.data["results"]))
+
+
+class TextDuplicateTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="tx", email="tx@example.com")
+		self.other = User.objects.create_user(username="ty", email="ty@example.com")
+		self.client = APIClient()
+
+	def _post(self, user, title, description, department):
+		self.client.force_authenticate(user=user)
+		res = self.client.post("/api/reports", {
+			"title": title, "description": description, "location": "MG Road", "assigned_department_id": department.pk,
+		}, format="multipart")
+		self.assertEqual(res.status_code, 201)
+		return res
+
+	def test_similarity_estimates_jaccard(self):
+		from api.duplicates import minhash, shingles, signature_similarity
+		a = "streetlight not working on mg road near the bus stop since last week"
+		b = "streetlight not working on mg road near the bus stop since monday"
+		sa, sb = shingles(a), shingles(b)
+		jaccard = len(sa & sb) / len(sa | sb)
+		self.assertAlmostEqual(signature_similarity(minhash(a), minhash(b)), jaccard, delta=0.2)
+		self.assertLess(signature_similarity(minhash(a), minhash("garbage dumped behind the school")), 0.2)
+		self.assertIsNone(minhash("  !! "))
+
+	def test_create_links_open_reports_in_same_department(self):
+		first = self._post(self.citizen, "Streetlight not working", "The streetlight near the bus stop has been off for a week", self.police)
+		self._post(self.citizen, "Streetlight not working", "The streetlight near the bus stop has been off for a week", self.roads)
+		self._post(self.citizen, "Garbage pile", "Garbage dumped behind the school", self.police)
+		first_id = first.data["report"]["id"]
+		etag = self.client.get(f"/api/reports/{first_id}")["ETag"]
+
+		res = self._post(self.citizen, "Streetlight not working", "Streetlight near the bus stop off for a week now", self.police)
+		new_id = res.data["report"]["id"]
+		self.assertEqual([r["id"] for r in res.data["similar_reports"]], [first_id])
+
+		detail = self.client.get(f"/api/reports/{new_id}").data
+		self.assertEqual([r["id"] for r in detail["similar_reports"]], [first_id])
+		# The earlier report lists the new one too, and its cached copy is invalidated.
+		res = self.client.get(f"/api/reports/{first_id}", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([r["id"] for r in res.data["similar_reports"]], [new_id])
+
+		# Closed reports are no longer candidates.
+		Complaint.objects.filter(pk__in=[first_id, new_id]).update(status=Complaint.Status.RESOLVED)
+		res = self._post(self.citizen, "Streetlight not working", "The streetlight near the bus stop has been off for a week", self.police)
+		self.assertEqual(res.data["similar_reports"], [])
+
+	def test_links_hidden_from_other_citizens(self):
+		self._post(self.citizen, "Broken water pipe", "Water pipe burst outside house number 12", self.police)
+		res = self._post(self.other, "Broken water pipe", "Water pipe burst outside house number 12", self.police)
+		self.assertEqual(res.data["similar_reports"], [])
+		detail = self.client.get(f"/api/reports/{res.data['report']['id']}").data
+		self.assertEqual(detail["similar_reports"], [])
+
+	def test_candidates_follow_moves_and_edits(self):
+		text = ("Broken water pipe", "Water pipe burst outside house number 12")
+		first = Complaint.objects.get(pk=self._post(self.citizen, *text, self.police).data["report"]["id"])
+		first.assigned_department = self.roads
+		first.save()
+		self.assertEqual(self._post(self.other, *text, self.police).data["similar_reports"], [])
+		res = self._post(self.citizen, *text, self.roads)
+		self.assertEqual([r["id"] for r in res.data["similar_reports"]], [first.pk])
+		second_id = res.data["report"]["id"]
+
+		# Re-indexed under its new wording only
+		first.title, first.description = "Garbage pile", "Garbage dumped behind the school"
+		first.save(update_fields=["title", "description"])
+		res = self._post(self.citizen, "Garbage pile", "Garbage dumped behind the school", self.roads)
+		self.assertEqual([r["id"] for r in res.data["similar_reports"]], [first.pk])
+		res = self._post(self.citizen, *text, self.roads)
+		self.assertEqual([r["id"] for r in res.data["similar_reports"]], [second_id])
+
+	def test_link_refreshes_matched_owners_list_and_pushes(self):
+		share_list_versions(self)
+		text = ("Broken water pipe", "Water pipe burst outside house number 12")
+		first_id = self._post(self.citizen, *text, self.police).data["report"]["id"]
+		etag = self.client.get("/api/reports")["ETag"]
+		with mock.patch("api.duplicates.publish") as publish:
+			self._post(self.other, *text, self.police)
+		self.assertEqual([event["id"] for _, event in publish.call_args.args[0]], [first_id])
+		self.client.force_authenticate(user=self.citizen)
+		res = self.client.get("/api/reports", HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+
+	def test_backfill_command(self):
+		from django.core.management import call_command
+		from .models import ComplaintTextSignature, TextHashBand
+		Complaint.objects.create(user=self.citizen, title="Pothole", description="Deep pothole", assigned_department=self.police)
+		Complaint.objects.create(user=self.citizen, title="", description="", assigned_department=self.police)
+		out = io.StringIO()
+		call_command("backfill_text_signatures", "--batch-size", "1", stdout=out)
+		self.assertIn("1 reports indexed, 1 without text", out.getvalue())
+		self.assertEqual(ComplaintTextSignature.objects.count(), 1)
+		self.assertEqual(TextHashBand.objects.count(), 16)
+
+
+class ExportTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="ex", email="ex@example.com")
+		self.other = User.objects.create_user(username="ey", email="ey@example.com")
+		for i in range(5):
+			c = Complaint.objects.create(
+				user=self.citizen, title=f"Report {i}", description="Line one\nline, two", assigned_department=self.police,
+				status=Complaint.Status.RESOLVED if i == 4 else Complaint.Status.OPEN,
+			)
+			ComplaintImage.objects.create(complaint=c, image=f"complaints/images/{i}.jpg")
+		Complaint.objects.create(user=self.other, title="Not mine", description="D", assigned_department=self.roads)
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.citizen)
+
+	def test_csv_respects_visibility_and_streams_per_chunk(self):
+		import csv
+		with override_settings(STREAM_CHUNK_SIZE=2), CaptureQueriesContext(connection) as ctx:
+			res = self.client.get("/api/reports/export")
+			body = b"".join(res.streaming_content).decode()
+		self.assertEqual(res.status_code, 200)
+		self.assertTrue(res["Content-Type"].startswith("text/csv"))
+		rows = list(csv.DictReader(io.StringIO(body)))
+		self.assertEqual([r["title"] for r in rows], [f"Report {i}" for i in range(5)])
+		self.assertEqual(rows[0]["description"], "Line one\nline, two")
+		self.assertEqual(rows[0]["department"], "Police")
+		self.assertTrue(rows[0]["images"].endswith("complaints/images/0.jpg"))
+		# One image query per chunk of two on top of the cursor reads, never one per row.
+		image_queries = [q for q in ctx.captured_queries if "complaints_complaintimage" in q["sql"]]
+		self.assertEqual(len(image_queries), 3)
+
+	def test_ndjson_with_filters(self):
+		import json
+		res = self.client.get("/api/reports/export", {"output": "ndjson", "status": "open", "created_after": "2000-01-01"})
+		rows = [json.loads(line) for line in b"".join(res.streaming_content).decode().splitlines()]
+		self.assertEqual(len(rows), 4)
+		self.assertEqual(rows[0]["user"], "ex")
+
+		res = self.client.get("/api/reports/export", {"created_before": "2000-01-01"})
+		self.assertEqual(b"".join(res.streaming_content).decode().count("\n"), 1)  # header only
+		self.assertEqual(self.client.get("/api/reports/export", {"created_after": "yesterday"}).status_code, 400)
+		self.assertEqual(self.client.get("/api/reports/export", {"output": "xml"}).status_code, 400)
+
+	def test_command(self):
+		import csv
+		from django.core.management import call_command
+		out = io.StringIO()
+		call_command("export_complaints", "--output", "ndjson", "--as-user", "ey", stdout=out)
+		self.assertEqual(len(out.getvalue().splitlines()), 1)
+		self.assertIn('"Not mine"', out.getvalue())
+		out = io.StringIO()
+		call_command("export_complaints", "--status", "resolved", stdout=out)
+		self.assertEqual([r[2] for r in csv.reader(io.StringIO(out.getvalue()))], ["title", "Report 4"])
+
+
+@override_settings(EMAIL_CONFIGURED=True)
+class BulkIngestTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="bi", email="bi@gmail.com")
+		self.authority = User.objects.create_user(username="bia", email="bia@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.police)
+		self.admin = User.objects.create_superuser(username="biadm", email="biadm@example.com", password="pass")
+		self.client = APIClient()
+
+	def _ndjson(self, rows):
+		import json
+		return "".join(json.dumps(row) + "\n" for row in rows)
+
+	def test_ndjson_rows_validated_and_created_in_bulk(self):
+		rows = [
+			{"ref": "a", "title": "Light out", "description": "Pole 12", "department": self.police.pk,
+			 "latitude": 12.97, "longitude": 77.59, "complaint_type": "Electricity", "user": "bi"},
+			{"ref": "b", "title": "Pothole", "description": "Deep", "department": "roads"},
+			{"ref": "c", "title": "No department", "description": "D"},
+			{"ref": "d", "title": "Bad type", "description": "D", "department": "Police", "complaint_type": "Noise"},
+			{"ref": "e", "title": "Unknown citizen", "description": "D", "department": "Police", "user": "nobody"},
+		]
+		self.client.force_authenticate(user=self.admin)
+		with mock.patch("api.services._has_mx_record", return_value=True), mock.patch("api.services.kick_notification_outbox"):
+			with CaptureQueriesContext(connection) as ctx:
+				res = self.client.post("/api/reports/bulk", self._ndjson(rows), content_type="application/x-ndjson")
+		self.assertEqual(res.status_code, 201)
+		self.assertEqual((res.data["created"], res.data["failed"]), (2, 3))
+		self.assertEqual([r.get("error") for r in res.data["results"]], [
+			None, None, "department is required", "Invalid complaint_type", "Unknown user",
+		])
+		first = Complaint.objects.get(pk=res.data["results"][0]["id"])
+		from api.geo import encode
+		self.assertEqual((first.user, first.assigned_department, first.geohash), (self.citizen, self.police, encode(12.97, 77.59)))
+		self.assertEqual(Complaint.objects.get(pk=res.data["results"][1]["id"]).user, self.admin)
+		# Only the citizen with a deliverable address gets an email, queued in the same batch.
+		self.assertEqual(list(NotificationOutbox.objects.values_list("recipient", flat=True)), ["bi@gmail.com"])
+		self.assertEqual(ComplaintStat.objects.get(department=self.roads, status="open").count, 1)
+		inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "complaints_complaint"')]
+		self.assertEqual(len(inserts), 1)
+		# Bulk reports are indexed for text duplicates like single ones
+		from .models import ComplaintTextSignature, TextHashBand
+		created = [r["id"] for r in res.data["results"][:2]]
+		self.assertEqual(sorted(ComplaintTextSignature.objects.values_list("complaint_id", flat=True)), sorted(created))
+		self.assertTrue(TextHashBand.objects.filter(complaint_id=created[1]).exists())
+
+	@override_settings(BULK_INGEST_CHUNK_SIZE=2)
+	def test_each_chunk_commits_separately(self):
+		rows = [{"title": f"Light {i}", "description": "Pole", "department": "Police"} for i in range(5)]
+		self.client.force_authenticate(user=self.admin)
+		with mock.patch("api.services._has_mx_record", return_value=True), mock.patch("api.services.kick_notification_outbox"):
+			with CaptureQueriesContext(connection) as ctx:
+				res = self.client.post("/api/reports/bulk", self._ndjson(rows), content_type="application/x-ndjson")
+		self.assertEqual(res.data["created"], 5)
+		inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "complaints_complaint"')]
+		self.assertEqual(len(inserts), 3)
+		from .models import ComplaintTextSignature
+		self.assertEqual(ComplaintTextSignature.objects.filter(complaint_id__in=[r["id"] for r in res.data["results"]]).count(), 5)
+
+	def test_authority_limited_to_own_department(self):
+		import csv
+		buffer = io.StringIO()
+		writer = csv.writer(buffer)
+		writer.writerow(["title", "description", "department", "user"])
+		writer.writerow(["Theft", "Bike stolen", "Police", ""])
+		writer.writerow(["Pothole", "Deep", "Roads", ""])
+		writer.writerow(["On behalf", "D", "Police", "bi"])
+		self.client.force_authenticate(user=self.authority)
+		res = self.client.post("/api/reports/bulk", buffer.getvalue(), content_type="text/csv")
+		self.assertEqual([r.get("error") for r in res.data["results"]], [None, "Department not allowed", "user is not allowed"])
+
+		self.client.force_authenticate(user=self.citizen)
+		self.assertEqual(self.client.post("/api/reports/bulk", "", content_type="text/csv").status_code, 403)
+		holder = User.objects.create_user(username="bin", email="bin@example.com")  # profile, but not staff
+		AuthorityProfile.objects.create(user=holder, department=self.police)
+		self.client.force_authenticate(user=holder)
+		res = self.client.post("/api/reports/bulk", self._ndjson([{"title": "T", "description": "D", "department": "Police"}]),
+							   content_type="application/x-ndjson")
+		self.assertEqual(res.status_code, 403)
+		self.client.force_authenticate(user=self.admin)
+		res = self.client.post("/api/reports/bulk", "{not json\n", content_type="application/x-ndjson")
+		self.assertEqual(res.status_code, 400)
+		with override_settings(BULK_INGEST_MAX_ROWS=1):
+			res = self.client.post("/api/reports/bulk", self._ndjson([{}, {}]), content_type="application/x-ndjson")
+		self.assertEqual(res.status_code, 413)
+
+	def test_command(self):
+		from django.core.management import call_command
+		path = tempfile.mktemp(suffix=".ndjson")
+		with open(path, "w") as f:
+			f.write(self._ndjson([{"title": "T", "description": "D", "department": "Police"}, {"title": "T"}]))
+		out = io.StringIO()
+		call_command("ingest_complaints", path, "--as-user", "biadm", stdout=out)
+		self.assertIn("1 reports created, 1 failed", out.getvalue())
+		self.assertEqual(Complaint.objects.filter(user=self.admin).count(), 1)
+
+
+@override_settings(EMAIL_CONFIGURED=True)
+class BulkStatusTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="bs", email="bs@gmail.com")
+		self.authority = User.objects.create_user(username="bsa", email="bsa@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.police)
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.citizen)
+		self.ids = [
+			self.client.post("/api/reports", {
+				"title": f"Garbage {i}", "description": "Pile", "complaint_type": "Garbage", "assigned_department_id": dept.pk,
+			}, format="multipart").data["report"]["id"]
+			for i, dept in enumerate([self.police] * 4 + [self.roads])
+		]
+		Complaint.objects.filter(pk=self.ids[1]).update(status="in_progress")
+		Complaint.objects.filter(pk=self.ids[2]).update(status="resolved")
+		from api.stats import reconcile_stats
+		reconcile_stats()
+		NotificationOutbox.objects.all().delete()
+
+	def test_moves_each_source_status_with_one_update(self):
+		from .models import ComplaintEvent
+		tracking = str(Complaint.objects.get(pk=self.ids[3]).tracking_id)
+		self.client.force_authenticate(user=self.authority)
+		with mock.patch("api.services._has_mx_record", return_value=True), mock.patch("api.services.kick_notification_outbox"):
+			with CaptureQueriesContext(connection) as ctx:
+				res = self.client.post("/api/reports/bulk-status", {
+					"ids": [self.ids[0], self.ids[1], self.ids[2], self.ids[4], "x", 999999],
+					"tracking_ids": [tracking], "status": "resolved", "person_in_charge": "Asha",
+				}, format="json")
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(
+			[(r["id"], r["from_status"]) for r in res.data["changed"]],
+			[(self.ids[0], "open"), (self.ids[1], "in_progress"), (self.ids[3], "open")],
+		)
+		self.assertEqual(sorted(str(r.get("id", r.get("tracking_id"))) for r in res.data["rejected"]), sorted([
+			"x", "999999", str(self.ids[4]), str(self.ids[2]),
+		]))
+		# Another department's report is rejected as not found and left alone.
+		self.assertEqual(Complaint.objects.get(pk=self.ids[4]).status, "open")
+		updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "complaints_complaint"')]
+		self.assertEqual(len(updates), 2)
+		self.assertTrue(all('"assigned_department_id" = ' in q["sql"] for q in updates))
+
+		self.assertEqual(Complaint.objects.filter(status="resolved", person_in_charge="Asha").count(), 3)
+		self.assertEqual(ComplaintEvent.objects.filter(kind="status", to_status="resolved", actor=self.authority).count(), 3)
+		# Only in_progress -> resolved sends the resolved notice, as the single-report patch does.
+		self.assertEqual(res.data["notifications"], 1)
+		self.assertEqual(list(NotificationOutbox.objects.values_list("kind", "complaint_id")), [("resolved", self.ids[1])])
+		self.assertEqual(ComplaintStat.objects.get(department=self.police, status="resolved").count, 4)
+		self.assertEqual(ComplaintStat.objects.get(department=self.police, status="open").count, 0)
+
+	def test_validation_and_roles(self):
+		res = self.client.post("/api/reports/bulk-status", {"ids": self.ids, "status": "closed"}, format="json")
+		self.assertEqual(res.status_code, 403)
+		self.client.force_authenticate(user=self.authority)
+		self.assertEqual(self.client.post("/api/reports/bulk-status", {"ids": self.ids, "status": "gone"}, format="json").status_code, 400)
+		self.assertEqual(self.client.post("/api/reports/bulk-status", {"status": "closed"}, format="json").status_code, 400)
+		for person in ({"name": "Asha"}, ["Asha"], 7, "A" * 256):
+			res = self.client.post(
+				"/api/reports/bulk-status", {"ids": self.ids, "status": "closed", "person_in_charge": person}, format="json",
+			)
+			self.assertEqual(res.status_code, 400, person)
+		self.assertFalse(Complaint.objects.filter(status="closed").exists())
+		with override_settings(BULK_STATUS_MAX_IDS=2):
+			res = self.client.post("/api/reports/bulk-status", {"ids": self.ids, "status": "closed"}, format="json")
+		self.assertEqual(res.status_code, 413)
+
+	def test_profile_without_staff_flag_is_not_an_authority(self):
+		# Like the detail view, which answers 404 for this user
+		holder = User.objects.create_user(username="bsn", email="bsn@example.com")
+		AuthorityProfile.objects.create(user=holder, department=self.police)
+		self.client.force_authenticate(user=holder)
+		self.assertEqual(self.client.patch(f"/api/reports/{self.ids[0]}", {"status": "closed"}, format="json").status_code, 404)
+		res = self.client.post("/api/reports/bulk-status", {"ids": self.ids, "status": "closed"}, format="json")
+		self.assertEqual(res.status_code, 403)
+		self.assertFalse(Complaint.objects.filter(pk__in=self.ids, status="closed").exists())
+
+
+class TimelineTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="tl", email="tl@example.com")
+		self.other = User.objects.create_user(username="tm", email="tm@example.com")
+		self.authority = User.objects.create_user(username="tla", email="tla@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.police)
+		self.client = APIClient()
+		self.client.force_authenticate(user=self.citizen)
+		self.pk = self.client.post("/api/reports", {
+			"title": "Signal broken", "description": "Junction 4", "assigned_department_id": self.police.pk,
+		}, format="multipart").data["report"]["id"]
+
+	def test_changes_append_events_read_newest_first(self):
+		from .models import ComplaintEvent
+		self.client.force_authenticate(user=self.authority)
+		self.client.patch(f"/api/reports/{self.pk}", {"status": "in_progress", "person_in_charge": "Ravi"}, format="json")
+		self.client.patch(f"/api/reports/{self.pk}", {"signature": "R."}, format="json")
+		self.client.patch(f"/api/reports/{self.pk}", {"status": "resolved"}, format="json")
+
+		res = self.client.get(f"/api/reports/{self.pk}/timeline", {"page_size": 2})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([(e["kind"], e["to_status"]) for e in res.data["results"]], [("status", "resolved"), ("updated", None)])
+		self.assertEqual(res.data["results"][1]["data"], {"fields": ["resolution_signature"]})
+		res = self.client.get(f"/api/reports/{self.pk}/timeline", {"page_size": 2, "cursor": res.data["next_cursor"]})
+		self.assertEqual([e["kind"] for e in res.data["results"]], ["status", "created"])
+		self.assertEqual(res.data["results"][0]["data"], {"person_in_charge": "Ravi"})
+		self.assertEqual(res.data["results"][0]["actor"]["username"], "tla")
+		self.assertIsNone(res.data["next_cursor"])
+
+		self.client.force_authenticate(user=self.other)
+		self.assertEqual(self.client.get(f"/api/reports/{self.pk}/timeline").status_code, 404)
+		self.client.force_authenticate(user=self.citizen)
+		self.client.delete(f"/api/reports/{self.pk}")
+		self.assertEqual(ComplaintEvent.objects.filter(complaint_id=self.pk).latest("created_at", "id").kind, "deleted")
+
+	def test_lists_do_not_load_timeline(self):
+		with CaptureQueriesContext(connection) as ctx:
+			self.client.get("/api/reports")
+			self.client.get(f"/api/reports/{self.pk}")
+		self.assertFalse(any('"timeline"' in q["sql"] for q in ctx.captured_queries))
+
+	def test_migrate_timeline_command(self):
+		from django.core.management import call_command
+		from .models import ComplaintEvent
+		Complaint.objects.filter(pk=self.pk).update(timeline=[
+			{"status": "in_progress", "date": "2024-01-02T10:00:00Z", "note": "Crew sent"}, "called back",
+		])
+		other = Complaint.objects.create(user=self.citizen, title="T", description="D", timeline={"status": "bogus"})
+		out = io.StringIO()
+		call_command("migrate_timeline", "--batch-size", "1", stdout=out)
+		self.assertIn("2 timelines moved into 3 events", out.getvalue())
+		imported = list(ComplaintEvent.objects.filter(kind="imported").order_by("complaint_id", "created_at"))
+		self.assertEqual([(e.complaint_id, e.to_status) for e in imported], [(self.pk, "in_progress"), (self.pk, None), (other.pk, None)])
+		self.assertEqual(imported[0].created_at.year, 2024)
+		self.assertEqual(imported[1].data, {"value": "called back"})
+		self.assertFalse(Complaint.objects.filter(timeline__isnull=False).exists())
+		call_command("migrate_timeline", stdout=io.StringIO())
+		self.assertEqual(ComplaintEvent.objects.filter(kind="imported").count(), 3)
+
+
+class PushTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="pu", email="pu@example.com")
+		self.other = User.objects.create_user(username="pv", email="pv@example.com")
+		self.authority = User.objects.create_user(username="pua", email="pua@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.roads)
+		self.complaint = Complaint.objects.create(user=self.citizen, title="T", description="D", assigned_department=self.police)
+
+	def test_hub_routes_events_by_channel(self):
+		import asyncio
+		from api.push import Hub, InMemoryBroker, Subscription, channels_for, complaint_event
+		from api.roles import ADMIN, AUTHORITY, CITIZEN
+
+		async def run():
+			hub = Hub()
+			loop = asyncio.get_running_loop()
+			owner = Subscription(channels_for(CITIZEN, self.citizen.pk, None), loop)
+			stranger = Subscription(channels_for(CITIZEN, self.other.pk, None), loop)
+			old_dept = Subscription(channels_for(AUTHORITY, self.authority.pk, self.roads.pk), loop)
+			admin = Subscription(channels_for(ADMIN, 1, None), loop)
+			for sub in (owner, stranger, old_dept, admin):
+				hub.add(sub)
+			# Moved out of Roads: its authorities hear about it one last time.
+			InMemoryBroker(hub).publish([complaint_event("report.updated", self.complaint, [self.roads.pk])])
+			await asyncio.sleep(0)
+			return [sub.queue.qsize() for sub in (owner, stranger, old_dept, admin)]
+
+		self.assertEqual(asyncio.run(run()), [1, 0, 1, 1])
+
+	def test_stream_channels_follow_visibility(self):
+		from api.push import ALL_CHANNEL
+		from api.views import _stream_subscriber
+		from django.test import RequestFactory
+		holder = User.objects.create_user(username="pun", email="pun@example.com")
+		AuthorityProfile.objects.create(user=holder, department=self.roads)
+		admin = User.objects.create_superuser(username="pad", email="pad@example.com", password="pass")
+		expected = {
+			self.authority: [f"user:{self.authority.pk}", f"dept:{self.roads.pk}"],
+			holder: [f"user:{holder.pk}"],  # no is_staff: sees only their own reports, so hears only about them
+			admin: [ALL_CHANNEL],
+		}
+		for user, channels in expected.items():
+			request = RequestFactory().get("/api/reports/stream", HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+			with mock.patch("api.views.connection"):
+				self.assertEqual(_stream_subscriber(request)[1], channels, user.username)
+
+	def test_ticket_is_single_use(self):
+		from api.push import issue_ticket, redeem_ticket
+		ticket = issue_ticket(self.citizen)
+		self.assertEqual(redeem_ticket(ticket), self.citizen.pk)
+		self.assertIsNone(redeem_ticket(ticket))
+		self.assertIsNone(redeem_ticket("forged"))
+
+	def test_stream_needs_asgi_and_credentials(self):
+		self.assertEqual(self.client.get("/api/reports/stream").status_code, 501)
+		api = APIClient()
+		api.force_authenticate(user=self.citizen)
+		res = api.post("/api/reports/stream/ticket")
+		self.assertEqual(res.status_code, 201)
+		self.assertTrue(res.data["ticket"])
+
+	# Patched so the view cannot close the test's own connection
+	@mock.patch("api.views.connection")
+	async def test_stream_delivers_changes_the_user_can_see(self, conn):
+		import asyncio
+		from asgiref.sync import sync_to_async
+		from api.push import issue_ticket
+
+		self.assertEqual((await self.async_client.get("/api/reports/stream", {"ticket": "nope"})).status_code, 401)
+		ticket = await sync_to_async(issue_ticket)(self.citizen)
+		conn.reset_mock()
+		res = await self.async_client.get("/api/reports/stream", {"ticket": ticket})
+		# An idle stream must not pin a database connection
+		conn.close.assert_called_once_with()
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res["Content-Type"], "text/event-stream")
+		stream = aiter(res.streaming_content)
+		self.assertEqual(await anext(stream), b": connected\nretry: 3000\n\n")
+
+		def change():
+			with self.captureOnCommitCallbacks(execute=True):
+				Complaint.objects.create(user=self.other, title="Not theirs", description="D", assigned_department=self.police)
+				self.complaint.status = Complaint.Status.RESOLVED
+				self.complaint.save()
+
+		await sync_to_async(change)()
+		chunk = await asyncio.wait_for(anext(stream), 2)
+		self.assertTrue(chunk.startswith(b"event: report.updated\ndata: "))
+		self.assertIn(f'"id":{self.complaint.pk},'.encode(), chunk)
+		self.assertIn(b'"status":"resolved"', chunk)
+		# The ticket is spent
+		self.assertEqual((await self.async_client.get("/api/reports/stream", {"ticket": ticket})).status_code, 401)
+
+
+class AsyncReadViewTest(TestCase):
+	"""The async GET paths must answer exactly like the DRF views they front."""
+
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.roads, _ = Department.objects.get_or_create(name="Roads")
+		self.citizen = User.objects.create_user(username="au", email="au@example.com")
+		self.authority = User.objects.create_user(username="aa", email="aa@example.com", is_staff=True)
+		AuthorityProfile.objects.create(user=self.authority, department=self.roads)
+		self.mine = Complaint.objects.create(user=self.citizen, title="Pothole on Main", description="Deep", assigned_department=self.police)
+		Complaint.objects.create(user=self.citizen, title="Streetlight", description="Out", assigned_department=self.roads)
+		self.token = str(RefreshToken.for_user(self.citizen).access_token)
+
+	async def compare(self, path, view_class, headers=None, fast=True, **kwargs):
+		from asgiref.sync import sync_to_async
+		from django.test import AsyncRequestFactory, RequestFactory
+		from rest_framework.response import Response
+		from api.async_views import FAST_GETS, read_path
+
+		headers = {"Authorization": f"Bearer {self.token}", **(headers or {})}
+
+		def sync_get():
+			response = view_class.as_view()(RequestFactory().get(path, headers=headers), **kwargs)
+			return response.render() if hasattr(response, "render") else response
+
+		expected = await sync_to_async(sync_get)()
+		view = read_path(view_class.as_view(), FAST_GETS[view_class])
+		# Like the test client, keep the view from closing the test's connection
+		with mock.patch("api.async_views.close_old_connections"):
+			actual = await view(AsyncRequestFactory().get(path, headers=headers), **kwargs)
+		# DRF Responses only come back from the sync fallback
+		self.assertEqual(not isinstance(actual, Response), fast, path)
+		if hasattr(actual, "render"):
+			actual = await sync_to_async(actual.render)()  # the handler does this for the sync fallback
+		self.assertEqual(actual.status_code, expected.status_code, path)
+		self.assertEqual(actual.content, expected.content, path)
+		for header in ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Vary", "Allow"):
+			self.assertEqual(actual.get(header), expected.get(header), f"{path} {header}")
+		return actual
+
+	async def test_matches_sync_views(self):
+		from api.views import ComplaintDetailView, ComplaintListCreateView, DepartmentListView, MeView, ReportTrackView
+
+		await self.compare("/api/user/me", MeView)
+		await self.compare("/api/departments", DepartmentListView)
+		await self.compare("/api/reports", ComplaintListCreateView)
+		await self.compare("/api/reports?page_size=1&page=2&count=none", ComplaintListCreateView)
+		await self.compare("/api/reports?status=bogus", ComplaintListCreateView)
+		await self.compare("/api/reports?pagination=cursor", ComplaintListCreateView, fast=False)
+		detail = await self.compare(f"/api/reports/{self.mine.pk}", ComplaintDetailView, pk=self.mine.pk)
+		self.assertEqual(detail.status_code, 200)
+		await self.compare(
+			f"/api/reports/{self.mine.pk}", ComplaintDetailView, {"If-None-Match": detail["ETag"]}, pk=self.mine.pk,
+		)
+		await self.compare("/api/reports/999999", ComplaintDetailView, pk=999999)
+		track = f"/api/reports/{self.mine.tracking_id}/track"
+		await self.compare(track, ReportTrackView, tracking_id=self.mine.tracking_id)
+		await self.compare("/api/reports?format=json", ComplaintListCreateView, fast=False)
+
+	async def test_other_users_and_anonymous_requests(self):
+		from asgiref.sync import sync_to_async
+		from api.views import ComplaintDetailView, ReportTrackView
+
+		self.token = await sync_to_async(lambda: str(RefreshToken.for_user(self.authority).access_token))()
+		res = await self.compare(f"/api/reports/{self.mine.pk}", ComplaintDetailView, pk=self.mine.pk)
+		self.assertEqual(res.status_code, 404)
+		res = await self.compare(f"/api/reports/{self.mine.tracking_id}/track", ReportTrackView, tracking_id=self.mine.tracking_id)
+		self.assertEqual(res.status_code, 403)
+		self.token = "garbage"
+		res = await self.compare(f"/api/reports/{self.mine.pk}", ComplaintDetailView, fast=False, pk=self.mine.pk)
+		self.assertEqual(res.status_code, 401)
+
+
+class MetricsTest(TestCase):
+	def setUp(self):
+		self.police, _ = Department.objects.get_or_create(name="Police")
+		self.citizen = User.objects.create_user(username="mu", email="mu@example.com")
+		Complaint.objects.create(user=self.citizen, title="T", description="D", assigned_department=self.police)
+		self.api = APIClient()
+		self.api.force_authenticate(user=self.citizen)
+
+	def sample(self, name, **labels):
+		from api.metrics import registry
+		value = registry().get_sample_value(name, labels)
+		return value or 0
+
+	def test_records_per_view_request_metrics(self):
+		before = self.sample("urbaniq_http_request_duration_seconds_count", view="reports", method="GET", status="200")
+		queries = self.sample("urbaniq_db_queries_per_request_sum", view="reports")
+		serializing = self.sample("urbaniq_serializer_duration_seconds_sum", view="reports")
+		size = self.sample("urbaniq_http_response_size_bytes_sum", view="reports")
+		res = self.api.get("/api/reports")
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(self.sample("urbaniq_http_request_duration_seconds_count", view="reports", method="GET", status="200"), before + 1)
+		# rows + images, plus the count
+		self.assertGreaterEqual(self.sample("urbaniq_db_queries_per_request_sum", view="reports") - queries, 3)
+		self.assertGreater(self.sample("urbaniq_serializer_duration_seconds_sum", view="reports"), serializing)
+		self.assertEqual(self.sample("urbaniq_http_response_size_bytes_sum", view="reports") - size, len(res.content))
+
+	def test_counts_cache_lookups_and_notifications(self):
+		from api.metrics import count_notification
+		share_list_versions(self)
+		hits = self.sample("urbaniq_cache_lookups_total", cache="http_conditional", result="hit")
+		etag = self.api.get("/api/reports")["ETag"]
+		self.assertEqual(self.api.get("/api/reports", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+		self.assertEqual(self.sample("urbaniq_cache_lookups_total", cache="http_conditional", result="hit"), hits + 1)
+		sent = self.sample("urbaniq_notifications_total", channel="email", outcome="sent")
+		count_notification("email", "sent", 3)
+		self.assertEqual(self.sample("urbaniq_notifications_total", channel="email", outcome="sent"), sent + 3)
+
+	@override_settings(METRICS_TOKEN="s3cret")
+	def test_endpoint_exposes_text_format(self):
+		self.api.get("/api/reports")
+		res = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+		self.assertEqual(res.status_code, 200)
+		self.assertTrue(res["Content-Type"].startswith("text/plain"))
+		self.assertIn(b'urbaniq_http_request_duration_seconds_bucket{', res.content)
+		self.assertEqual(self.client.get("/metrics").status_code, 401)
+		self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+
+	@override_settings(METRICS_TOKEN="")
+	def test_endpoint_closed_without_token_outside_debug(self):
+		self.assertEqual(self.client.get("/metrics").status_code, 403)
+		with override_settings(DEBUG=True):
+			self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+@tag("bench")
+@skipUnless(connection.vendor == "postgresql", "bench_budgets.json is measured against Postgres")
+class BenchBudgetTest(TestCase):
+	"""Query counts must not grow with the data: a small seeded run has to fit the committed budget.
+
+	Latency is left to full runs of `manage.py bench`; run only this with `manage.py test --tag bench`.
+	"""
+
+	def test_endpoints_fit_query_budget(self):
+		from django.core.management import call_command
+		out = io.StringIO()
+		call_command(
+			"bench", complaints=150, users=10, departments=3, images=1, runs=2, queries_only=True,
+			output=None, stdout=out,
+		)
+		self.assertIn("endpoints within budget", out.getvalue())
@@ -1,4 +1,8 @@
 #!/bin/sh
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  # Samples of earlier runs would be summed into the new ones
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
 echo "Applying migrations..."
 python manage.py migrate --noinput || true
 echo "Collecting static..."